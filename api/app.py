@@ -5,16 +5,21 @@ Enterprise-grade FastAPI application for real-time fraud detection
 """
 import sys
 import os
+import io
+import asyncio
 import time
 import logging
 import uuid
+import json
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Optional
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Depends
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.requests import ClientDisconnect
 import pandas as pd
 import uvicorn
 
@@ -23,11 +28,26 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.settings import settings
 from api.models import (
-    TransactionRequest, UserFriendlyTransactionRequest, BatchTransactionRequest, 
-    PredictionResponse, HybridPredictionResponse, BatchPredictionResponse, HealthResponse, ErrorResponse
+    PackedTransactionRequest, UserFriendlyTransactionRequest, BatchTransactionRequest,
+    BatchUserFriendlyTransactionRequest, PredictionResponse, HybridPredictionResponse,
+    BatchPredictionResponse, BatchHybridPredictionResponse, HealthResponse, MetricsResponse, RulesResponse,
+    ModelsResponse, ErrorResponse
 )
 from services.ml_service import ml_service
 from services.feature_generator import feature_generator
+from services.rule_engine import rule_engine, RuleSet
+from services.inference_executor import ExecutorSaturatedError
+from services.stream_scoring import (
+    iter_lines, score_ndjson_chunk, LineTooLongError, open_csv_chunks, csv_chunk_columns,
+    score_columns_chunk, csv_result_header, RESULT_MEDIA_TYPES
+)
+from services.arrow_scoring import (
+    arrow_available, check_schema, score_record_batch, AsyncBodyFile, ResultEncoder,
+    ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE
+)
+from api.responses import NDJSONStreamingResponse, RequestStreamingResponse, msgpack, orjson, response_content
+from api.transport import MsgPackRoute, negotiated_response
+from api.warm_up import endpoint_warm_up
 
 # Configure logging
 logging.basicConfig(
@@ -40,14 +60,66 @@ logger = logging.getLogger(__name__)
 startup_time = time.time()
 
 
+async def _follow_model_registry():
+    """Swap in model versions activated through other workers (or by editing registry.json)"""
+    while True:
+        await asyncio.sleep(settings.MODEL_REGISTRY_POLL_SECONDS)
+        try:
+            await run_in_threadpool(ml_service.sync_with_registry)
+        except Exception as e:
+            logger.error(f"Model registry check failed: {str(e)}")
+
+
+async def _follow_rules_file():
+    """Recompile the rules file after it changes or is reloaded through another worker"""
+    while True:
+        await asyncio.sleep(settings.RULES_POLL_SECONDS)
+        try:
+            await run_in_threadpool(rule_engine.sync_with_rules_file)
+        except Exception as e:
+            logger.error(f"Rules file check failed: {str(e)}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan management"""
     logger.info("Starting Fraud Detection API...")
     logger.info(f"Environment: {settings.ENVIRONMENT}")
-    logger.info(f"Models loaded successfully")
+    logger.info(f"Models loaded successfully - Version: {ml_service.model_version}")
+    if orjson is None:
+        logger.warning("orjson is not installed: JSON responses are rendered with the standard library json module")
+    if msgpack is None:
+        logger.warning("msgpack is not installed: MessagePack requests will be refused with 415")
+    # Process pool workers forked from here tell themselves apart by this pid
+    ml_service.watcher_pid = os.getpid()
+    ml_service.executor.start()
+    if ml_service.executor.kind == "process":
+        logger.warning("INFERENCE_EXECUTOR=process: pool workers keep their own caches, so /health "
+                       "cache statistics cover this process only")
+        if settings.RULES_POLL_SECONDS <= 0:
+            logger.warning("RULES_POLL_SECONDS=0: pool workers cannot follow rules reloads, "
+                           "POST /rules/reload will be refused")
+    if settings.MICRO_BATCH_MAX_ROWS > 1:
+        ml_service.batcher.start()
+    registry_watcher = None
+    if settings.MODEL_REGISTRY_POLL_SECONDS > 0:
+        registry_watcher = asyncio.create_task(_follow_model_registry())
+    rules_watcher = None
+    if settings.RULES_POLL_SECONDS > 0:
+        rules_watcher = asyncio.create_task(_follow_rules_file())
+    # Synthetic traffic through every endpoint; /ready answers 200 once it is done
+    warm_up = None
+    if settings.WARM_UP_ON_STARTUP:
+        warm_up = asyncio.create_task(endpoint_warm_up.run(app))
+    else:
+        endpoint_warm_up.skip()
     yield
     logger.info("Shutting down Fraud Detection API...")
+    for task in (registry_watcher, rules_watcher, warm_up):
+        if task is not None:
+            task.cancel()
+    await ml_service.batcher.stop()
+    ml_service.executor.shutdown()
 
 
 # Initialize FastAPI app
@@ -58,6 +130,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Accept MessagePack request bodies as well as JSON
+app.router.route_class = MsgPackRoute
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -131,18 +206,54 @@ async def health_check():
         
         uptime = time.time() - startup_time
         
+        caches = {}
+        if feature_generator.draw_cache is not None:
+            caches["v_feature_draws"] = feature_generator.draw_cache.stats()
+        
         return HealthResponse(
             status="healthy" if all(models_status.values()) else "degraded",
             timestamp=datetime.utcnow().isoformat(),
             version=settings.API_VERSION,
             models_loaded=models_status,
-            uptime_seconds=uptime
+            uptime_seconds=uptime,
+            ready=endpoint_warm_up.ready,
+            warm_up_seconds=endpoint_warm_up.seconds,
+            caches=caches,
+            serializers={"orjson": orjson is not None, "msgpack": msgpack is not None}
         )
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         raise HTTPException(status_code=503, detail="Service unavailable")
 
 
+# Readiness probe
+@app.get("/ready")
+async def readiness():
+    """
+    Readiness probe for load balancers: 200 once the startup warm-up is done, 503 before
+    """
+    status = endpoint_warm_up.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+# Scheduler metrics
+@app.get("/metrics", response_model=MetricsResponse)
+async def metrics():
+    """Inference executor counters, micro-batcher queue length and batch-size / queue-depth histograms"""
+    return MetricsResponse(
+        timestamp=datetime.utcnow().isoformat(),
+        executor=ml_service.executor.stats(),
+        micro_batcher=ml_service.batcher.stats()
+    )
+
+
+def _service_unavailable(exc: ExecutorSaturatedError) -> HTTPException:
+    """503 for requests refused by admission control"""
+    logger.warning(f"Inference saturated, request refused: {str(exc)}")
+    return HTTPException(status_code=503, detail="Inference capacity exhausted, retry later",
+                         headers={"Retry-After": "1"})
+
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -154,38 +265,158 @@ async def root():
         "environment": settings.ENVIRONMENT,
         "endpoints": {
             "health": "/health",
+            "ready": "/ready",
+            "metrics": "/metrics",
             "predict": "/predict",
             "predict_friendly": "/predict/friendly",
+            "predict_friendly_batch": "/predict/friendly/batch",
             "predict_batch": "/predict/batch",
+            "predict_stream": "/predict/stream",
+            "predict_arrow": "/predict/arrow",
+            "rules": "/rules",
+            "models": "/models",
             "docs": "/docs"
         }
     }
 
 
+def _rules_response(rules: RuleSet) -> RulesResponse:
+    """Describe a compiled rule set"""
+    return RulesResponse(
+        version=rules.version,
+        source=rules.source,
+        rule_count=len(rules.rules),
+        risk_factor_count=len(rules.factor_messages),
+        table_cells=len(rules.table.cells) if rules.table is not None else None,
+        timestamp=datetime.utcnow().isoformat()
+    )
+
+
+# Active rule set
+@app.get("/rules", response_model=RulesResponse)
+async def get_rules():
+    """Describe the rule set currently used for rule-based risk scoring"""
+    return _rules_response(rule_engine.rules)
+
+
+# Reload the rules file
+@app.post("/rules/reload", response_model=RulesResponse)
+async def reload_rules():
+    """
+    Recompile the rules file (settings.RULES_PATH) and switch to it atomically
+    
+    Compilation runs off the event loop; requests already being scored finish
+    with the previous rules. If the file is invalid the current rules stay active.
+    The other server workers follow the file within settings.RULES_POLL_SECONDS.
+    """
+    if ml_service.executor.kind == "process" and settings.RULES_POLL_SECONDS <= 0:
+        raise HTTPException(status_code=409, detail="Rules cannot be reloaded in the inference process "
+                                                    "pool while RULES_POLL_SECONDS is 0")
+    try:
+        rules = await run_in_threadpool(rule_engine.reload_rules)
+        logger.info(f"Rules reloaded - Version: {rules.version}")
+        return _rules_response(rules)
+        
+    except ValueError as e:
+        logger.warning(f"Invalid rules file: {str(e)}")
+        raise HTTPException(status_code=422, detail=f"Invalid rules file: {str(e)}")
+    except OSError as e:
+        logger.error(f"Rules file could not be read: {str(e)}")
+        raise HTTPException(status_code=500, detail="Rules file could not be read")
+
+
+def _models_response() -> ModelsResponse:
+    """Describe the served model version and the registry"""
+    bundle = ml_service.bundle
+    state = ml_service.registry.state()
+    return ModelsResponse(
+        active_version=bundle.version,
+        loaded_at=bundle.loaded_at,
+        versions=ml_service.registry.versions(),
+        history=state["history"],
+        updated=state["updated"]
+    )
+
+
+# Model registry
+@app.get("/models", response_model=ModelsResponse)
+async def get_models():
+    """Describe the model version serving requests and the versions available"""
+    return await run_in_threadpool(_models_response)
+
+
+# Activate a model version
+@app.post("/models/{version}/activate", response_model=ModelsResponse)
+async def activate_model(version: str):
+    """
+    Load a model version, warm it up and switch to it atomically
+    
+    Loading runs off the event loop; requests keep being scored by the
+    current version until the swap. Other workers follow within
+    settings.MODEL_REGISTRY_POLL_SECONDS. If the version fails to load or
+    warm up, the current version stays active.
+    """
+    try:
+        await run_in_threadpool(ml_service.activate_version, version)
+        return await run_in_threadpool(_models_response)
+        
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {version}")
+    except RuntimeError as e:
+        logger.error(f"Model version {version} could not be activated: {str(e)}")
+        raise HTTPException(status_code=422, detail=f"Model version {version} could not be activated: {str(e)}")
+
+
+# Roll back to the previous model version
+@app.post("/models/rollback", response_model=ModelsResponse)
+async def rollback_model():
+    """Switch back to the version that was active before the current one"""
+    try:
+        await run_in_threadpool(ml_service.rollback)
+        return await run_in_threadpool(_models_response)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except (KeyError, RuntimeError) as e:
+        logger.error(f"Model rollback failed: {str(e)}")
+        raise HTTPException(status_code=422, detail=f"Model rollback failed: {str(e)}")
+
+
 # Single transaction prediction (legacy)
 @app.post("/predict", response_model=PredictionResponse)
-async def predict_transaction(transaction: TransactionRequest, request: Request):
+async def predict_transaction(transaction: PackedTransactionRequest, request: Request):
     """
     Predict fraud for a single transaction (legacy endpoint with V1-V28 features)
     
     - **Time**: Transaction time (seconds from first transaction)
     - **Amount**: Transaction amount (must be positive)
     - **V1-V28**: PCA-transformed features (optional, default to 0.0)
+    - **v**: Alternatively, V1-V28 as one list of 28 floats
+    - **v_b64**: Or V1-V28 as base64 of 28 little-endian float32 values
     - **threshold**: Custom fraud threshold (optional, overrides default)
     """
     try:
         logger.info(f"Processing single transaction prediction - Request ID: {request.state.request_id}")
         
-        # Convert to dictionary for processing
-        transaction_dict = transaction.dict()
-        custom_threshold = transaction_dict.pop('threshold', None)
-        
-        # Get prediction
-        result = ml_service.predict_single(transaction_dict, custom_threshold)
+        packed_v = transaction.packed_v()
+        if packed_v is not None:
+            # Packed vector: decoded and checked straight into the model input row
+            result = await ml_service.predict_packed_async(
+                time_value=transaction.Time, amount=transaction.Amount, v=packed_v, threshold=transaction.threshold
+            )
+        else:
+            # Convert to dictionary for processing
+            transaction_dict = transaction.dict(exclude={'v', 'v_b64', 'v_f32'})
+            custom_threshold = transaction_dict.pop('threshold', None)
+            
+            # Get prediction (micro-batched with concurrent requests)
+            result = await ml_service.predict_single_async(transaction_dict, custom_threshold)
         
         logger.info(f"Prediction completed - Decision: {result['final_decision']}")
-        return PredictionResponse(**result)
+        return negotiated_response(request, response_content(PredictionResponse, result))
         
+    except ExecutorSaturatedError as e:
+        raise _service_unavailable(e)
     except ValueError as e:
         logger.warning(f"Validation error in prediction: {str(e)}")
         raise HTTPException(status_code=422, detail=str(e))
@@ -213,19 +444,18 @@ async def predict_user_friendly_transaction(transaction: UserFriendlyTransaction
     try:
         logger.info(f"Processing user-friendly transaction prediction - Request ID: {request.state.request_id}")
         
-        # Convert user-friendly data to standard format with V1-V28 features
-        user_data = transaction.dict()
-        standard_data = feature_generator.convert_user_friendly_to_standard(user_data)
-        
         # Extract threshold
+        user_data = transaction.dict()
         custom_threshold = user_data.pop('threshold', None)
         
         # Get hybrid prediction (ML + Rule-based)
-        result = ml_service.predict_single_user_friendly(user_data, custom_threshold)
+        result = await ml_service.run_in_executor("predict_single_user_friendly", user_data, custom_threshold)
         
         logger.info(f"User-friendly prediction completed - Decision: {result['final_decision']}")
-        return HybridPredictionResponse(**result)
+        return negotiated_response(request, response_content(HybridPredictionResponse, result))
         
+    except ExecutorSaturatedError as e:
+        raise _service_unavailable(e)
     except ValueError as e:
         logger.warning(f"Validation error in user-friendly prediction: {str(e)}")
         raise HTTPException(status_code=422, detail=str(e))
@@ -234,6 +464,55 @@ async def predict_user_friendly_transaction(transaction: UserFriendlyTransaction
         raise HTTPException(status_code=500, detail="Prediction service error")
 
 
+# Batch user-friendly transaction prediction
+@app.post("/predict/friendly/batch", response_model=BatchHybridPredictionResponse)
+async def predict_user_friendly_batch(batch_request: BatchUserFriendlyTransactionRequest, request: Request):
+    """
+    Predict fraud for multiple transactions using user-friendly inputs
+    
+    - **transactions**: List of user-friendly transactions (max 1000)
+    - **threshold**: Custom fraud threshold for all transactions (optional)
+    """
+    try:
+        logger.info(f"Processing user-friendly batch prediction - {len(batch_request.transactions)} transactions")
+        
+        # Convert transactions to dictionaries
+        transactions = []
+        for txn in batch_request.transactions:
+            txn_dict = txn.dict()
+            txn_dict.pop('threshold', None)  # Remove individual thresholds
+            transactions.append(txn_dict)
+        
+        # Get hybrid batch predictions (ML + Rule-based)
+        results = await ml_service.run_in_executor("predict_batch_user_friendly", transactions, batch_request.threshold)
+        
+        # Generate summary
+        fraud_count = sum(1 for r in results if r['final_decision'] == 'FRAUD')
+        summary = {
+            "total_transactions": len(results),
+            "fraud_detected": fraud_count,
+            "legitimate_transactions": len(results) - fraud_count,
+            "fraud_rate": round(fraud_count / len(results), 4),
+            "processing_timestamp": datetime.utcnow().isoformat()
+        }
+        
+        logger.info(f"User-friendly batch completed - {fraud_count}/{len(results)} flagged as fraud")
+        
+        return negotiated_response(request, {
+            "results": [response_content(HybridPredictionResponse, r) for r in results],
+            "summary": summary
+        })
+        
+    except ExecutorSaturatedError as e:
+        raise _service_unavailable(e)
+    except ValueError as e:
+        logger.warning(f"Validation error in user-friendly batch prediction: {str(e)}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"User-friendly batch prediction error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Batch prediction service error")
+
+
 # Batch transaction prediction
 @app.post("/predict/batch", response_model=BatchPredictionResponse)
 async def predict_batch_transactions(batch_request: BatchTransactionRequest, request: Request):
@@ -254,7 +533,7 @@ async def predict_batch_transactions(batch_request: BatchTransactionRequest, req
             transactions.append(txn_dict)
         
         # Get batch predictions
-        results = ml_service.predict_batch(transactions, batch_request.threshold)
+        results = await ml_service.run_in_executor("predict_batch", transactions, batch_request.threshold)
         
         # Generate summary
         fraud_count = sum(1 for r in results if r['final_decision'] == 'FRAUD')
@@ -268,11 +547,13 @@ async def predict_batch_transactions(batch_request: BatchTransactionRequest, req
         
         logger.info(f"Batch processing completed - {fraud_count}/{len(results)} flagged as fraud")
         
-        return BatchPredictionResponse(
-            results=[PredictionResponse(**r) for r in results],
-            summary=summary
-        )
+        return negotiated_response(request, {
+            "results": [response_content(PredictionResponse, r) for r in results],
+            "summary": summary
+        })
         
+    except ExecutorSaturatedError as e:
+        raise _service_unavailable(e)
     except ValueError as e:
         logger.warning(f"Validation error in batch prediction: {str(e)}")
         raise HTTPException(status_code=422, detail=str(e))
@@ -281,70 +562,189 @@ async def predict_batch_transactions(batch_request: BatchTransactionRequest, req
         raise HTTPException(status_code=500, detail="Batch prediction service error")
 
 
+# Streaming NDJSON scoring
+@app.post("/predict/stream")
+async def predict_stream(request: Request, threshold: Optional[float] = Query(None, ge=0.0, le=1.0)):
+    """
+    Score an NDJSON feed of any size, streaming NDJSON results back
+    
+    Each request line is one transaction (Time, Amount, V1-V28 as for
+    /predict). Lines are scored in chunks of STREAM_CHUNK_ROWS as they
+    arrive and results are sent as soon as each chunk is done, so memory
+    stays bounded whatever the input size. Every result line carries the
+    input line number as transaction_id; an invalid line yields an error
+    line instead and does not stop the stream.
+    """
+    logger.info(f"Processing transaction stream - Request ID: {request.state.request_id}")
+    return NDJSONStreamingResponse(_score_stream(request, threshold))
+
+
+async def _score_stream(request: Request, threshold: Optional[float]) -> AsyncIterator[bytes]:
+    """Result chunks of /predict/stream"""
+    lines: List[bytes] = []
+    first_line = 1
+    try:
+        async for line in iter_lines(request.stream(), settings.STREAM_MAX_LINE_BYTES):
+            lines.append(line)
+            if len(lines) == settings.STREAM_CHUNK_ROWS:
+                results = await _run_stream_job(score_ndjson_chunk, lines, first_line, threshold)
+                first_line, lines = first_line + len(lines), []
+                if results:
+                    yield results
+        if lines:
+            results = await _run_stream_job(score_ndjson_chunk, lines, first_line, threshold)
+            first_line += len(lines)
+            if results:
+                yield results
+    except LineTooLongError as e:
+        yield (json.dumps({"error": str(e), "transaction_id": first_line + len(lines)}) + "\n").encode()
+    except ClientDisconnect:
+        logger.info(f"Transaction stream disconnected after {first_line - 1} lines")
+        return
+    logger.info(f"Transaction stream completed - {first_line - 1} lines")
+
+
+async def _run_stream_job(fn, *args):
+    """Score one chunk on the inference executor, waiting for capacity rather than failing the stream"""
+    while True:
+        try:
+            return await ml_service.executor.run(fn, *args)
+        except ExecutorSaturatedError:
+            # Interactive requests keep priority; the stream resumes when a slot frees up
+            await asyncio.sleep(0.01)
+
+
+# Arrow IPC bulk scoring
+@app.post("/predict/arrow")
+async def predict_arrow(request: Request, threshold: Optional[float] = Query(None, ge=0.0, le=1.0),
+                        output_format: str = Query("arrow", alias="format", pattern="^(arrow|parquet)$")):
+    """
+    Score an Arrow IPC stream of transactions (Time, Amount, V1-V28 columns)
+    
+    Record batches are read from the request body as it arrives and their
+    columns fed straight into the models; each batch's scores are streamed
+    back as they are produced, as an Arrow IPC stream (the default) or a
+    Parquet file (**format**=parquet). Only the record batch being scored
+    is held in memory, whatever the size of the stream. Requires pyarrow
+    on the server.
+    """
+    if not arrow_available():
+        raise HTTPException(status_code=501, detail="Arrow support requires pyarrow on the server")
+    
+    import pyarrow as pa
+    body = io.BufferedReader(AsyncBodyFile(request.stream(), asyncio.get_running_loop()))
+    try:
+        # Reads only the schema message; record batches are read as they are scored
+        reader = await run_in_threadpool(pa.ipc.open_stream, body)
+        check_schema(reader.schema)
+    except ValueError as e:
+        # pyarrow's ArrowInvalid is a ValueError too
+        raise HTTPException(status_code=400, detail=f"Invalid Arrow stream: {str(e)}")
+    
+    logger.info(f"Scoring Arrow stream as {output_format} - Request ID: {request.state.request_id}")
+    media_type = PARQUET_MEDIA_TYPE if output_format == "parquet" else ARROW_STREAM_MEDIA_TYPE
+    return RequestStreamingResponse(_score_arrow(reader, threshold, output_format), media_type=media_type)
+
+
+async def _score_arrow(reader, threshold: Optional[float], output_format: str) -> AsyncIterator[bytes]:
+    """Result chunks of /predict/arrow"""
+    encoder = ResultEncoder(output_format)
+    rows = 0
+    try:
+        async for batch in iterate_in_threadpool(reader):
+            scored = await _run_stream_job(score_record_batch, batch, rows + 1, threshold)
+            rows += batch.num_rows
+            data = encoder.write(scored)
+            if data:
+                yield data
+    except ClientDisconnect:
+        logger.info(f"Arrow stream disconnected after {rows} rows")
+        return
+    yield encoder.close()
+    logger.info(f"Arrow stream completed - {rows} rows")
+
+
 # CSV upload endpoint for batch processing
 @app.post("/predict/upload")
-async def predict_csv_upload(file: UploadFile = File(...)):
+async def predict_csv_upload(file: UploadFile = File(...),
+                             threshold: Optional[float] = Query(None, ge=0.0, le=1.0),
+                             output_format: str = Query("json", alias="format", pattern="^(json|ndjson|csv)$")):
     """
     Upload CSV file for batch fraud prediction
     
     Expected CSV columns: Time, Amount, V1-V28
+    
+    The file is read and scored in chunks of STREAM_CHUNK_ROWS rows and the
+    results are streamed back as they are produced, so files of any size
+    run in constant memory. **format** selects the response: "json" (the
+    default; {"filename", "results", "total_transactions", "fraud_detected"}),
+    "ndjson" (one result per line) or "csv".
     """
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="File must be a CSV")
+    
     try:
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(status_code=400, detail="File must be a CSV")
-        
-        # Read CSV
-        content = await file.read()
-        df = pd.read_csv(pd.io.common.StringIO(content.decode('utf-8')))
-        
-        # Validate required columns
-        required_cols = ['Time', 'Amount'] + [f'V{i}' for i in range(1, 29)]
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        if missing_cols:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Missing required columns: {missing_cols}"
-            )
-        
-        # Convert to transaction list
-        transactions = df[required_cols].to_dict('records')
-        
-        if len(transactions) > settings.MAX_BATCH_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File contains {len(transactions)} transactions, maximum allowed is {settings.MAX_BATCH_SIZE}"
-            )
-        
-        # Process batch
-        results = ml_service.predict_batch(transactions)
-        
-        # Create results DataFrame
-        results_df = pd.DataFrame(results)
-        
-        # Return as JSON (could be extended to return CSV)
-        fraud_count = sum(1 for r in results if r['final_decision'] == 'FRAUD')
-        
-        return {
-            "filename": file.filename,
-            "total_transactions": len(results),
-            "fraud_detected": fraud_count,
-            "results": results
-        }
-        
+        # Header check up front, so a bad file is still refused with a 400
+        reader = await run_in_threadpool(open_csv_chunks, file.file, settings.STREAM_CHUNK_ROWS)
     except pd.errors.EmptyDataError:
         raise HTTPException(status_code=400, detail="CSV file is empty")
     except pd.errors.ParserError:
         raise HTTPException(status_code=400, detail="Invalid CSV format")
-    except Exception as e:
-        logger.error(f"CSV upload error: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail="CSV processing error")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    logger.info(f"Scoring uploaded file {file.filename} as {output_format}")
+    return StreamingResponse(
+        _score_upload(reader, file.filename, threshold, output_format),
+        media_type=RESULT_MEDIA_TYPES[output_format]
+    )
+
+
+async def _score_upload(reader, filename: str, threshold: Optional[float], output_format: str) -> AsyncIterator[bytes]:
+    """Result chunks of /predict/upload"""
+    if output_format == "json":
+        yield f'{{"filename": {json.dumps(filename)}, "results": ['.encode()
+    elif output_format == "csv":
+        yield csv_result_header()
+    
+    total, fraud_count, error = 0, 0, None
+    try:
+        while True:
+            chunk = await run_in_threadpool(next, reader, None)
+            if chunk is None:
+                break
+            time_column, amount, v_features = csv_chunk_columns(chunk)
+            results, chunk_fraud = await _run_stream_job(
+                score_columns_chunk, time_column, amount, v_features, total + 1, threshold, output_format
+            )
+            if output_format == "json" and total:
+                yield b","
+            yield results
+            total += len(chunk)
+            fraud_count += chunk_fraud
+    except (ValueError, pd.errors.ParserError) as e:
+        # The status line is long gone: report the failure in-band and stop
+        logger.warning(f"Uploaded file {filename} failed after {total} rows: {str(e)}")
+        error = f"Invalid CSV data after row {total}: {str(e)}"
+        if output_format == "csv":
+            raise
+    finally:
+        reader.close()
+    
+    if output_format == "json":
+        summary = {"total_transactions": total, "fraud_detected": fraud_count}
+        if error:
+            summary["error"] = error
+        yield ("], " + json.dumps(summary)[1:]).encode()
+    elif output_format == "ndjson" and error:
+        yield (json.dumps({"error": error}) + "\n").encode()
+    logger.info(f"Scored {total} rows from {filename} - Fraud: {fraud_count}")
 
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=settings.DEBUG,
-        workers=1 if settings.DEBUG else settings.MAX_WORKERS
-    )
+    if settings.DEBUG:
+        # Import string relative to the project root, so it resolves however the script is started
+        uvicorn.run("api.app:app", host=settings.API_HOST, port=settings.API_PORT, reload=True)
+    else:
+        from api.server import serve
+        serve(settings.API_HOST, settings.API_PORT, settings.MAX_WORKERS, app=app)
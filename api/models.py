@@ -1,8 +1,8 @@
 """
 Pydantic models for API request/response validation
 """
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Base64Bytes, Field, root_validator, validator
+from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
 
 
@@ -74,12 +74,53 @@ class TransactionRequest(BaseModel):
         return v
 
 
+class PackedTransactionRequest(TransactionRequest):
+    """Single transaction request (legacy /predict): V1-V28 as fields, or packed into one vector"""
+    v: Optional[List[float]] = Field(None, min_items=28, max_items=28, description="V1-V28 as one list, in order")
+    v_b64: Optional[Base64Bytes] = Field(
+        None, description="V1-V28 as base64 of 28 little-endian float32 values (112 bytes)"
+    )
+    v_f32: Optional[bytes] = Field(
+        None, description="V1-V28 as 112 raw bytes of little-endian float32 (MessagePack bin; not for JSON)"
+    )
+    
+    @root_validator(pre=True)
+    def validate_packing(cls, values):
+        if isinstance(values, dict):
+            packed = [name for name in ('v', 'v_b64', 'v_f32') if name in values]
+            if len(packed) > 1:
+                raise ValueError(f'Provide only one of v, v_b64 or v_f32, got {packed}')
+            fields = [f"V{i}" for i in range(1, 29) if f"V{i}" in values]
+            if packed and fields:
+                raise ValueError(f'V1-V28 fields cannot be combined with a packed vector: {fields}')
+        return values
+    
+    @validator('v_f32', pre=True)
+    def validate_binary(cls, v):
+        if isinstance(v, str):
+            raise ValueError('v_f32 needs a binary transport such as application/msgpack; use v_b64 in JSON')
+        return v
+    
+    def packed_v(self) -> Optional[Union[List[float], bytes]]:
+        """V1-V28 as sent packed (a list of floats or float32 bytes), or None for separate fields"""
+        for packed in (self.v, self.v_b64, self.v_f32):
+            if packed is not None:
+                return packed
+        return None
+
+
 class BatchTransactionRequest(BaseModel):
     """Batch transaction request model"""
     transactions: List[TransactionRequest] = Field(..., min_items=1, max_items=1000)
     threshold: Optional[float] = Field(None, ge=0.0, le=1.0, description="Custom fraud threshold for all transactions")
 
 
+class BatchUserFriendlyTransactionRequest(BaseModel):
+    """Batch user-friendly transaction request model"""
+    transactions: List[UserFriendlyTransactionRequest] = Field(..., min_items=1, max_items=1000)
+    threshold: Optional[float] = Field(None, ge=0.0, le=1.0, description="Custom fraud threshold for all transactions")
+
+
 class PredictionResponse(BaseModel):
     """Fraud prediction response model"""
     fraud_probability: float = Field(..., description="Probability of fraud (0-1)")
@@ -90,6 +131,7 @@ class PredictionResponse(BaseModel):
     confidence: str = Field(..., description="Prediction confidence: LOW, MEDIUM, HIGH")
     explanation: str = Field(..., description="Human-readable explanation")
     timestamp: str = Field(..., description="Prediction timestamp (ISO format)")
+    model_version: Optional[str] = Field(None, description="Model version that scored the transaction")
 
 
 class HybridPredictionResponse(BaseModel):
@@ -116,6 +158,12 @@ class BatchPredictionResponse(BaseModel):
     summary: Dict[str, Any] = Field(..., description="Batch processing summary")
 
 
+class BatchHybridPredictionResponse(BaseModel):
+    """Batch hybrid prediction response model"""
+    results: List[HybridPredictionResponse] = Field(..., description="Individual hybrid prediction results")
+    summary: Dict[str, Any] = Field(..., description="Batch processing summary")
+
+
 class HealthResponse(BaseModel):
     """Health check response model"""
     status: str = Field(..., description="Service status")
@@ -123,6 +171,37 @@ class HealthResponse(BaseModel):
     version: str = Field(..., description="API version")
     models_loaded: Dict[str, bool] = Field(..., description="Model loading status")
     uptime_seconds: float = Field(..., description="Service uptime in seconds")
+    ready: bool = Field(False, description="Whether the startup warm-up has finished")
+    warm_up_seconds: Optional[float] = Field(None, description="Duration of the startup warm-up")
+    caches: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="Cache hit/miss statistics")
+    serializers: Dict[str, bool] = Field(default_factory=dict,
+                                         description="Whether the optional orjson and msgpack serializers are installed")
+
+
+class MetricsResponse(BaseModel):
+    """Inference scheduler metrics response model"""
+    timestamp: str = Field(..., description="Metrics timestamp")
+    executor: Dict[str, Any] = Field(..., description="Inference executor settings and job counters")
+    micro_batcher: Dict[str, Any] = Field(..., description="Micro-batcher settings and histograms")
+
+
+class ModelsResponse(BaseModel):
+    """Model registry response model"""
+    active_version: str = Field(..., description="Model version serving this worker")
+    loaded_at: str = Field(..., description="When the active version was loaded (ISO format)")
+    versions: List[str] = Field(..., description="Available model versions")
+    history: List[str] = Field(..., description="Activated versions, oldest first; rollback returns to the one before last")
+    updated: Optional[str] = Field(None, description="Last registry change (ISO format)")
+
+
+class RulesResponse(BaseModel):
+    """Active rule set response model"""
+    version: str = Field(..., description="Rules version from the rules file")
+    source: Optional[str] = Field(None, description="Rules file the rule set was loaded from")
+    rule_count: int = Field(..., description="Number of rules")
+    risk_factor_count: int = Field(..., description="Number of distinct risk factors")
+    table_cells: Optional[int] = Field(None, description="Size of the compiled lookup table, if any")
+    timestamp: str = Field(..., description="Response timestamp")
 
 
 class ErrorResponse(BaseModel):
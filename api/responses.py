@@ -0,0 +1,91 @@
+"""
+Response classes for the scoring API
+"""
+from functools import lru_cache
+from typing import Any, Dict, Tuple, Type
+
+from pydantic import BaseModel
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:  # Falls back to stdlib json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack transport is optional
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson (stdlib json when orjson is not installed)
+
+    The scoring endpoints return it directly with content from
+    response_content, so FastAPI neither re-validates the results against
+    the response_model nor serializes them a second time; the
+    response_model still documents the schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+class MsgPackResponse(Response):
+    """MessagePack response (the binary counterpart of ORJSONResponse; needs msgpack)"""
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+@lru_cache(maxsize=None)
+def _response_fields(model: Type[BaseModel]) -> Tuple[Tuple[str, Any], ...]:
+    return tuple((name, field.default) for name, field in model.model_fields.items())
+
+
+def response_content(model: Type[BaseModel], result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A server-built result shaped like a response model, without validating it
+
+    The scoring services already produce the declared types, so this only
+    does what model(**result).dict() would otherwise change: keys outside
+    the model (e.g. a batch row's transaction_id) are dropped, missing
+    optional fields get their defaults and keys follow field order.
+
+    Args:
+        model: Response model class
+        result: Result dictionary from ml_service
+
+    Returns:
+        Dictionary ready for ORJSONResponse
+    """
+    return {name: result.get(name, default) for name, default in _response_fields(model)}
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    Response streamed while the request body is still being read
+
+    StreamingResponse listens for the client disconnecting by reading
+    ``receive`` alongside the body iterator; for an endpoint that is itself
+    still consuming the request stream that would swallow body chunks. Here
+    the body iterator is the only reader: a disconnect surfaces through
+    Request.stream() (ClientDisconnect) or a failing send.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+class NDJSONStreamingResponse(RequestStreamingResponse):
+    """Newline-delimited JSON streamed while the request body is still being read"""
+    media_type = "application/x-ndjson"
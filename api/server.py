@@ -0,0 +1,181 @@
+"""
+Pre-forking Production Server
+Loads the models once, then forks uvicorn workers that share them copy-on-write
+"""
+import argparse
+import gc
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import uvicorn
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for all workers to finish their startup
+WORKER_STARTUP_TIMEOUT = 120
+
+
+class _WorkerServer(uvicorn.Server):
+    """uvicorn server that reports on a pipe once its lifespan startup is done"""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if self.started:
+            os.write(self.ready_fd, b"1")
+
+
+def _bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Listening socket shared by all workers"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, ready_fd: int):
+    """Body of a forked worker process; never returns"""
+    exit_code = 0
+    try:
+        # Collect again, but never touch the objects frozen in the parent
+        gc.enable()
+        # Workers would otherwise all draw the parent's random sequence
+        np.random.seed()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, signal.SIG_DFL)
+        config = uvicorn.Config(app, log_level=settings.LOG_LEVEL.lower(), lifespan="on")
+        _WorkerServer(config, ready_fd).run(sockets=[sock])
+    except BaseException:
+        logger.exception(f"Worker {os.getpid()} crashed")
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None, workers: Optional[int] = None,
+          app=None, freeze: bool = True):
+    """
+    Load the models once and serve them from forked workers
+
+    The parent imports the application (which loads both models), freezes
+    every object it created out of the garbage collector's reach and forks
+    the workers. Model memory is then shared copy-on-write: the collectors
+    of the workers never write to those objects. Each worker runs its own
+    lifespan, so inference pools and micro-batchers start after the fork.
+    Dead workers are replaced until SIGINT/SIGTERM.
+
+    Args:
+        host: Address to bind (default settings.API_HOST)
+        port: Port to bind (default settings.API_PORT)
+        workers: Number of worker processes (default settings.MAX_WORKERS)
+        app: ASGI application (default api.app:app, imported here)
+        freeze: Call gc.freeze() before forking
+    """
+    host = host or settings.API_HOST
+    port = port or settings.API_PORT
+    workers = workers or settings.MAX_WORKERS
+
+    # Keep the collector from punching holes into pages the workers will share
+    gc.disable()
+    start = time.perf_counter()
+    if app is None:
+        from api.app import app
+    load_seconds = time.perf_counter() - start
+
+    if not hasattr(os, "fork"):
+        logger.warning("os.fork is not available, serving from a single process")
+        gc.enable()
+        uvicorn.run(app, host=host, port=port, log_level=settings.LOG_LEVEL.lower())
+        return
+
+    sock = _bind(host, port)
+    gc.collect()
+    if freeze:
+        gc.freeze()
+    read_fd, write_fd = os.pipe()
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            _run_worker(app, sock, write_fd)
+        children[pid] = slot
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for slot in range(workers):
+        spawn(slot)
+
+    # Wait until every worker has finished its lifespan startup
+    ready, deadline = 0, time.monotonic() + WORKER_STARTUP_TIMEOUT
+    while ready < workers and not stopping:
+        readable, _, _ = select.select([read_fd], [], [], 1.0)
+        if readable:
+            ready += len(os.read(read_fd, workers - ready))
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            stop(None, None)
+            raise RuntimeError(f"Worker {pid} exited during startup (status {status})")
+        if time.monotonic() > deadline:
+            stop(None, None)
+            raise RuntimeError(f"Only {ready}/{workers} workers started within {WORKER_STARTUP_TIMEOUT}s")
+    logger.info(f"{workers} workers ready on {host}:{port} in {time.perf_counter() - start:.2f}s "
+                f"(models loaded in {load_seconds:.2f}s, pids {sorted(children)})")
+
+    # Supervise: replace crashed workers until asked to stop
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if slot is not None and not stopping:
+            logger.warning(f"Worker {pid} exited (status {status}), starting a replacement")
+            spawn(slot)
+    sock.close()
+    logger.info("All workers stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-forking fraud detection API server")
+    parser.add_argument("--host", default=settings.API_HOST, help="Address to bind")
+    parser.add_argument("--port", type=int, default=settings.API_PORT, help="Port to bind")
+    parser.add_argument("--workers", type=int, default=settings.MAX_WORKERS, help="Worker processes")
+    parser.add_argument("--no-freeze", action="store_true", help="Fork without gc.freeze() (for comparison)")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers, freeze=not args.no_freeze)
+
+
+if __name__ == "__main__":
+    main()
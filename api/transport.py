@@ -0,0 +1,103 @@
+"""
+Content negotiation for the scoring API
+Lets clients send and receive MessagePack instead of JSON
+
+A request with Content-Type application/msgpack is decoded with msgpack
+and validated by the same Pydantic models as JSON. The scoring endpoints
+answer in MessagePack when the Accept header asks for it, or when the
+request was MessagePack and Accept is absent or */*. Error responses stay
+JSON. Requires msgpack (optional; without it such requests get 415).
+"""
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from starlette.responses import Response
+
+from api.responses import MSGPACK_MEDIA_TYPE, MsgPackResponse, ORJSONResponse, msgpack
+
+MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+
+
+def is_msgpack(content_type: str) -> bool:
+    """Whether a Content-Type or Accept entry names MessagePack"""
+    return content_type.split(";", 1)[0].strip().lower() in MSGPACK_MEDIA_TYPES
+
+
+class MsgPackRequest(Request):
+    """
+    Request whose MessagePack body FastAPI reads as if it were JSON
+
+    The scope presents the body as application/json, so FastAPI's body
+    parsing calls json(), which decodes MessagePack instead.
+    """
+
+    def __init__(self, scope, receive):
+        headers = [(name, value) for name, value in scope["headers"] if name != b"content-type"]
+        super().__init__({**scope, "headers": headers + [(b"content-type", b"application/json")]}, receive)
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            try:
+                self._json = msgpack.unpackb(await self.body())
+            except (ValueError, msgpack.UnpackException) as e:
+                raise HTTPException(status_code=400, detail=f"Invalid MessagePack body: {str(e) or type(e).__name__}")
+        return self._json
+
+
+def _printable(value: Any) -> Any:
+    """Error inputs with binary values replaced, so the JSON error response can render them"""
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, dict):
+        return {key: _printable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_printable(item) for item in value]
+    return value
+
+
+class MsgPackRoute(APIRoute):
+    """Route that accepts MessagePack request bodies as well as JSON"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def msgpack_route_handler(request: Request) -> Response:
+            if not is_msgpack(request.headers.get("content-type", "")):
+                return await handler(request)
+            if msgpack is None:
+                raise HTTPException(status_code=415, detail="MessagePack support requires msgpack")
+            try:
+                return await handler(MsgPackRequest(request.scope, request.receive))
+            except RequestValidationError as e:
+                errors = [{**error, "input": _printable(error.get("input"))} for error in e.errors()]
+                raise RequestValidationError(errors)
+
+        return msgpack_route_handler
+
+
+def wants_msgpack(request: Request) -> bool:
+    """Whether the response to a request should be MessagePack"""
+    if msgpack is None:
+        return False
+    accept = request.headers.get("accept", "")
+    if any(is_msgpack(entry) for entry in accept.split(",")):
+        return True
+    return isinstance(request, MsgPackRequest) and accept.strip() in ("", "*/*")
+
+
+def negotiated_response(request: Request, content: Dict[str, Any]) -> Response:
+    """
+    Response in the format the client negotiated
+
+    Args:
+        request: The request being answered
+        content: Response-shaped content (see response_content)
+
+    Returns:
+        MsgPackResponse or ORJSONResponse
+    """
+    if wants_msgpack(request):
+        return MsgPackResponse(content)
+    return ORJSONResponse(content)
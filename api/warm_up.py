@@ -0,0 +1,208 @@
+"""
+Endpoint Warm-up
+Drives synthetic requests through every scoring endpoint before a worker reports ready
+
+The first requests after boot otherwise pay for lazy allocations in the
+models, first-time pandas and pydantic code paths and FastAPI's per-route
+setup. Requests are sent straight into the ASGI application, so middleware,
+validation and response serialization are exercised exactly as for real
+traffic, without opening a socket.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import settings
+
+try:
+    import pyarrow as pa
+except ImportError:  # /predict/arrow is only warmed up when pyarrow is installed
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+MERCHANT_TYPES = ["Online Retail", "Gas Station", "Restaurant", "ATM", "Grocery Store", "Hotel"]
+TRANSACTION_TYPES = ["Purchase", "Cash Withdrawal", "Online Payment", "International"]
+LOCATION_RISKS = ["Low Risk (Home Country)", "Medium Risk (Neighboring)", "High Risk (International)"]
+MULTIPART_BOUNDARY = "warm-up-boundary"
+
+
+def synthetic_transactions(n: int, seed: int = 0) -> List[Dict[str, float]]:
+    """Legacy V1-V28 transactions with a spread of times and amounts"""
+    rng = np.random.default_rng(seed)
+    columns = {"Time": rng.uniform(0, 172800, n), "Amount": np.round(rng.lognormal(3.5, 1.5, n), 2)}
+    for i in range(1, 29):
+        columns[f"V{i}"] = rng.normal(0, 1.5, n)
+    return [{name: float(values[j]) for name, values in columns.items()} for j in range(n)]
+
+
+def synthetic_friendly_transactions(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """User-friendly transactions covering the categorical inputs"""
+    rng = np.random.default_rng(seed)
+    return [{
+        "Time": float(rng.uniform(0, 172800)),
+        "Amount": float(np.round(rng.lognormal(3.5, 1.5), 2)),
+        "merchant_type": MERCHANT_TYPES[j % len(MERCHANT_TYPES)],
+        "transaction_type": TRANSACTION_TYPES[j % len(TRANSACTION_TYPES)],
+        "location_risk": LOCATION_RISKS[j % len(LOCATION_RISKS)],
+        "hour_of_day": int(rng.integers(0, 24)),
+        "customer_age_days": int(rng.integers(1, 3650)),
+        "daily_transactions": int(rng.integers(1, 20))
+    } for j in range(n)]
+
+
+def multipart_csv(transactions: List[Dict[str, float]]) -> Tuple[bytes, str]:
+    """multipart/form-data body holding the transactions as a CSV file"""
+    columns = list(transactions[0])
+    lines = [",".join(columns)] + [",".join(repr(t[c]) for c in columns) for t in transactions]
+    body = (
+        f"--{MULTIPART_BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="warm-up.csv"\r\n'
+        f"Content-Type: text/csv\r\n\r\n"
+        + "\n".join(lines) +
+        f"\r\n--{MULTIPART_BOUNDARY}--\r\n"
+    ).encode()
+    return body, f"multipart/form-data; boundary={MULTIPART_BOUNDARY}"
+
+
+def ndjson_lines(transactions: List[Dict[str, float]]) -> Tuple[bytes, str]:
+    """NDJSON body with one transaction per line"""
+    return "".join(json.dumps(t) + "\n" for t in transactions).encode(), "application/x-ndjson"
+
+
+def arrow_stream(transactions: List[Dict[str, float]]) -> Tuple[bytes, str]:
+    """Arrow IPC stream body with the transactions as one record batch (needs pyarrow)"""
+    batch = pa.RecordBatch.from_pylist(transactions)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes(), "application/vnd.apache.arrow.stream"
+
+
+async def call_app(app, method: str, path: str, body: bytes = b"",
+                   content_type: str = "application/json", accept: Optional[str] = None) -> Tuple[int, bytes]:
+    """
+    Send one request straight into an ASGI application
+
+    Returns:
+        Tuple of (status code, response body)
+    """
+    path, _, query = path.partition("?")
+    headers = [(b"host", b"warm-up"), (b"content-type", content_type.encode()),
+               (b"content-length", str(len(body)).encode())]
+    if accept is not None:
+        headers.append((b"accept", accept.encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": query.encode(), "headers": headers,
+        "client": ("127.0.0.1", 0), "server": ("warm-up", 80)
+    }
+    request_sent, response_done = False, asyncio.Event()
+    status, chunks = 0, []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+class EndpointWarmUp:
+    """Runs the warm-up requests once and records how long they took"""
+
+    def __init__(self):
+        self.ready = False
+        self.seconds: Optional[float] = None
+        self.timings: Dict[str, float] = {}
+        self.failures: List[str] = []
+
+    def skip(self):
+        """Report ready without warming up"""
+        self.ready = True
+
+    def requests(self) -> List[Tuple[str, str, List[Tuple[bytes, str]]]]:
+        """(name, path, [(body, content type), ...]) for sizes 1 and MAX_BATCH_SIZE of every endpoint"""
+        sizes = sorted({1, settings.MAX_BATCH_SIZE})
+        concurrent = max(1, min(settings.MICRO_BATCH_MAX_ROWS, settings.MAX_BATCH_SIZE))
+        legacy = synthetic_transactions(max(sizes))
+        friendly = synthetic_friendly_transactions(max(sizes))
+        as_json = lambda payload: (json.dumps(payload).encode(), "application/json")
+        requests = [
+            ("predict", "/predict", [as_json(legacy[0])]),
+            # A burst of single requests, so the micro-batcher scores a full batch once
+            (f"predict x{concurrent}", "/predict", [as_json(t) for t in legacy[:concurrent]]),
+            ("predict/friendly", "/predict/friendly", [as_json(friendly[0])])
+        ]
+        for n in sizes:
+            requests += [
+                (f"predict/batch {n}", "/predict/batch", [as_json({"transactions": legacy[:n]})]),
+                (f"predict/friendly/batch {n}", "/predict/friendly/batch",
+                 [as_json({"transactions": friendly[:n]})]),
+                (f"predict/upload {n}", "/predict/upload", [multipart_csv(legacy[:n])]),
+                (f"predict/stream {n}", "/predict/stream", [ndjson_lines(legacy[:n])])
+            ]
+        if pa is not None:
+            requests.append(("predict/arrow", "/predict/arrow", [arrow_stream(legacy[:8])]))
+        return requests
+
+    async def run(self, app):
+        """
+        Send every warm-up request through the application, then report ready
+
+        Failed requests are logged and listed in the status; the worker
+        still becomes ready, since the models themselves were already
+        checked when they were loaded.
+        """
+        start = time.perf_counter()
+        try:
+            for name, path, payloads in self.requests():
+                path_start = time.perf_counter()
+                responses = await asyncio.gather(*(
+                    call_app(app, "POST", path, body, content_type) for body, content_type in payloads
+                ))
+                self.timings[name] = round(time.perf_counter() - path_start, 4)
+                for status, response in responses:
+                    if status != 200:
+                        self.failures.append(f"{name}: HTTP {status}")
+                        logger.error(f"Warm-up request {name} failed with HTTP {status}: {response[:200]!r}")
+                        break
+        except Exception as e:
+            self.failures.append(str(e))
+            logger.error(f"Warm-up failed: {str(e)}", exc_info=True)
+        finally:
+            self.seconds = round(time.perf_counter() - start, 4)
+            self.ready = True
+        logger.info(f"Warm-up finished in {self.seconds:.2f}s ({len(self.timings)} request groups, "
+                    f"{len(self.failures)} failed)")
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness and warm-up timings"""
+        return {
+            "ready": self.ready,
+            "warm_up_seconds": self.seconds,
+            "timings": dict(self.timings),
+            "failures": list(self.failures)
+        }
+
+
+# Global warm-up instance
+endpoint_warm_up = EndpointWarmUp()
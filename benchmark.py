@@ -0,0 +1,865 @@
+#!/usr/bin/env python3
+"""
+Inference benchmarks for the fraud detection services
+Run from the project root: python benchmark.py <benchmark> [options]
+"""
+
+import argparse
+import logging
+import random
+import time
+import warnings
+
+warnings.filterwarnings("ignore")
+
+MERCHANT_TYPES = ["Online Retail", "Gas Station", "Restaurant", "ATM",
+                  "Grocery Store", "Department Store", "Hotel", "Other"]
+TRANSACTION_TYPES = ["Purchase", "Cash Withdrawal", "Online Payment",
+                     "Recurring Payment", "International", "Refund"]
+LOCATION_RISKS = ["Low Risk (Home Country)", "Medium Risk (Neighboring)",
+                  "High Risk (International)", "Very High Risk (Restricted)"]
+
+
+def make_user_friendly_transactions(n, seed=42):
+    """Generate synthetic user-friendly transactions"""
+    rng = random.Random(seed)
+    return [
+        {
+            "Time": rng.uniform(0, 172800),
+            "Amount": round(rng.lognormvariate(5, 2), 2),
+            "merchant_type": rng.choice(MERCHANT_TYPES),
+            "transaction_type": rng.choice(TRANSACTION_TYPES),
+            "location_risk": rng.choice(LOCATION_RISKS),
+            "hour_of_day": rng.randint(0, 23),
+            "customer_age_days": rng.randint(1, 2000),
+            "daily_transactions": rng.randint(1, 60)
+        }
+        for _ in range(n)
+    ]
+
+
+def make_standard_transactions(n, seed=42):
+    """Generate synthetic Time/Amount/V1-V28 transactions"""
+    rng = random.Random(seed)
+    return [
+        {"Time": rng.uniform(0, 172800), "Amount": round(rng.lognormvariate(4, 1.5), 2),
+         **{f"V{i}": rng.gauss(0, 1.5) for i in range(1, 29)}}
+        for _ in range(n)
+    ]
+
+
+def measure_latency(fn, items):
+    """Call fn on each item and return the per-call latencies in microseconds, sorted"""
+    timings = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return sorted(timings)
+
+
+def report_latency(label, timings):
+    """Print p50/p99 of per-call latencies from measure_latency"""
+    p50 = timings[len(timings) // 2]
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"  {label:<40} p50 {p50:10.1f} µs  p99 {p99:10.1f} µs")
+    return p50
+
+
+def report(label, seconds, rows):
+    """Print throughput for a timed run"""
+    print(f"  {label:<40} {seconds * 1000:10.2f} ms  {rows / seconds:12,.0f} rows/sec")
+
+
+def bench_friendly_batch(args):
+    """Looping /predict/friendly vs one /predict/friendly/batch call"""
+    from fastapi.testclient import TestClient
+    from api.app import app
+    from services.ml_service import ml_service
+
+    transactions = make_user_friendly_transactions(args.rows)
+    client = TestClient(app)
+
+    print(f"📊 Hybrid scoring of {args.rows} user-friendly transactions")
+
+    start = time.perf_counter()
+    for txn in transactions:
+        ml_service.predict_single_user_friendly(dict(txn))
+    single_service = time.perf_counter() - start
+    report("service: predict_single_user_friendly", single_service, args.rows)
+
+    start = time.perf_counter()
+    ml_service.predict_batch_user_friendly(transactions)
+    batch_service = time.perf_counter() - start
+    report("service: predict_batch_user_friendly", batch_service, args.rows)
+
+    start = time.perf_counter()
+    for txn in transactions:
+        client.post("/predict/friendly", json=txn)
+    single_http = time.perf_counter() - start
+    report("http: /predict/friendly (looped)", single_http, args.rows)
+
+    start = time.perf_counter()
+    client.post("/predict/friendly/batch", json={"transactions": transactions})
+    batch_http = time.perf_counter() - start
+    report("http: /predict/friendly/batch", batch_http, args.rows)
+
+    print(f"  ⚡ service speedup: {single_service / batch_service:.1f}x")
+    print(f"  ⚡ endpoint speedup: {single_http / batch_http:.1f}x")
+
+
+def bench_rules(args):
+    """Interpreted rules vs compiled lookup table vs vectorized rule scoring"""
+    from services.columnar import user_friendly_columns
+    from services.rule_engine import RuleSet
+    from config.settings import settings
+
+    transactions = make_user_friendly_transactions(args.rows)
+
+    start = time.perf_counter()
+    rules = RuleSet.from_file(settings.RULES_PATH)
+    compile_seconds = time.perf_counter() - start
+
+    print(f"📊 Rule scoring of {args.rows} transactions (rules version {rules.version}, "
+          f"compiled in {compile_seconds * 1000:.1f} ms)")
+
+    start = time.perf_counter()
+    for txn in transactions:
+        rules.interpret(txn)
+    interpreted = time.perf_counter() - start
+    report("interpreted rules (per transaction)", interpreted, args.rows)
+
+    start = time.perf_counter()
+    for txn in transactions:
+        rules.score(txn)
+    table = time.perf_counter() - start
+    report("compiled table (per transaction)", table, args.rows)
+
+    columns = user_friendly_columns(transactions)
+    start = time.perf_counter()
+    rules.score_columns(columns)
+    scores_only = time.perf_counter() - start
+    report("vectorized scores and factor masks", scores_only, args.rows)
+
+    start = time.perf_counter()
+    rules.score_batch(columns)
+    batch = time.perf_counter() - start
+    report("vectorized batch with details", batch, args.rows)
+
+    print(f"  ⚡ table speedup: {interpreted / table:.1f}x")
+    print(f"  ⚡ vectorized speedup: {interpreted / scores_only:.1f}x (scores), {interpreted / batch:.1f}x (with details)")
+
+
+def bench_v_features(args):
+    """Per-transaction V-feature dicts vs the vectorized feature matrix"""
+    from services.columnar import user_friendly_columns
+    from services.feature_generator import feature_generator
+    from services.feature_service import feature_service
+
+    transactions = make_user_friendly_transactions(args.rows)
+    feature_generator.draw_cache = None  # Measure fresh draws; see the v-feature-cache benchmark
+
+    print(f"📊 V1-V28 generation for {args.rows} user-friendly transactions")
+
+    start = time.perf_counter()
+    standard = [feature_generator.convert_user_friendly_to_standard(txn) for txn in transactions]
+    feature_service.process_batch_transactions(standard)
+    single = time.perf_counter() - start
+    report("per-row dicts + DataFrame", single, args.rows)
+
+    start = time.perf_counter()
+    columns = user_friendly_columns(transactions)
+    feature_generator.generate_v_feature_draws_batch(columns)
+    draws = time.perf_counter() - start
+    report("batch random draws only", draws, args.rows)
+
+    start = time.perf_counter()
+    columns = user_friendly_columns(transactions)
+    v_features = feature_generator.generate_v_features_batch(columns)
+    feature_service.process_arrays(columns['Time'], columns['Amount'], v_features)
+    batch = time.perf_counter() - start
+    report("batch features + process_arrays", batch, args.rows)
+
+    print(f"  ⚡ speedup: {single / batch:.1f}x")
+
+
+def bench_v_feature_cache(args):
+    """V-feature generation with and without the draw cache on repeating traffic"""
+    from config.settings import settings
+    from services.cache import make_cache
+    from services.columnar import user_friendly_columns
+    from services.feature_generator import FeatureGenerator
+
+    # Repeat customers: keys drawn from a pool with Zipf popularity, fresh Time per transaction
+    pool = make_user_friendly_transactions(args.keys)
+    rng = random.Random(7)
+    picks = rng.choices(pool, weights=[1 / rank for rank in range(1, args.keys + 1)], k=args.rows)
+    transactions = [dict(txn, Time=rng.uniform(0, 172800)) for txn in picks]
+    batches = [user_friendly_columns(transactions[i:i + args.batch_size])
+               for i in range(0, args.rows, args.batch_size)]
+
+    print(f"📊 V1-V28 generation for {args.rows} transactions over {args.keys} distinct keys "
+          f"(cache size {settings.V_FEATURE_CACHE_SIZE}, best of 3)")
+
+    def best_of_three(generator, run):
+        timings = []
+        for _ in range(3):
+            if generator.draw_cache is not None:
+                generator.draw_cache.clear()
+            start = time.perf_counter()
+            run(generator)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def run_single(generator):
+        for txn in transactions:
+            generator.generate_v_features(txn)
+
+    def run_batches(generator):
+        for columns in batches:
+            generator.generate_v_features_batch(columns)
+
+    uncached = FeatureGenerator()
+    uncached.draw_cache = None
+    single = best_of_three(uncached, run_single)
+    report("single, no cache", single, args.rows)
+    batch = best_of_three(uncached, run_batches)
+    report(f"batches of {args.batch_size}, no cache", batch, args.rows)
+
+    for policy in ("lru", "arc"):
+        generator = FeatureGenerator()
+        generator.draw_cache = make_cache(policy, settings.V_FEATURE_CACHE_SIZE)
+        cached_single = best_of_three(generator, run_single)
+        report(f"single, {policy} cache", cached_single, args.rows)
+        hit_rate = generator.draw_cache.stats()["hit_rate"]
+        cached_batch = best_of_three(generator, run_batches)
+        report(f"batches of {args.batch_size}, {policy} cache", cached_batch, args.rows)
+        print(f"  ⚡ {policy}: hit rate {hit_rate:.1%}, "
+              f"speedup {single / cached_single:.2f}x (single), {batch / cached_batch:.2f}x (batches)")
+
+
+def bench_predict_single(args):
+    """DataFrame + predict_proba vs the (1, 31) buffer + booster single-row path"""
+    from services.feature_service import feature_service
+    from services.ml_service import ml_service
+
+    transactions = make_standard_transactions(args.rows)
+    fraud_model, booster = ml_service.fraud_model, ml_service.fraud_model.booster_
+
+    print(f"📊 Single-row inference latency over {args.rows} transactions")
+
+    def dataframe_features(txn):
+        return feature_service.process_single_transaction(feature_service.validate_transaction_features(dict(txn)))
+
+    def dataframe_fraud(txn):
+        return fraud_model.predict_proba(dataframe_features(txn))[0][1]
+
+    def array_fraud(txn):
+        return booster.predict(feature_service.process_single_array(txn))[0]
+
+    old_features = report_latency("features: DataFrame", measure_latency(dataframe_features, transactions))
+    new_features = report_latency("features: (1, 31) buffer", measure_latency(feature_service.process_single_array,
+                                                                              transactions))
+    old_fraud = report_latency("features + fraud: predict_proba", measure_latency(dataframe_fraud, transactions))
+    new_fraud = report_latency("features + fraud: booster", measure_latency(array_fraud, transactions))
+    report_latency("predict_single (incl. anomaly model)", measure_latency(ml_service.predict_single, transactions))
+
+    print(f"  ⚡ p50 speedup: {old_features / new_features:.1f}x (features), "
+          f"{old_fraud / new_fraud:.1f}x (features + fraud model)")
+
+
+def bench_fraud_model(args):
+    """LGBMClassifier.predict_proba vs Booster.predict across batch sizes and thread counts"""
+    import os
+    import numpy as np
+    from services.feature_service import feature_service
+    from services.ml_service import ml_service
+
+    transactions = make_standard_transactions(args.rows)
+    features = feature_service.process_arrays(
+        np.array([t["Time"] for t in transactions]), np.array([t["Amount"] for t in transactions]),
+        np.array([[t[f"V{i}"] for i in range(1, 29)] for t in transactions])
+    )
+    fraud_model, booster = ml_service.fraud_model, ml_service.fraud_model.booster_
+
+    print(f"📊 Fraud model scoring of {args.rows} rows ({os.cpu_count()} CPUs)")
+
+    for size in (1, 32, 1024):
+        batches = [features[i:i + size] for i in range(0, args.rows, size)]
+        start = time.perf_counter()
+        for batch in batches:
+            fraud_model.predict_proba(batch)
+        report(f"batch {size}: sklearn predict_proba", time.perf_counter() - start, args.rows)
+        for threads in (1, 2, 4, 0):
+            start = time.perf_counter()
+            for batch in batches:
+                booster.predict(batch, num_threads=threads)
+            report(f"batch {size}: booster, num_threads={threads}", time.perf_counter() - start, args.rows)
+
+
+def bench_tree_ensemble(args):
+    """LightGBM Booster.predict vs the compiled NumPy tree ensemble at several batch sizes"""
+    import numpy as np
+    from config.settings import settings
+    from services.ml_service import ml_service
+    from services.tree_ensemble import CompiledTreeEnsemble
+
+    booster = ml_service.fraud_model.booster_
+    start = time.perf_counter()
+    ensemble = CompiledTreeEnsemble.from_booster(booster)
+    compile_seconds = time.perf_counter() - start
+    rng = np.random.default_rng(0)
+
+    print(f"📊 Fraud model: {ensemble.num_trees} trees compiled in {compile_seconds * 1000:.0f} ms")
+
+    for size in (1, 32, 1024, 100000):
+        rows = max(size, min(args.rows, 100000))
+        features = rng.normal(0, 3, size=(rows, ensemble.num_features))
+        features[:, 0] = np.abs(features[:, 0]) * 20000
+        batches = [features[i:i + size] for i in range(0, rows - size + 1, size)]
+        threads = settings.BOOSTER_THREADS_SINGLE if size == 1 else settings.BOOSTER_THREADS_BATCH
+
+        start = time.perf_counter()
+        expected = [booster.predict(batch, num_threads=threads) for batch in batches]
+        lightgbm_seconds = time.perf_counter() - start
+        report(f"batch {size}: Booster.predict", lightgbm_seconds, len(batches) * size)
+
+        start = time.perf_counter()
+        if size == 1:
+            compiled = [np.array([ensemble.predict_row(batch[0])]) for batch in batches]
+            label = f"batch {size}: compiled predict_row"
+        else:
+            compiled = [ensemble.predict(batch) for batch in batches]
+            label = f"batch {size}: compiled predict"
+        compiled_seconds = time.perf_counter() - start
+        report(label, compiled_seconds, len(batches) * size)
+
+        error = max(np.abs(a - b).max() for a, b in zip(compiled, expected))
+        print(f"  ⚡ batch {size}: {lightgbm_seconds / compiled_seconds:.2f}x, max abs difference {error:.1e}")
+
+
+def bench_isolation_forest(args):
+    """sklearn IsolationForest.predict vs the compiled forest at several batch sizes"""
+    import numpy as np
+    from services.isolation_forest import CompiledIsolationForest
+    from services.ml_service import ml_service
+
+    model = ml_service.anomaly_model
+    start = time.perf_counter()
+    forest = CompiledIsolationForest(model)
+    compile_seconds = time.perf_counter() - start
+    rng = np.random.default_rng(0)
+
+    print(f"📊 Anomaly model: {forest.num_trees} trees packed in {compile_seconds * 1000:.0f} ms")
+
+    for size in (1, 32, 1024, 20000):
+        rows = max(size, min(args.rows, 20000))
+        features = rng.normal(0, 2, size=(rows, forest.num_features))
+        features[:, 0] = np.abs(features[:, 0]) * 40000
+        batches = [features[i:i + size] for i in range(0, rows - size + 1, size)]
+
+        start = time.perf_counter()
+        expected = [model.predict(batch) for batch in batches]
+        sklearn_seconds = time.perf_counter() - start
+        report(f"batch {size}: sklearn predict", sklearn_seconds, len(batches) * size)
+
+        start = time.perf_counter()
+        compiled = [forest.predict(batch) for batch in batches]
+        compiled_seconds = time.perf_counter() - start
+        report(f"batch {size}: compiled predict", compiled_seconds, len(batches) * size)
+
+        mismatches = sum(int((a != b).sum()) for a, b in zip(compiled, expected))
+        print(f"  ⚡ batch {size}: {sklearn_seconds / compiled_seconds:.2f}x, {mismatches} flag mismatches")
+
+
+def bench_model_runner(args):
+    """Separate fraud + anomaly passes vs the fused ModelRunner, inline and with row-block threads"""
+    import os
+    import numpy as np
+    from services.feature_service import MODEL_FEATURES
+    from services.ml_service import ml_service
+    from services.model_runner import ModelRunner
+
+    runner = ml_service.runner
+    rng = np.random.default_rng(0)
+    rows = max(args.rows, 8192)
+    features = rng.normal(0, 2, size=(rows, len(MODEL_FEATURES)))
+    features[:, 0] = np.abs(features[:, 0]) * 40000
+
+    print(f"📊 Both models over {rows} rows ({os.cpu_count()} CPUs)")
+
+    for size in (32, 1024, rows):
+        batches = [features[i:i + size] for i in range(0, rows - size + 1, size)]
+        start = time.perf_counter()
+        for batch in batches:
+            runner._fraud_probabilities(np.ascontiguousarray(batch), 0)
+            runner._anomaly_scores(np.ascontiguousarray(batch))
+        report(f"batch {size}: separate passes", time.perf_counter() - start, len(batches) * size)
+        start = time.perf_counter()
+        for batch in batches:
+            runner.run(batch)
+        report(f"batch {size}: ModelRunner.run", time.perf_counter() - start, len(batches) * size)
+
+    expected = runner.run(features)
+    for threads in (2, 4):
+        pooled = ModelRunner(ml_service.fraud_model, ml_service.anomaly_model, threads=threads, block_rows=1024)
+        start = time.perf_counter()
+        result = pooled.run(features)
+        report(f"batch {rows}: {threads} threads, 1024-row blocks", time.perf_counter() - start, rows)
+        pooled.close()
+        assert all(np.array_equal(a, b) for a, b in zip(result, expected))
+
+
+def bench_micro_batch(args):
+    """Concurrent /predict requests scored one by one vs through the micro-batcher"""
+    import asyncio
+    import httpx
+    from api.app import app
+    from services.ml_service import ml_service
+
+    transactions = make_standard_transactions(args.rows)
+    batcher = ml_service.batcher
+
+    print(f"📊 {args.rows} /predict requests, {args.concurrency} in flight "
+          f"(batches of up to {batcher.max_batch_rows} rows, {batcher.max_wait * 1e6:.0f} µs wait)")
+
+    async def run(batched):
+        if batched:
+            batcher.start()
+        latencies = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def one(txn):
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.post("/predict", json=txn)
+                    latencies.append((time.perf_counter() - start) * 1e6)
+                    assert response.status_code == 200
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one(txn) for txn in transactions))
+            seconds = time.perf_counter() - start
+        if batched:
+            await batcher.stop()
+        return seconds, sorted(latencies)
+
+    for batched in (False, True):
+        label = "micro-batched" if batched else "one model call per request"
+        seconds, latencies = asyncio.run(run(batched))
+        report(label, seconds, args.rows)
+        report_latency(f"{label} latency", latencies)
+    stats = batcher.stats()
+    print(f"  mean batch {stats['batch_size']['mean']:.1f} rows, "
+          f"mean queue depth {stats['queue_depth']['mean']:.1f}")
+
+
+def bench_executor(args):
+    """/health latency while 1000-row batches are scored inline on the event loop vs on the executor"""
+    import asyncio
+    import httpx
+    from api.app import app
+    from services.inference_executor import InferenceExecutor
+    from services.ml_service import ml_service
+
+    batch = {"transactions": make_standard_transactions(1000)}
+    default_executor = ml_service.executor
+
+    print(f"📊 /health latency during {args.concurrency} concurrent 1000-row /predict/batch requests")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+            statuses = []
+            health = []
+
+            async def score():
+                statuses.append((await client.post("/predict/batch", json=batch)).status_code)
+
+            async def probe(scoring):
+                while not scoring.done():
+                    start = time.perf_counter()
+                    await client.get("/health")
+                    health.append((time.perf_counter() - start) * 1e6)
+                    await asyncio.sleep(0.005)
+
+            start = time.perf_counter()
+            scoring = asyncio.ensure_future(asyncio.gather(*(score() for _ in range(args.concurrency))))
+            await probe(scoring)
+            await scoring
+            return time.perf_counter() - start, statuses, sorted(health) or [0.0]
+
+    # Unbounded inline scoring, the thread pool with room for every request, then with half the room
+    for kind, max_pending in (("inline", args.concurrency), ("thread", args.concurrency),
+                              ("thread", max(1, args.concurrency // 2))):
+        ml_service.executor = InferenceExecutor(kind, 2, max_pending)
+        ml_service.executor.start()
+        seconds, statuses, health = asyncio.run(run())
+        ml_service.executor.shutdown()
+        label = f"{kind}, max_pending={max_pending}"
+        print(f"  {label}: {statuses.count(200)} scored, {statuses.count(503)} refused with 503 "
+              f"in {seconds * 1000:.0f} ms")
+        report_latency(f"{label}: /health ({len(health)} probes)", health)
+    ml_service.executor = default_executor
+
+
+def bench_prefork(args):
+    """Startup time and memory per worker of the pre-forking server (api/server.py) at 1, 4 and 16 workers"""
+    import json
+    import os
+    import re
+    import signal
+    import subprocess
+    import sys
+    import tempfile
+    import urllib.request
+
+    def memory_kb(pid):
+        """Rss, Pss and private (unshared) memory of a process, in kB"""
+        fields = {}
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+        return fields["Rss"], fields["Pss"], fields["Private_Clean"] + fields["Private_Dirty"]
+
+    transaction = json.dumps(make_standard_transactions(1)[0]).encode()
+    print("📊 Pre-forked server: startup time and memory (MB) after 200 /predict requests")
+    print(f"  {'workers':>7} {'gc.freeze':>9} {'startup':>9} {'parent RSS':>10} {'worker RSS':>10} "
+          f"{'worker PSS':>10} {'private':>8} {'total PSS':>9}")
+
+    for workers in (1, 4, 16):
+        for freeze in (True, False):
+            port = 18000 + workers * 2 + freeze
+            command = [sys.executable, "-m", "api.server", "--workers", str(workers), "--port", str(port)]
+            if not freeze:
+                command.append("--no-freeze")
+            with tempfile.TemporaryFile("w+") as log:
+                start = time.perf_counter()
+                server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=log)
+                match = None
+                while match is None and server.poll() is None and time.perf_counter() - start < 300:
+                    time.sleep(0.05)
+                    log.seek(0)
+                    match = re.search(r"workers ready .* pids \[([0-9, ]+)\]", log.read())
+                startup = time.perf_counter() - start
+                if match is None:
+                    server.kill()
+                    raise RuntimeError(f"Server with {workers} workers did not start")
+                pids = [int(pid) for pid in match.group(1).split(",")]
+
+                for _ in range(200):
+                    request = urllib.request.Request(f"http://127.0.0.1:{port}/predict", data=transaction,
+                                                     headers={"Content-Type": "application/json"})
+                    urllib.request.urlopen(request).read()
+
+                parent = memory_kb(server.pid)
+                children = [memory_kb(pid) for pid in pids]
+                server.send_signal(signal.SIGTERM)
+                server.wait(timeout=60)
+
+            mean = [sum(values) / len(values) / 1024 for values in zip(*children)]
+            total_pss = (parent[1] + sum(child[1] for child in children)) / 1024
+            print(f"  {workers:>7} {'yes' if freeze else 'no':>9} {startup:>8.2f}s {parent[0] / 1024:>10.1f} "
+                  f"{mean[0]:>10.1f} {mean[1]:>10.1f} {mean[2]:>8.1f} {total_pss:>9.1f}")
+
+
+COLD_START_SCRIPT = """
+import time
+start = time.perf_counter()
+from services.ml_service import ml_service
+ready = time.perf_counter() - start
+start = time.perf_counter()
+ml_service.predict_single({"Time": 100.0, "Amount": 12.5})
+first = time.perf_counter() - start
+fields = {}
+for line in open("/proc/self/smaps_rollup"):
+    parts = line.split()
+    if len(parts) == 3:
+        fields[parts[0].rstrip(":")] = int(parts[1])
+print(ready, first, fields["Rss"], fields["Private_Clean"] + fields["Private_Dirty"])
+"""
+
+
+def bench_cold_start(args):
+    """Process start to first prediction from pickles vs memory-mapped artifacts (fresh process each run)"""
+    import os
+    import shutil
+    import subprocess
+    import sys
+    import tempfile
+    import joblib
+    from config.settings import settings
+    from services.model_artifacts import export_model_artifact, load_model_artifact
+
+    sources = {"FRAUD_MODEL_PATH": settings.FRAUD_MODEL_PATH, "ANOMALY_MODEL_PATH": settings.ANOMALY_MODEL_PATH,
+               "SCALER_PATH": settings.SCALER_PATH}
+    print("📊 Cold start of the inference service (best of 3 fresh processes)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ)
+        pickles = []
+        for name, source in sources.items():
+            env[name] = os.path.join(directory, os.path.basename(source))
+            shutil.copy(source, env[name])
+            pickles.append(env[name])
+
+        for mode in ("pickle", "mmap"):
+            if mode == "mmap":
+                for path in pickles:
+                    export_model_artifact(joblib.load(path), path)
+                start = time.perf_counter()
+                for path in pickles:
+                    load_model_artifact(path)
+                print(f"  artifact loading alone: {(time.perf_counter() - start) * 1000:.1f} ms "
+                      f"(warm page cache, incl. pickle hash check)")
+            runs = []
+            for _ in range(3):
+                output = subprocess.run([sys.executable, "-W", "ignore", "-c", COLD_START_SCRIPT], env=env,
+                                        capture_output=True, text=True, check=True).stdout.split()
+                runs.append([float(value) for value in output])
+            ready, first, rss, private = min(runs)
+            print(f"  {mode:<6}: import + load {ready * 1000:8.1f} ms, first prediction {first * 1000:6.2f} ms, "
+                  f"RSS {rss / 1024:6.1f} MB ({private / 1024:6.1f} MB private)")
+
+
+def bench_bulk_score(args):
+    """Offline bulk scoring of a CSV file at 1, 2, 4, ... workers up to the core count"""
+    import os
+    import tempfile
+    import pandas as pd
+    from services.bulk_score import bulk_score
+
+    cores = os.cpu_count() or 1
+    counts = sorted({1 << i for i in range(cores.bit_length())} | {cores})
+    print(f"📊 Bulk scoring {args.rows} CSV rows ({cores} cores)")
+    with tempfile.TemporaryDirectory() as directory:
+        source, target = os.path.join(directory, "in.csv"), os.path.join(directory, "out.csv")
+        pd.DataFrame(make_standard_transactions(args.rows)).to_csv(source, index=False)
+        baseline = None
+        for workers in counts:
+            stats = bulk_score(source, target, workers=workers)
+            baseline = baseline or stats["rows_per_second"]
+            print(f"  {workers:>3} workers: {stats['seconds']:7.2f} s, {stats['rows_per_second']:>10,.0f} rows/s "
+                  f"({stats['rows_per_second'] / baseline:4.1f}x, merge {stats['merge_seconds']:.2f} s)")
+
+
+def bench_responses(args):
+    """Response models + FastAPI re-validation vs pre-shaped dicts rendered with orjson, then end to end"""
+    import asyncio
+    import json
+    from pydantic import TypeAdapter
+    from api.app import app
+    from api.models import (PredictionResponse, HybridPredictionResponse,
+                            BatchPredictionResponse, BatchHybridPredictionResponse)
+    from api.responses import ORJSONResponse, orjson, response_content
+    from api.warm_up import call_app
+    from services.ml_service import ml_service
+
+    legacy = make_standard_transactions(1000)
+    friendly = make_user_friendly_transactions(1000)
+    summary = {"total_transactions": 1000, "fraud_detected": 0, "legitimate_transactions": 1000,
+               "fraud_rate": 0.0, "processing_timestamp": "2024-01-01T00:00:00"}
+    cases = [
+        ("/predict", PredictionResponse, None, ml_service.predict_single(legacy[0])),
+        ("/predict/friendly", HybridPredictionResponse, None, ml_service.predict_single_user_friendly(friendly[0])),
+        ("/predict/batch", PredictionResponse, BatchPredictionResponse, ml_service.predict_batch(legacy)),
+        ("/predict/friendly/batch", HybridPredictionResponse, BatchHybridPredictionResponse,
+         ml_service.predict_batch_user_friendly(friendly))
+    ]
+    repeats = max(10, args.rows // 10)
+
+    print(f"📊 Building the response body from server-built results ({'orjson' if orjson else 'stdlib json'})")
+    for path, model, batch_model, result in cases:
+        adapter = TypeAdapter(batch_model or model)
+
+        def old(_):
+            # Model construction, then FastAPI's response_model validation and JSON dump
+            if batch_model:
+                value = batch_model(results=[model(**r) for r in result], summary=summary)
+            else:
+                value = model(**result)
+            return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+        def new(_):
+            if batch_model:
+                return ORJSONResponse({"results": [response_content(model, r) for r in result],
+                                       "summary": summary}).body
+            return ORJSONResponse(response_content(model, result)).body
+
+        for label, fn in (("validated", old), ("orjson", new)):
+            start = time.process_time()
+            timings = measure_latency(fn, range(repeats))
+            cpu = (time.process_time() - start) / repeats * 1e6
+            report_latency(f"{path} {label}", timings)
+            print(f"  {'':<40} cpu {cpu:10.1f} µs/response")
+
+    print("📊 End to end through the ASGI app (scoring included)")
+    payloads = [("/predict", legacy[0]), ("/predict/friendly", friendly[0]),
+                ("/predict/batch", {"transactions": legacy}), ("/predict/friendly/batch", {"transactions": friendly})]
+
+    async def run(path, body, n):
+        timings = []
+        for _ in range(n):
+            start = time.perf_counter()
+            status, _ = await call_app(app, "POST", path, body)
+            timings.append((time.perf_counter() - start) * 1e6)
+            assert status == 200, status
+        return sorted(timings)
+
+    for path, payload in payloads:
+        body = json.dumps(payload).encode()
+        n = repeats if path.endswith(("/predict", "friendly")) else max(5, repeats // 10)
+        asyncio.run(run(path, body, 3))
+        start = time.process_time()
+        timings = asyncio.run(run(path, body, n))
+        cpu = (time.process_time() - start) / n * 1e3
+        report_latency(path, timings)
+        print(f"  {'':<40} cpu {cpu:10.2f} ms/request")
+
+
+def bench_predict_payload(args):
+    """/predict with V1-V28 as 28 fields vs a packed "v" list vs a base64 float32 blob"""
+    import asyncio
+    import base64
+    import json
+    import numpy as np
+    from api.app import app
+    from api.models import PackedTransactionRequest
+    from api.warm_up import call_app
+    from services.feature_service import feature_service
+
+    transactions = make_standard_transactions(args.rows)
+    payloads = {"V1-V28 fields": [], "v list": [], "v_b64 float32": []}
+    for t in transactions:
+        v = [t[f"V{i}"] for i in range(1, 29)]
+        payloads["V1-V28 fields"].append(json.dumps(t).encode())
+        payloads["v list"].append(json.dumps({"Time": t["Time"], "Amount": t["Amount"], "v": v}).encode())
+        payloads["v_b64 float32"].append(json.dumps({
+            "Time": t["Time"], "Amount": t["Amount"],
+            "v_b64": base64.b64encode(np.asarray(v, dtype="<f4").tobytes()).decode()
+        }).encode())
+
+    def features(body):
+        transaction = PackedTransactionRequest.model_validate_json(body)
+        packed_v = transaction.packed_v()
+        if packed_v is not None:
+            return feature_service.process_packed_array(transaction.Time, transaction.Amount, packed_v)
+        return feature_service.process_single_array(transaction.dict(exclude={"v", "v_b64", "v_f32"}))
+
+    print(f"📊 /predict request body to model input row ({args.rows} transactions)")
+    for label, bodies in payloads.items():
+        features(bodies[0])
+        start = time.process_time()
+        timings = measure_latency(features, bodies)
+        report_latency(f"{label} ({len(bodies[0])} bytes)", timings)
+        print(f"  {'':<40} cpu {(time.process_time() - start) / len(bodies) * 1e6:10.1f} µs/request")
+
+    async def run(bodies):
+        timings = []
+        for body in bodies:
+            start = time.perf_counter()
+            status, _ = await call_app(app, "POST", "/predict", body)
+            timings.append((time.perf_counter() - start) * 1e6)
+            assert status == 200, status
+        return sorted(timings)
+
+    print("📊 End to end through the ASGI app (scoring included)")
+    for label, bodies in payloads.items():
+        asyncio.run(run(bodies[:10]))
+        start = time.process_time()
+        timings = asyncio.run(run(bodies))
+        report_latency(label, timings)
+        print(f"  {'':<40} cpu {(time.process_time() - start) / len(bodies) * 1e6:10.1f} µs/request")
+
+
+def bench_msgpack(args):
+    """JSON vs MessagePack request/response bodies on /predict, /predict/friendly and /predict/batch"""
+    import asyncio
+    import json
+    import msgpack
+    import numpy as np
+    from api.app import app
+    from api.warm_up import call_app
+
+    legacy = make_standard_transactions(max(args.rows, 1000))
+    friendly = make_user_friendly_transactions(args.rows)
+    packed = [{"Time": t["Time"], "Amount": t["Amount"],
+               "v_f32": np.asarray([t[f"V{i}"] for i in range(1, 29)], dtype="<f4").tobytes()} for t in legacy]
+    codecs = {
+        "json": ("application/json", lambda p: json.dumps(p).encode(), json.loads),
+        "msgpack": ("application/msgpack", msgpack.packb, msgpack.unpackb)
+    }
+    batches = [{"transactions": legacy[i:i + 1000]} for i in range(0, len(legacy) - 999, 1000)] * 5
+    cases = [
+        ("/predict", "json", legacy[:args.rows], 1),
+        ("/predict", "msgpack", legacy[:args.rows], 1),
+        ("/predict v_f32", "msgpack", packed[:args.rows], 1),
+        ("/predict/friendly", "json", friendly, 1),
+        ("/predict/friendly", "msgpack", friendly, 1),
+        ("/predict/batch 1000", "json", batches, 1000),
+        ("/predict/batch 1000", "msgpack", batches, 1000)
+    ]
+
+    async def run(path, content_type, encode, decode, payloads):
+        # Client-side encoding and decoding are part of each timed request
+        timings = []
+        for payload in payloads:
+            start = time.perf_counter()
+            status, body = await call_app(app, "POST", path, encode(payload), content_type, content_type)
+            decode(body)
+            timings.append((time.perf_counter() - start) * 1e6)
+            assert status == 200, (status, body[:200])
+        return timings
+
+    print("📊 Requests through the ASGI app, client encode + server + client decode")
+    for label, codec, payloads, rows in cases:
+        content_type, encode, decode = codecs[codec]
+        path = label.split(" ")[0]
+        asyncio.run(run(path, content_type, encode, decode, payloads[:3]))
+        start = time.perf_counter()
+        timings = sorted(asyncio.run(run(path, content_type, encode, decode, payloads)))
+        seconds = time.perf_counter() - start
+        report_latency(f"{label} {codec}", timings)
+        print(f"  {'':<40} {len(payloads) / seconds:10,.0f} requests/sec  {len(payloads) * rows / seconds:12,.0f} rows/sec")
+
+
+BENCHMARKS = {
+    "bulk-score": bench_bulk_score,
+    "fraud-model": bench_fraud_model,
+    "friendly-batch": bench_friendly_batch,
+    "cold-start": bench_cold_start,
+    "executor": bench_executor,
+    "isolation-forest": bench_isolation_forest,
+    "micro-batch": bench_micro_batch,
+    "model-runner": bench_model_runner,
+    "msgpack": bench_msgpack,
+    "predict-payload": bench_predict_payload,
+    "predict-single": bench_predict_single,
+    "prefork": bench_prefork,
+    "responses": bench_responses,
+    "rules": bench_rules,
+    "tree-ensemble": bench_tree_ensemble,
+    "v-features": bench_v_features,
+    "v-feature-cache": bench_v_feature_cache,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fraud detection inference benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--rows", type=int, default=1000, help="Number of transactions to score")
+    parser.add_argument("--keys", type=int, default=50000, help="Distinct seed keys (v-feature-cache)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Rows per batch (v-feature-cache)")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight (micro-batch, executor)")
+    parser.add_argument("--log-level", default="WARNING", help="Log level while benchmarking")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper()), force=True)
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,16 +13,27 @@ class Settings(BaseSettings):
     API_TITLE: str = "Production Fraud Detection API"
     API_VERSION: str = "1.0.0"
     API_DESCRIPTION: str = "Enterprise-grade fraud detection system for financial institutions"
+    API_HOST: str = "0.0.0.0"
+    API_PORT: int = 8000
     
     # Model Paths
     MODEL_DIR: str = "models"
     FRAUD_MODEL_PATH: str = "models/fraud_model.pkl"
     ANOMALY_MODEL_PATH: str = "models/anomaly_model.pkl"
     SCALER_PATH: str = "models/scaler.pkl"
+    FRAUD_MODEL_BACKEND: str = "compiled"  # "compiled" (NumPy trees), "booster" (raw LightGBM) or "sklearn"
+    ANOMALY_MODEL_BACKEND: str = "compiled"  # "compiled" (packed NumPy trees) or "sklearn"
+    WARM_UP_ON_STARTUP: bool = True  # Score synthetic requests through every endpoint before /ready answers 200
+    MODEL_REGISTRY_POLL_SECONDS: float = 5.0  # How often workers check MODEL_DIR/versions for swaps; 0 disables
+    MODEL_REGISTRY_HISTORY: int = 20  # Activations remembered for rollback
     
     # Business Logic
     DEFAULT_FRAUD_THRESHOLD: float = 0.35
     MAX_BATCH_SIZE: int = 1000
+    STREAM_CHUNK_ROWS: int = 1000  # Rows scored together by /predict/stream and /predict/upload
+    STREAM_MAX_LINE_BYTES: int = 65536  # Longest NDJSON line accepted by /predict/stream
+    RULES_PATH: str = "config/rules.json"
+    RULES_POLL_SECONDS: float = 5.0  # How often workers check RULES_PATH for changes; 0 disables
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -31,6 +42,18 @@ class Settings(BaseSettings):
     # Performance
     REQUEST_TIMEOUT: int = 30
     MAX_WORKERS: int = 4
+    BOOSTER_THREADS_SINGLE: int = 1  # LightGBM threads per single-row prediction
+    BOOSTER_THREADS_BATCH: int = 0  # LightGBM threads per batch prediction; 0 uses the OpenMP default
+    V_FEATURE_CACHE_SIZE: int = 20000  # Cached V-feature draw vectors; 0 disables the cache
+    V_FEATURE_CACHE_POLICY: str = "lru"  # "lru" or "arc"
+    MODEL_RUNNER_THREADS: int = 0  # Threads scoring row blocks of large batches; 0 or 1 scores inline
+    MODEL_RUNNER_BLOCK_ROWS: int = 2048  # Rows per block when MODEL_RUNNER_THREADS > 1
+    MICRO_BATCH_MAX_ROWS: int = 64  # Rows scored together by the /predict micro-batcher; 1 disables it
+    MICRO_BATCH_MAX_WAIT_US: int = 500  # Longest a /predict request waits for others to join its batch
+    MICRO_BATCH_MAX_QUEUE: int = 4096  # /predict requests waiting for a batch before new ones get 503
+    INFERENCE_EXECUTOR: str = "thread"  # "thread", "process" or "inline" (on the event loop)
+    INFERENCE_WORKERS: int = 2  # Inference pool size
+    INFERENCE_MAX_PENDING: int = 32  # Inference jobs running or queued before new ones get 503
     
     # Environment
     ENVIRONMENT: str = "development"
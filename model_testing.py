@@ -0,0 +1,22 @@
+"""
+Shared fixtures for the model tests
+The bundled models, loaded once, and random model input rows to score with them
+"""
+
+import joblib
+import numpy as np
+
+from config.settings import settings
+
+# Reference sklearn models (ml_service may hold compiled, memory-mapped models)
+fraud_model = joblib.load(settings.FRAUD_MODEL_PATH)
+anomaly_model = joblib.load(settings.ANOMALY_MODEL_PATH)
+scaler = joblib.load(settings.SCALER_PATH)
+
+
+def make_rows(n, seed=0):
+    """Model inputs around and beyond the training distribution (Amount in column 0)"""
+    rng = np.random.default_rng(seed)
+    rows = rng.normal(0, 2, size=(n, fraud_model.n_features_in_))
+    rows[:, 0] = np.abs(rows[:, 0]) * 40000
+    return rows
@@ -0,0 +1,245 @@
+"""
+Arrow / Parquet Bulk Scoring
+Columnar scoring of Arrow record batches, for the /predict/arrow endpoint and Parquet backfills
+
+Time, Amount and V1-V28 are taken from each record batch as NumPy views
+of the Arrow buffers (no per-row dictionaries, no DataFrame) and copied
+once, straight into the model input matrix. Scores come back as record
+batches with one column per result field.
+
+Score a Parquet file: python -m services.arrow_scoring input.parquet output.parquet
+
+Requires pyarrow (optional; everything else in the service works without it).
+"""
+import argparse
+import asyncio
+import io
+import logging
+import sys
+import time
+from typing import AsyncIterable, Optional, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from services.feature_service import V_FEATURE_COLUMNS
+from services.ml_service import ml_service
+from services.stream_scoring import TRANSACTION_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Arrow and Parquet scoring are optional
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+
+def arrow_available() -> bool:
+    """Whether pyarrow is installed"""
+    return pa is not None
+
+
+def result_schema() -> "pa.Schema":
+    """Schema of scored record batches"""
+    return pa.schema([
+        ("transaction_id", pa.int64()),
+        ("fraud_probability", pa.float64()),
+        ("anomaly_detected", pa.bool_()),
+        ("risk_score", pa.string()),
+        ("final_decision", pa.string()),
+        ("confidence", pa.string()),
+        ("threshold_used", pa.float64()),
+        ("model_version", pa.string())
+    ])
+
+
+def check_schema(schema: "pa.Schema"):
+    """
+    Raises:
+        ValueError: If required transaction columns are missing or not numeric
+    """
+    missing = [column for column in TRANSACTION_COLUMNS if schema.get_field_index(column) < 0]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+    not_numeric = [column for column in TRANSACTION_COLUMNS
+                   if not pa.types.is_floating(schema.field(column).type)
+                   and not pa.types.is_integer(schema.field(column).type)]
+    if not_numeric:
+        raise ValueError(f"Columns must be numeric: {not_numeric}")
+
+
+def _column(batch: "pa.RecordBatch", name: str) -> np.ndarray:
+    """NumPy view of a numeric column (a copy only when it has nulls, which become NaN)"""
+    return batch.column(name).to_numpy(zero_copy_only=False)
+
+
+def score_record_batch(batch: "pa.RecordBatch", first_id: int,
+                       threshold: Optional[float] = None) -> "pa.RecordBatch":
+    """
+    Score one record batch
+
+    Module-level so it can run on any inference executor.
+
+    Args:
+        batch: Record batch with Time, Amount and V1-V28 columns (others are ignored)
+        first_id: transaction_id of the first row
+        threshold: Custom fraud threshold (optional)
+
+    Returns:
+        Record batch with result_schema()
+    """
+    n = batch.num_rows
+    scores = ml_service.score_columns(
+        _column(batch, "Time"), _column(batch, "Amount"),
+        [_column(batch, name) for name in V_FEATURE_COLUMNS], threshold
+    )
+    return pa.RecordBatch.from_arrays([
+        pa.array(np.arange(first_id, first_id + n, dtype=np.int64)),
+        pa.array(scores["fraud_probability"]),
+        pa.array(scores["anomaly_detected"]),
+        pa.array(scores["risk_score"]),
+        pa.array(scores["final_decision"]),
+        pa.array(scores["confidence"]),
+        pa.array(np.full(n, scores["threshold_used"], dtype=np.float64)),
+        pa.array([scores["model_version"]] * n, type=pa.string())
+    ], schema=result_schema())
+
+
+class AsyncBodyFile(io.RawIOBase):
+    """
+    Blocking, read-only file over an async byte stream (e.g. Request.stream())
+
+    For pyarrow readers running in a worker thread: a read that runs out of
+    data fetches the next chunk on the event loop and waits for it, so at
+    most one chunk of the body is held besides what the reader keeps. Must
+    not be read from the event loop's own thread. Wrap it in
+    io.BufferedReader, which repeats short reads until a read is filled.
+    """
+
+    def __init__(self, chunks: AsyncIterable[bytes], loop: asyncio.AbstractEventLoop):
+        super().__init__()
+        self._chunks = chunks.__aiter__()
+        self._loop = loop
+        self._pending = memoryview(b"")
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    async def _next_chunk(self) -> Optional[bytes]:
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    def readinto(self, buffer) -> int:
+        while not self._pending and not self._eof:
+            chunk = asyncio.run_coroutine_threadsafe(self._next_chunk(), self._loop).result()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class ResultEncoder:
+    """
+    Serializes scored record batches incrementally as an Arrow IPC stream or Parquet
+
+    Each call returns the bytes produced since the previous one, so results
+    can be streamed out without holding the whole output.
+    """
+
+    def __init__(self, output_format: str = "arrow"):
+        self._buffer = io.BytesIO()
+        if output_format == "parquet":
+            self._writer = pq.ParquetWriter(self._buffer, result_schema())
+        else:
+            self._writer = pa.ipc.new_stream(self._buffer, result_schema())
+
+    def _take(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def write(self, batch: "pa.RecordBatch") -> bytes:
+        """Encode one batch"""
+        self._writer.write_batch(batch)
+        return self._take()
+
+    def close(self) -> bytes:
+        """Finish the stream (end-of-stream marker or Parquet footer)"""
+        self._writer.close()
+        return self._take()
+
+
+def score_parquet(input_path: str, output_path: str, threshold: Optional[float] = None,
+                  batch_rows: Optional[int] = None) -> Tuple[int, float]:
+    """
+    Score a Parquet file into a Parquet (or, for .arrow/.arrows outputs, Arrow IPC stream) file
+
+    Only the transaction columns are read, one batch at a time, so memory
+    is bounded by batch_rows rather than the file size.
+
+    Args:
+        input_path: Parquet file with Time, Amount and V1-V28 columns
+        output_path: Result file
+        threshold: Custom fraud threshold (optional)
+        batch_rows: Rows per batch (default settings.STREAM_CHUNK_ROWS)
+
+    Returns:
+        Tuple of (rows scored, seconds taken)
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+        ValueError: If required columns are missing
+    """
+    if not arrow_available():
+        raise RuntimeError("pyarrow is required for Parquet scoring")
+    start = time.perf_counter()
+    source = pq.ParquetFile(input_path)
+    check_schema(source.schema_arrow)
+
+    if output_path.endswith((".arrow", ".arrows")):
+        sink = pa.OSFile(output_path, "wb")
+        writer = pa.ipc.new_stream(sink, result_schema())
+    else:
+        sink, writer = None, pq.ParquetWriter(output_path, result_schema())
+    rows = 0
+    try:
+        for batch in source.iter_batches(batch_size=batch_rows or settings.STREAM_CHUNK_ROWS,
+                                         columns=TRANSACTION_COLUMNS):
+            writer.write_batch(score_record_batch(batch, rows + 1, threshold))
+            rows += batch.num_rows
+    finally:
+        writer.close()
+        if sink is not None:
+            sink.close()
+    return rows, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a Parquet file of transactions")
+    parser.add_argument("input", help="Parquet file with Time, Amount and V1-V28 columns")
+    parser.add_argument("output", help="Result file (.parquet, or .arrow for an Arrow IPC stream)")
+    parser.add_argument("--threshold", type=float, default=None, help="Custom fraud threshold")
+    parser.add_argument("--batch-rows", type=int, default=65536, help="Rows scored together")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if not arrow_available():
+        sys.exit("pyarrow is required for Parquet scoring: pip install pyarrow")
+    rows, seconds = score_parquet(args.input, args.output, args.threshold, args.batch_rows)
+    logger.info(f"Scored {rows} rows in {seconds:.2f}s ({rows / max(seconds, 1e-9):.0f} rows/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
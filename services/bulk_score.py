@@ -0,0 +1,314 @@
+"""
+Offline Bulk Scoring
+Scores a large CSV or Parquet file outside the HTTP API, sharded across a process pool
+
+The input is cut into shards (byte ranges aligned to line ends for CSV,
+runs of row groups for Parquet). Each worker process loads the models once
+(memory-mapped artifacts when exported, so all workers share the pages),
+scores its shards chunk by chunk with the columnar scorer and writes one
+part file per shard. The parts are then concatenated in input order, so
+row N of the output is row N of the input.
+
+Usage: python -m services.bulk_score transactions.csv scores.csv --workers 32
+"""
+import argparse
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per call inside a worker
+DEFAULT_CHUNK_ROWS = 65536
+
+# Shards per worker: more, smaller shards even out uneven progress
+SHARDS_PER_WORKER = 4
+
+# Result columns, in order
+RESULT_COLUMNS = ["fraud_probability", "anomaly_detected", "risk_score", "final_decision",
+                  "confidence", "threshold_used", "model_version"]
+
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view of bytes [start, end) of a file"""
+
+    def __init__(self, path: str, start: int, end: int):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._remaining <= 0:
+            return 0
+        count = self._file.readinto(memoryview(buffer)[:min(len(buffer), self._remaining)])
+        self._remaining -= count
+        return count
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def plan_csv_shards(path: str, shards: int) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """
+    Split a CSV file into byte ranges that start and end on line boundaries
+
+    Assumes no quoted field contains a newline (true of numeric transaction files).
+
+    Args:
+        path: CSV file with a header line
+        shards: Number of ranges wanted (fewer come back for small files)
+
+    Returns:
+        Tuple of (header column names, [(start, end), ...] in file order)
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        bounds = [f.tell()]
+        for i in range(1, shards):
+            f.seek(max(bounds[-1], size * i // shards))
+            f.readline()
+            position = f.tell()
+            if position >= size:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+    bounds.append(size)
+    columns = header.decode("utf-8-sig").strip().split(",")
+    columns = [column.strip().strip('"') for column in columns]
+    return columns, [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def plan_parquet_shards(path: str, shards: int) -> List[List[int]]:
+    """
+    Split a Parquet file's row groups into contiguous runs of similar row counts
+
+    Args:
+        path: Parquet file
+        shards: Number of runs wanted (at most one per row group)
+
+    Returns:
+        Row group indices of each run, in file order
+    """
+    import pyarrow.parquet as pq
+
+    metadata = pq.ParquetFile(path).metadata
+    rows = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+    target = max(1, sum(rows) // max(1, shards))
+    runs, current, current_rows = [], [], 0
+    for index, count in enumerate(rows):
+        current.append(index)
+        current_rows += count
+        if current_rows >= target:
+            runs.append(current)
+            current, current_rows = [], 0
+    if current:
+        runs.append(current)
+    return runs
+
+
+def _init_worker():
+    """Load the models once per worker process, single-threaded (the pool provides the parallelism)"""
+    settings.BOOSTER_THREADS_BATCH = 1
+    settings.MODEL_RUNNER_THREADS = 0
+    settings.MICRO_BATCH_MAX_ROWS = 1
+    settings.MODEL_REGISTRY_POLL_SECONDS = 0
+    from services.ml_service import ml_service  # noqa: F401 (loads the models)
+
+
+def _score_frame(time_column: np.ndarray, amount: np.ndarray, v_features,
+                 threshold: Optional[float]) -> pd.DataFrame:
+    """Result columns of one chunk"""
+    from services.ml_service import ml_service
+
+    scores = ml_service.score_columns(time_column, amount, v_features, threshold)
+    return pd.DataFrame({column: scores[column] for column in RESULT_COLUMNS}, index=None)
+
+
+def _iter_csv_shard(path: str, columns: List[str], start: int, end: int, chunk_rows: int):
+    """(time, amount, v_features) chunks of a CSV byte range"""
+    from services.stream_scoring import CSV_DTYPES, TRANSACTION_COLUMNS, csv_chunk_columns
+
+    with io.BufferedReader(_ByteRange(path, start, end), buffer_size=1 << 20) as source:
+        for chunk in pd.read_csv(source, names=columns, header=None, usecols=TRANSACTION_COLUMNS,
+                                 dtype=CSV_DTYPES, chunksize=chunk_rows):
+            yield csv_chunk_columns(chunk)
+
+
+def _iter_parquet_shard(path: str, row_groups: List[int], chunk_rows: int):
+    """(time, amount, v_features) chunks of a run of Parquet row groups"""
+    import pyarrow.parquet as pq
+    from services.feature_service import V_FEATURE_COLUMNS
+    from services.stream_scoring import TRANSACTION_COLUMNS
+
+    source = pq.ParquetFile(path)
+    for batch in source.iter_batches(batch_size=chunk_rows, row_groups=row_groups, columns=TRANSACTION_COLUMNS):
+        column = lambda name: batch.column(name).to_numpy(zero_copy_only=False)
+        yield column("Time"), column("Amount"), [column(name) for name in V_FEATURE_COLUMNS]
+
+
+def score_shard(task: Dict) -> Tuple[int, int]:
+    """
+    Score one shard into its part file (runs in a worker process)
+
+    Args:
+        task: index, input, shard (byte range or row groups), part path,
+            output format, threshold, chunk_rows and (CSV) columns
+
+    Returns:
+        Tuple of (shard index, rows scored)
+    """
+    if task["input_format"] == "parquet":
+        chunks = _iter_parquet_shard(task["input"], task["shard"], task["chunk_rows"])
+    else:
+        chunks = _iter_csv_shard(task["input"], task["columns"], *task["shard"], task["chunk_rows"])
+
+    rows, writer = 0, None
+    with open(task["part"], "wb") as sink:
+        for time_column, amount, v_features in chunks:
+            frame = _score_frame(time_column, amount, v_features, task["threshold"])
+            rows += len(frame)
+            if task["output_format"] == "parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(sink, table.schema)
+                writer.write_table(table)
+            else:
+                sink.write(frame.to_csv(header=False, index=False).encode())
+        if writer is not None:
+            writer.close()
+    return task["index"], rows
+
+
+def _merge_parts(parts: List[str], output: str, output_format: str):
+    """Concatenate the part files in shard order"""
+    if output_format == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for part in parts:
+                if os.path.getsize(part) == 0:
+                    continue
+                source = pq.ParquetFile(part)
+                if writer is None:
+                    writer = pq.ParquetWriter(output, source.schema_arrow)
+                for index in range(source.num_row_groups):
+                    writer.write_table(source.read_row_group(index))
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+    with open(output, "wb") as sink:
+        sink.write((",".join(RESULT_COLUMNS) + "\n").encode())
+        for part in parts:
+            with open(part, "rb") as source:
+                shutil.copyfileobj(source, sink, 1 << 20)
+
+
+def bulk_score(input_path: str, output_path: str, workers: Optional[int] = None,
+               shards: Optional[int] = None, threshold: Optional[float] = None,
+               chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Dict[str, float]:
+    """
+    Score a CSV or Parquet file across a process pool
+
+    Args:
+        input_path: .csv or .parquet file with Time, Amount and V1-V28 columns
+        output_path: .csv or .parquet result file, rows in input order
+        workers: Worker processes (default os.cpu_count())
+        shards: Shards to cut the input into (default SHARDS_PER_WORKER per worker)
+        threshold: Custom fraud threshold (optional)
+        chunk_rows: Rows scored per call inside a worker
+
+    Returns:
+        Run statistics: rows, seconds, rows_per_second, workers and shards
+
+    Raises:
+        ValueError: If required columns are missing from a CSV header
+    """
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers * SHARDS_PER_WORKER
+    input_format = "parquet" if input_path.endswith(".parquet") else "csv"
+    output_format = "parquet" if output_path.endswith(".parquet") else "csv"
+
+    columns = None
+    if input_format == "parquet":
+        plan = plan_parquet_shards(input_path, shards)
+    else:
+        from services.stream_scoring import TRANSACTION_COLUMNS
+
+        columns, plan = plan_csv_shards(input_path, shards)
+        missing = [column for column in TRANSACTION_COLUMNS if column not in columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+
+    part_dir = tempfile.mkdtemp(prefix=".bulk-score-", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        tasks = [{
+            "index": index, "input": input_path, "input_format": input_format, "shard": shard,
+            "columns": columns, "part": os.path.join(part_dir, f"part-{index:05d}"),
+            "output_format": output_format, "threshold": threshold, "chunk_rows": chunk_rows
+        } for index, shard in enumerate(plan)]
+
+        rows = 0
+        with ProcessPoolExecutor(max_workers=min(workers, max(1, len(tasks))), initializer=_init_worker) as pool:
+            for _, shard_rows in pool.map(score_shard, tasks):
+                rows += shard_rows
+        scored = time.perf_counter()
+        _merge_parts([task["part"] for task in tasks], output_path, output_format)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "merge_seconds": round(time.perf_counter() - scored, 3),
+        "rows_per_second": round(rows / seconds, 1) if seconds > 0 else 0.0,
+        "workers": workers,
+        "shards": len(plan)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of transactions across a process pool")
+    parser.add_argument("input", help=".csv or .parquet file with Time, Amount and V1-V28 columns")
+    parser.add_argument("output", help=".csv or .parquet result file (rows in input order)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--shards", type=int, default=None,
+                        help=f"Input shards (default {SHARDS_PER_WORKER} per worker)")
+    parser.add_argument("--threshold", type=float, default=None, help="Custom fraud threshold")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows scored per call")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        stats = bulk_score(args.input, args.output, args.workers, args.shards, args.threshold, args.chunk_rows)
+    except (ValueError, ImportError) as e:
+        sys.exit(f"Bulk scoring failed: {str(e)}")
+    logger.info(f"Scored {stats['rows']} rows in {stats['seconds']:.2f}s "
+                f"({stats['rows_per_second']:.0f} rows/s, {stats['workers']} workers, "
+                f"{stats['shards']} shards, merge {stats['merge_seconds']:.2f}s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
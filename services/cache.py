@@ -0,0 +1,206 @@
+"""
+Bounded In-Memory Caches
+Thread-safe LRU and ARC caches with hit/miss counters
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class LRUCache:
+    """Least-recently-used cache holding at most ``maxsize`` entries"""
+
+    policy = "lru"
+
+    def __init__(self, maxsize: int):
+        if maxsize < 1:
+            raise ValueError("Cache size must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value (None on a miss)"""
+        with self._lock:
+            return self._get(key)
+
+    def put(self, key: Hashable, value: Any):
+        """Insert a value, evicting if the cache is full"""
+        with self._lock:
+            self._put(key, value)
+
+    def get_many(self, keys: Iterable[Hashable]) -> List[Optional[Any]]:
+        """Look up many keys while taking the lock once"""
+        with self._lock:
+            return [self._get(key) for key in keys]
+
+    def put_many(self, items: Iterable[Tuple[Hashable, Any]]):
+        """Insert many values while taking the lock once"""
+        with self._lock:
+            for key, value in items:
+                self._put(key, value)
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "policy": self.policy,
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _get(self, key: Hashable) -> Optional[Any]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _put(self, key: Hashable, value: Any):
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+        elif len(entries) >= self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+        entries[key] = value
+
+    def _clear(self):
+        self._entries.clear()
+
+
+class ARCCache(LRUCache):
+    """
+    Adaptive replacement cache (Megiddo & Modha)
+
+    Splits the cache between recently seen keys (``_recent``) and keys seen
+    at least twice (``_frequent``). Ghost lists of recently evicted keys
+    adapt the split, so one-off keys cannot flush out keys that recur.
+    """
+
+    policy = "arc"
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self._target = 0  # Target size of _recent
+        self._recent: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._frequent: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._recent_ghosts: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._frequent_ghosts: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._recent) + len(self._frequent)
+
+    def _get(self, key: Hashable) -> Optional[Any]:
+        value = self._recent.pop(key, None)
+        if value is not None:
+            self._frequent[key] = value
+        else:
+            value = self._frequent.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._frequent.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _put(self, key: Hashable, value: Any):
+        recent, frequent = self._recent, self._frequent
+        recent_ghosts, frequent_ghosts = self._recent_ghosts, self._frequent_ghosts
+        maxsize = self.maxsize
+
+        if key in recent:
+            recent[key] = value
+            return
+        if key in frequent:
+            frequent[key] = value
+            frequent.move_to_end(key)
+            return
+
+        if key in recent_ghosts:
+            # Evicted too early from the recent side: grow its target
+            self._target = min(maxsize, self._target + max(len(frequent_ghosts) // len(recent_ghosts), 1))
+            self._replace(key)
+            del recent_ghosts[key]
+            frequent[key] = value
+            return
+        if key in frequent_ghosts:
+            # Evicted too early from the frequent side: shrink the recent target
+            self._target = max(0, self._target - max(len(recent_ghosts) // len(frequent_ghosts), 1))
+            self._replace(key)
+            del frequent_ghosts[key]
+            frequent[key] = value
+            return
+
+        recent_total = len(recent) + len(recent_ghosts)
+        total = recent_total + len(frequent) + len(frequent_ghosts)
+        if recent_total >= maxsize:
+            if len(recent) < maxsize:
+                recent_ghosts.popitem(last=False)
+                self._replace(key)
+            else:
+                recent.popitem(last=False)
+                self.evictions += 1
+        elif total >= maxsize:
+            if total >= 2 * maxsize:
+                frequent_ghosts.popitem(last=False)
+            if len(recent) + len(frequent) >= maxsize:
+                self._replace(key)
+        recent[key] = value
+
+    def _replace(self, key: Hashable):
+        """Evict one entry to its ghost list, from the side over its target"""
+        recent, frequent = self._recent, self._frequent
+        if recent and (not frequent or len(recent) > self._target
+                       or (key in self._frequent_ghosts and len(recent) == self._target)):
+            evicted, _ = recent.popitem(last=False)
+            self._recent_ghosts[evicted] = None
+        else:
+            evicted, _ = frequent.popitem(last=False)
+            self._frequent_ghosts[evicted] = None
+        self.evictions += 1
+
+    def _clear(self):
+        self._target = 0
+        for entries in (self._recent, self._frequent, self._recent_ghosts, self._frequent_ghosts):
+            entries.clear()
+
+
+CACHE_POLICIES = {"lru": LRUCache, "arc": ARCCache}
+
+
+def make_cache(policy: str, maxsize: int) -> Optional[LRUCache]:
+    """
+    Create a cache for a configured policy and size
+
+    Args:
+        policy: "lru" or "arc"
+        maxsize: Maximum number of entries; 0 disables caching
+
+    Returns:
+        The cache, or None when caching is disabled
+    """
+    if maxsize <= 0:
+        return None
+    try:
+        return CACHE_POLICIES[policy.lower()](maxsize)
+    except KeyError:
+        raise ValueError(f"Unknown cache policy {policy!r}; expected one of {sorted(CACHE_POLICIES)}")
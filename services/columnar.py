@@ -0,0 +1,64 @@
+"""
+Columnar Transaction Helpers
+Converts lists of transaction dictionaries into NumPy columns for vectorized scoring
+"""
+from itertools import repeat
+
+import numpy as np
+from typing import Dict, List, Any
+
+
+# Defaults applied by the single-transaction paths when a field is missing
+USER_FRIENDLY_DEFAULTS = {
+    'Time': 0.0,
+    'Amount': 0.0,
+    'merchant_type': 'Other',
+    'transaction_type': 'Purchase',
+    'location_risk': 'Low Risk (Home Country)',
+    'hour_of_day': 12,
+    'customer_age_days': 365,
+    'daily_transactions': 3
+}
+
+NUMERIC_FIELDS = ('Time', 'Amount', 'hour_of_day', 'customer_age_days', 'daily_transactions')
+CATEGORICAL_FIELDS = ('merchant_type', 'transaction_type', 'location_risk')
+
+
+def user_friendly_columns(transactions: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Convert user-friendly transactions into one NumPy array per field
+
+    Args:
+        transactions: List of user-friendly transaction dictionaries
+
+    Returns:
+        Dictionary mapping field name to a column array
+    """
+    columns = {}
+    for field in NUMERIC_FIELDS:
+        default = USER_FRIENDLY_DEFAULTS[field]
+        columns[field] = np.fromiter(
+            (t.get(field, default) for t in transactions), dtype=np.float64, count=len(transactions)
+        )
+    for field in CATEGORICAL_FIELDS:
+        default = USER_FRIENDLY_DEFAULTS[field]
+        columns[field] = np.array([t.get(field, default) for t in transactions], dtype=object)
+    return columns
+
+
+def encode_labels(values: np.ndarray, mapping: Dict[str, Any], default: Any, dtype=np.int64) -> np.ndarray:
+    """
+    Map an array of category labels through a dictionary
+
+    Args:
+        values: Array of category labels
+        mapping: Label to numeric value mapping
+        default: Value for labels missing from the mapping
+        dtype: Output dtype
+
+    Returns:
+        Array of mapped values aligned with ``values``
+    """
+    values = np.asarray(values, dtype=object)
+    mapped = np.fromiter(map(mapping.get, values.ravel().tolist(), repeat(default)), dtype=dtype, count=values.size)
+    return mapped.reshape(values.shape)
@@ -5,8 +5,16 @@ Centralized feature processing for consistency across all endpoints
 import pandas as pd
 import numpy as np
 import joblib
+import math
+import threading
 from typing import Dict, List, Union, Optional
 from config.settings import settings
+from services.model_artifacts import load_model_artifact
+
+
+# Model input columns in training order (output of _apply_feature_engineering)
+MODEL_FEATURES = ["Time"] + [f"V{i}" for i in range(1, 29)] + ["Amount_log", "Amount_scaled"]
+V_FEATURE_COLUMNS = MODEL_FEATURES[1:29]
 
 
 class FeatureEngineeringService:
@@ -14,9 +22,20 @@ class FeatureEngineeringService:
     
     def __init__(self):
         self.scaler = self._load_scaler()
+        
+        # Amount scaling as plain floats for the single-row path
+        if self.scaler is not None:
+            self.amount_mean = float(self.scaler.mean_[0])
+            self.amount_scale = float(self.scaler.scale_[0])
+        
+        # Per-thread (1, 31) input buffers for process_single_array
+        self._row_buffers = threading.local()
     
     def _load_scaler(self) -> Optional[object]:
-        """Load the trained scaler"""
+        """Load the trained scaler (its memory-mapped artifact when there is a current one)"""
+        scaler = load_model_artifact(settings.SCALER_PATH)
+        if scaler is not None:
+            return scaler
         try:
             return joblib.load(settings.SCALER_PATH)
         except FileNotFoundError:
@@ -35,6 +54,87 @@ class FeatureEngineeringService:
         df = pd.DataFrame([transaction])
         return self._apply_feature_engineering(df)
     
+    def process_single_array(self, transaction: Dict) -> np.ndarray:
+        """
+        Pandas-free equivalent of validate_transaction_features followed by
+        process_single_transaction
+        
+        Fills the calling thread's preallocated (1, 31) buffer in MODEL_FEATURES
+        order. The buffer is reused by the next call on the same thread, so the
+        result must be consumed (or copied) before then.
+        
+        Args:
+            transaction: Dictionary with Time, Amount and V1-V28 (missing values default to 0.0)
+            
+        Returns:
+            float64 array of shape (1, 31) ready for model inference
+        """
+        row = self._row_buffer()
+        values = row[0]
+        get = transaction.get
+        
+        values[1:29] = [float(get(name, 0.0)) for name in V_FEATURE_COLUMNS]
+        self._fill_time_amount(values, get("Time", 0.0), get("Amount", 0.0))
+        
+        return row
+    
+    def process_packed_array(self, time: float, amount: float, v: Union[List[float], bytes],
+                             out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        (1, 31) model input from Time, Amount and a packed V1-V28 vector
+        
+        The vector is written straight into the row (float32 bytes are cast
+        in the same copy) and checked in one step.
+        
+        Args:
+            time: Transaction time
+            amount: Transaction amount
+            v: 28 floats, or 112 bytes holding 28 little-endian float32 values
+            out: (1, 31) float64 array to fill (default: the calling thread's
+                row buffer, reused by the next call)
+            
+        Returns:
+            float64 array of shape (1, 31) ready for model inference
+            
+        Raises:
+            ValueError: If v does not hold exactly 28 finite values
+        """
+        row = out if out is not None else self._row_buffer()
+        values = row[0]
+        
+        if isinstance(v, (bytes, bytearray, memoryview)):
+            if len(v) != 4 * len(V_FEATURE_COLUMNS):
+                raise ValueError(f"Packed V1-V28 must be {4 * len(V_FEATURE_COLUMNS)} bytes of float32, got {len(v)}")
+            values[1:29] = np.frombuffer(v, dtype="<f4")
+        else:
+            if len(v) != len(V_FEATURE_COLUMNS):
+                raise ValueError(f"V1-V28 vector must hold {len(V_FEATURE_COLUMNS)} values, got {len(v)}")
+            values[1:29] = v
+        if not np.isfinite(values[1:29]).all():
+            raise ValueError("V1-V28 must be finite numbers")
+        self._fill_time_amount(values, time, amount)
+        
+        return row
+    
+    def _row_buffer(self) -> np.ndarray:
+        """The calling thread's (1, 31) row buffer"""
+        row = getattr(self._row_buffers, "row", None)
+        if row is None:
+            row = self._row_buffers.row = np.empty((1, len(MODEL_FEATURES)))
+        return row
+    
+    def _fill_time_amount(self, values: np.ndarray, time: float, amount: float):
+        """Time, log_amount and amount_scaled of one row, clamped like validate_transaction_features"""
+        values[0] = max(0.0, float(time))
+        
+        amount = max(0.0, float(amount))
+        values[29] = math.log1p(amount)
+        if self.scaler is not None:
+            values[30] = (amount - self.amount_mean) / self.amount_scale
+        else:
+            # The manual fallback has no spread to normalize by with one row
+            values[30] = math.nan
+    
     def process_batch_transactions(self, transactions: List[Dict]) -> pd.DataFrame:
         """
         Process multiple transactions for batch inference
@@ -75,6 +175,44 @@ class FeatureEngineeringService:
         
         return df
     
+    def process_arrays(self, time: np.ndarray, amount: np.ndarray, v_features: np.ndarray) -> np.ndarray:
+        """
+        Build the model input matrix straight from arrays
+        
+        Applies the same transformations as _apply_feature_engineering without
+        going through per-row dictionaries or a DataFrame.
+        
+        Args:
+            time: Transaction times, shape (N,)
+            amount: Transaction amounts, shape (N,)
+            v_features: V1-V28 values, shape (N, 28), or a sequence of 28
+                columns of shape (N,) (e.g. views of Arrow columns, copied
+                once straight into the result)
+            
+        Returns:
+            float64 array of shape (N, 31) with columns in MODEL_FEATURES order
+        """
+        amount = np.asarray(amount, dtype=np.float64)
+        features = np.empty((len(amount), len(MODEL_FEATURES)))
+        features[:, 0] = time
+        if isinstance(v_features, np.ndarray):
+            features[:, 1:29] = v_features
+        else:
+            for i, column in enumerate(v_features, start=1):
+                features[:, i] = column
+        
+        # Log transform Amount (handle zero/negative values)
+        np.log1p(np.maximum(amount, 0), out=features[:, 29])
+        
+        # Scale Amount
+        if self.scaler is not None:
+            features[:, 30] = (amount - self.scaler.mean_[0]) / self.scaler.scale_[0]
+        else:
+            # Fallback: normalize Amount manually
+            features[:, 30] = (amount - amount.mean()) / amount.std(ddof=1)
+        
+        return features
+    
     def validate_transaction_features(self, transaction: Dict) -> Dict:
         """
         Validate and clean transaction features
@@ -0,0 +1,128 @@
+"""
+Bounded Inference Executor
+Runs CPU-bound model calls off the event loop, with admission control
+"""
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when inference is refused because too many jobs are already pending"""
+
+
+class InferenceExecutor:
+    """
+    A thread or process pool with a cap on pending jobs
+
+    ``run`` is called from the event loop. Jobs that are running or waiting
+    for a worker count as pending, until the pool has finished them (even
+    if the request awaiting one was cancelled); once ``max_pending`` are pending, further
+    jobs are refused straight away with ExecutorSaturatedError instead of
+    queueing without bound. Until ``start`` is called (and always for the
+    "inline" kind) jobs run directly in the caller.
+
+    Process workers are forked from the serving process and keep their own
+    copies of the models, rules and caches. They follow model swaps and
+    rules changes by polling (see ml_service), and their cache statistics
+    are not reported.
+    """
+
+    def __init__(self, kind: str, workers: int, max_pending: int):
+        """
+        Args:
+            kind: "thread", "process" or "inline"
+            workers: Pool size
+            max_pending: Jobs running or queued before new ones are refused
+        """
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown inference executor {kind!r}; expected 'thread', 'process' or 'inline'")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.completed = 0
+        self.rejected = 0
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._pool: Optional[Executor] = None
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self):
+        """Create the worker pool"""
+        if self._pool is not None or self.kind == "inline":
+            return
+        if self.kind == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        else:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        logger.info(f"Inference executor started ({self.workers} {self.kind} workers, "
+                    f"max {self.max_pending} pending)")
+
+    def shutdown(self):
+        """Wait for running jobs and stop the workers"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) on the pool
+
+        Args:
+            fn: Callable; module-level for the process pool, so it can be pickled
+            *args: Positional arguments (pickled for the process pool)
+
+        Returns:
+            fn's return value
+
+        Raises:
+            ExecutorSaturatedError: If max_pending jobs are already pending
+        """
+        if self._pool is None:
+            return fn(*args)
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise ExecutorSaturatedError(f"Inference queue is full ({self._pending} pending jobs)")
+            self._pending += 1
+        try:
+            future = self._pool.submit(functools.partial(fn, *args))
+        except BaseException:
+            self._job_done(None)
+            raise
+        # Released when the pool is done with the job, not when the awaiting request goes away
+        future.add_done_callback(self._job_done)
+        return await asyncio.wrap_future(future)
+
+    def _job_done(self, future: Optional[Future]):
+        """Pool callback: a job finished, failed or was cancelled before it started"""
+        with self._pending_lock:
+            self._pending -= 1
+            if future is not None and not future.cancelled() and future.exception() is None:
+                self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool settings and job counters"""
+        return {
+            "kind": self.kind,
+            "running": self.running,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
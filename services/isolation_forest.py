@@ -0,0 +1,195 @@
+"""
+Compiled Isolation Forest Scorer
+Scores a fitted sklearn IsolationForest from packed NumPy arrays
+"""
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per block (trees x rows node states stay cache-sized)
+EVAL_BLOCK_ROWS = 256
+
+
+class CompiledIsolationForest:
+    """
+    An IsolationForest with all trees packed into flat node arrays
+
+    Every row walks all trees at once, one level per step, for exactly
+    ``max_depth`` steps; leaves point to themselves so finished paths stay
+    put. Each leaf stores the path length sklearn credits to it (its depth
+    plus the average path length of the samples it holds, minus one).
+
+    Inputs are rounded to float32 and tree contributions are added in tree
+    order, as sklearn does, so scores are bit-identical to
+    ``score_samples`` and the anomaly flags match ``predict`` exactly.
+    """
+
+    def __init__(self, model):
+        """
+        Args:
+            model: Fitted ``sklearn.ensemble.IsolationForest``
+        """
+        # Private sklearn helper: the forest's normalizing path length
+        from sklearn.ensemble._iforest import _average_path_length
+
+        self.num_features = model.n_features_in_
+        self.offset = float(model.offset_)
+        self.num_trees = len(model.estimators_)
+        self.denominator = self.num_trees * float(_average_path_length([model._max_samples])[0])
+
+        subsample_features = model._max_features != self.num_features
+        features, thresholds, children, missing_left, path_lengths, roots = [], [], [], [], [], []
+        start, max_depth = 0, 0
+        for tree_index, (estimator, tree_features) in enumerate(zip(model.estimators_, model.estimators_features_)):
+            tree = estimator.tree_
+            nodes = tree.__getstate__()["nodes"]
+            is_leaf = nodes["left_child"] < 0
+            node_ids = np.arange(tree.node_count)
+
+            feature = np.where(is_leaf, 0, nodes["feature"])
+            if subsample_features:
+                feature = np.asarray(tree_features)[feature]
+            features.append(feature)
+            thresholds.append(nodes["threshold"])
+            missing_left.append(nodes["missing_go_to_left"].astype(bool) if "missing_go_to_left" in nodes.dtype.names
+                                else np.zeros(tree.node_count, dtype=bool))
+
+            # Children as global node ids, interleaved (left, right); leaves loop to themselves
+            pair = np.empty((tree.node_count, 2), dtype=np.int64)
+            pair[:, 0] = np.where(is_leaf, node_ids, nodes["left_child"]) + start
+            pair[:, 1] = np.where(is_leaf, node_ids, nodes["right_child"]) + start
+            children.append(pair.ravel())
+
+            # Exactly the per-leaf expression sklearn adds up
+            path_lengths.append(
+                model._decision_path_lengths[tree_index]
+                + model._average_path_length_per_tree[tree_index]
+                - 1.0
+            )
+            roots.append(start)
+            start += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        # int32 indices halve the memory traffic of the gathers
+        self.feature = np.concatenate(features).astype(np.int32)
+        self.threshold = np.concatenate(thresholds)
+        self.children = np.concatenate(children).astype(np.int32)
+        self.missing_left = np.concatenate(missing_left)
+        self.path_length = np.concatenate(path_lengths)
+        self.tree_root = np.array(roots, dtype=np.int32)
+        self.max_depth = max_depth
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Packed node arrays, for ``from_arrays``"""
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "children": self.children,
+            "missing_left": self.missing_left,
+            "path_length": self.path_length,
+            "tree_root": self.tree_root,
+        }
+
+    def to_scalars(self) -> Dict[str, Any]:
+        """Scalar parameters, for ``from_arrays``"""
+        return {
+            "num_features": self.num_features,
+            "offset": self.offset,
+            "denominator": self.denominator,
+            "max_depth": self.max_depth,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], num_features: int, offset: float,
+                    denominator: float, max_depth: int) -> "CompiledIsolationForest":
+        """
+        Rebuild a forest from ``to_arrays`` / ``to_scalars`` output, without sklearn
+
+        The arrays are used as given (they may be read-only memory maps).
+        """
+        forest = cls.__new__(cls)
+        for name in ("feature", "threshold", "children", "missing_left", "path_length", "tree_root"):
+            setattr(forest, name, arrays[name])
+        forest.num_features = num_features
+        forest.offset = offset
+        forest.num_trees = len(forest.tree_root)
+        forest.denominator = denominator
+        forest.max_depth = max_depth
+        return forest
+
+    def _path_lengths_block(self, X: np.ndarray) -> np.ndarray:
+        """Summed path lengths for one block of rows"""
+        num_rows = len(X)
+        values = X.ravel()
+        has_nan = bool(np.isnan(values).any())
+        # Node states laid out (tree, row) so the final sum runs over trees in order
+        node = np.repeat(self.tree_root, num_rows)
+        row_start = np.tile(np.arange(num_rows, dtype=np.int32) * self.num_features, self.num_trees)
+        for _ in range(self.max_depth):
+            index = self.feature.take(node)
+            index += row_start
+            value = values.take(index)
+            threshold = self.threshold.take(node)
+            if has_nan:
+                # NaN fails every comparison and follows missing_go_to_left
+                go_right = ~(value <= threshold) & ~(np.isnan(value) & self.missing_left.take(node))
+            else:
+                go_right = value > threshold
+            node += node
+            node += go_right
+            node = self.children.take(node)
+        # cumsum adds strictly in tree order (sum would go pairwise on a single row)
+        return self.path_length.take(node).reshape(self.num_trees, num_rows).cumsum(axis=0)[-1]
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        """
+        Equivalent of ``IsolationForest.score_samples`` (lower is more abnormal)
+
+        Args:
+            X: Array of shape (N, num_features) in the model's column order
+
+        Returns:
+            Array of N scores
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.num_features:
+            raise ValueError(f"Expected an array of shape (N, {self.num_features}), got {X.shape}")
+        X = X.astype(np.float64)
+        if len(X) <= EVAL_BLOCK_ROWS:
+            depths = self._path_lengths_block(X)
+        else:
+            depths = np.concatenate([
+                self._path_lengths_block(X[start:start + EVAL_BLOCK_ROWS])
+                for start in range(0, len(X), EVAL_BLOCK_ROWS)
+            ])
+        if self.denominator == 0:
+            return -np.ones_like(depths)
+        return -(2 ** (-(depths / self.denominator)))
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """Equivalent of ``IsolationForest.decision_function`` (negative means anomaly)"""
+        return self.score_samples(X) - self.offset
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Equivalent of ``IsolationForest.predict``: -1 for anomalies, 1 for inliers"""
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+
+def compile_isolation_forest(model) -> Optional[CompiledIsolationForest]:
+    """
+    Compile a fitted IsolationForest, or return None when it cannot be compiled
+
+    Args:
+        model: Fitted ``sklearn.ensemble.IsolationForest``
+
+    Returns:
+        Compiled forest, or None (callers keep using the sklearn model)
+    """
+    try:
+        return CompiledIsolationForest(model)
+    except (AttributeError, KeyError, ImportError) as e:
+        logger.warning(f"Isolation forest compilation skipped: {str(e)}")
+        return None
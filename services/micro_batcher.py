@@ -0,0 +1,225 @@
+"""
+Asynchronous Micro-Batching Scheduler
+Collects concurrent scoring requests into one vectorized model call
+"""
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.inference_executor import ExecutorSaturatedError, InferenceExecutor
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class Histogram:
+    """Counts of observed values in fixed buckets (each bucket counts values <= its bound)"""
+
+    def __init__(self, bounds: Sequence[float]):
+        """
+        Args:
+            bounds: Increasing bucket upper bounds; larger values go to "+Inf"
+        """
+        self.bounds = tuple(bounds)
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+    def observe(self, value: float):
+        """Record one value"""
+        index = int(np.searchsorted(self.bounds, value, side="left"))
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+            self._max = max(self._max, value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Bucket counts plus count, sum, mean and max of the observed values"""
+        with self._lock:
+            labels = [f"<={bound:g}" for bound in self.bounds] + ["+Inf"]
+            return {
+                "buckets": dict(zip(labels, self._counts)),
+                "count": self._count,
+                "sum": self._sum,
+                "mean": self._sum / self._count if self._count else 0.0,
+                "max": self._max
+            }
+
+
+class MicroBatcher:
+    """
+    Scores concurrent submissions together on the running event loop
+
+    Each submission is a (k, num_features) matrix. A background task takes
+    the first waiting submission, keeps collecting until ``max_batch_rows``
+    rows are queued or ``max_wait_us`` microseconds have passed, stacks the
+    rows, calls ``score_fn`` once and hands every submission its own slice
+    of each output array.
+
+    With an executor, up to one batch per executor worker is scored at a
+    time; while all are busy, new submissions wait and form the next batch.
+    """
+
+    def __init__(self, score_fn: Callable[[np.ndarray], Tuple[np.ndarray, ...]],
+                 max_batch_rows: int, max_wait_us: int, max_queue: int = 0,
+                 executor: Optional[InferenceExecutor] = None):
+        """
+        Args:
+            score_fn: Scores an (N, num_features) matrix, returning a tuple of length-N arrays
+            max_batch_rows: Rows at which a batch is scored without waiting further
+            max_wait_us: Longest time the first submission of a batch waits for company
+            max_queue: Waiting submissions before new ones are refused; 0 for no limit
+            executor: Runs score_fn off the event loop, one batch per worker at a time
+        """
+        self.score_fn = score_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_us / 1e6
+        self.max_queue = max_queue
+        self.executor = executor
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_depths = Histogram(QUEUE_DEPTH_BUCKETS)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._scoring = set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the batching task on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.executor.workers if self.executor is not None else 1)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Micro-batcher started (max {self.max_batch_rows} rows, "
+                    f"max wait {self.max_wait * 1e6:.0f} µs)")
+
+    async def stop(self):
+        """Stop batching once the batches being scored finish; queued submissions fail with RuntimeError"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._scoring:
+            await asyncio.gather(*self._scoring, return_exceptions=True)
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    async def submit(self, features: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Queue rows for scoring and wait for their results
+
+        Args:
+            features: Array of shape (k, num_features); it must not be modified until this returns
+
+        Returns:
+            score_fn's output arrays, restricted to these k rows
+
+        Raises:
+            ExecutorSaturatedError: If max_queue submissions are already waiting,
+                or the executor refuses the batch
+        """
+        if not self.running:
+            raise RuntimeError("Micro-batcher is not running")
+        if self.max_queue and self._queue.qsize() >= self.max_queue:
+            raise ExecutorSaturatedError(f"Micro-batch queue is full ({self._queue.qsize()} waiting)")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((features, future))
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        """Settings, current queue length and the batch-size / queue-depth histograms"""
+        return {
+            "running": self.running,
+            "max_batch_rows": self.max_batch_rows,
+            "max_wait_us": round(self.max_wait * 1e6),
+            "max_queue": self.max_queue,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches_scoring": len(self._scoring),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_depth": self.queue_depths.snapshot()
+        }
+
+    async def _collect(self) -> List[Tuple[np.ndarray, asyncio.Future]]:
+        """Wait for one submission, then gather more until the batch is full or the wait is over"""
+        batch = [await self._queue.get()]
+        # Submissions waiting when the batch opens, the one just taken included
+        self.queue_depths.observe(self._queue.qsize() + 1)
+        rows = len(batch[0][0])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while rows < self.max_batch_rows:
+            if self._queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    async def _run(self):
+        """Batching loop: claim a scoring slot, collect a batch, score it in the background"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = loop.create_task(self._score(batch))
+            self._scoring.add(task)
+            task.add_done_callback(self._scored)
+
+    def _scored(self, task: asyncio.Task):
+        """Free the scoring slot of a finished batch"""
+        self._scoring.discard(task)
+        self._slots.release()
+
+    async def _score(self, batch: List[Tuple[np.ndarray, asyncio.Future]]):
+        """Score one collected batch and resolve its futures"""
+        features = batch[0][0] if len(batch) == 1 else np.concatenate([item[0] for item in batch])
+        self.batch_sizes.observe(len(features))
+        try:
+            if self.executor is not None:
+                outputs = await self.executor.run(self.score_fn, features)
+            else:
+                outputs = self.score_fn(features)
+        except Exception as e:
+            if not isinstance(e, ExecutorSaturatedError):
+                logger.error(f"Micro-batch of {len(features)} rows failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        start = 0
+        for rows, future in batch:
+            end = start + len(rows)
+            if not future.done():  # The caller may have gone away
+                future.set_result(tuple(output[start:end] for output in outputs))
+            start = end
@@ -2,31 +2,285 @@
 Production ML Inference Service
 Handles model loading, predictions, and business logic
 """
+import functools
 import joblib
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, NamedTuple, Sequence, Tuple, Optional, Union
 import logging
+import os
+import threading
+import time
+import warnings
 from datetime import datetime
 
 from config.settings import settings
-from services.feature_service import feature_service
-from services.rule_engine import rule_engine
+from services.feature_service import feature_service, MODEL_FEATURES
+from services.rule_engine import rule_engine, RuleScores, RuleSet
 from services.feature_generator import feature_generator
+from services.columnar import user_friendly_columns
+from services.model_runner import ModelRunner
+from services.model_artifacts import load_model_artifact, artifact_path
+from services.model_registry import model_registry, DEFAULT_VERSION
+from services.micro_batcher import MicroBatcher
+from services.inference_executor import InferenceExecutor, ExecutorSaturatedError
 
 logger = logging.getLogger(__name__)
 
+# Model inputs are plain arrays, but the sklearn anomaly model was fitted on a DataFrame
+warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+
+
+class ModelBundle(NamedTuple):
+    """One loaded model version, swapped in and out as a unit"""
+    version: str
+    fraud_model: object
+    anomaly_model: object
+    runner: ModelRunner
+    loaded_at: str
+
+
+class LazyResults(Sequence):
+    """
+    A read-only list of result dictionaries that are built on first access
+    
+    Scoring is done up front; turning the scored columns into one dictionary
+    per row is deferred until the results are read (len() does not count).
+    Pickles as a plain list, so process pool workers build the rows before
+    sending them back.
+    """
+    
+    def __init__(self, size: int, build: Callable[[], List[Dict]]):
+        """
+        Args:
+            size: Number of results
+            build: Returns the list of result dictionaries; called at most once
+        """
+        self._size = size
+        self._build = build
+        self._rows: Optional[List[Dict]] = None
+    
+    def _materialize(self) -> List[Dict]:
+        if self._rows is None:
+            self._rows = self._build()
+            self._build = None
+        return self._rows
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __getitem__(self, index):
+        return self._materialize()[index]
+    
+    def __iter__(self):
+        return iter(self._materialize())
+    
+    def __reduce__(self):
+        return list, (self._materialize(),)
+
 
 class MLInferenceService:
     """Production ML service for fraud detection"""
     
     def __init__(self):
-        self.fraud_model = self._load_model(settings.FRAUD_MODEL_PATH, "fraud")
-        self.anomaly_model = self._load_model(settings.ANOMALY_MODEL_PATH, "anomaly")
         self.default_threshold = settings.DEFAULT_FRAUD_THRESHOLD
+        
+        # Active model version; requests read it once, swaps replace it in one assignment
+        self.registry = model_registry
+        self._swap_lock = threading.Lock()
+        self._previous: Optional[ModelBundle] = None
+        self._registry_mtime = self.registry.state_mtime()
+        self._registry_checked = time.monotonic()
+        # Process running the API's registry and rules watchers (None outside the API)
+        self.watcher_pid: Optional[int] = None
+        version = self.registry.active_version()
+        try:
+            self.bundle = self._load_bundle(version)
+        except RuntimeError:
+            if version == DEFAULT_VERSION:
+                raise
+            logger.error(f"Model version {version} failed to load, serving {DEFAULT_VERSION}")
+            self.bundle = self._load_bundle(DEFAULT_VERSION)
+        
+        # Bounded pool for model calls made from the event loop (started by the API)
+        self.executor = InferenceExecutor(
+            settings.INFERENCE_EXECUTOR, settings.INFERENCE_WORKERS, settings.INFERENCE_MAX_PENDING
+        )
+        
+        # Concurrent async single-row requests are scored together (started by the API)
+        self.batcher = MicroBatcher(
+            score_features, settings.MICRO_BATCH_MAX_ROWS, settings.MICRO_BATCH_MAX_WAIT_US,
+            max_queue=settings.MICRO_BATCH_MAX_QUEUE, executor=self.executor
+        )
+    
+    @property
+    def fraud_model(self) -> object:
+        return self.bundle.fraud_model
+    
+    @property
+    def anomaly_model(self) -> object:
+        return self.bundle.anomaly_model
+    
+    @property
+    def runner(self) -> ModelRunner:
+        return self.bundle.runner
+    
+    @property
+    def model_version(self) -> str:
+        return self.bundle.version
+    
+    def _load_bundle(self, version: str) -> ModelBundle:
+        """
+        Load and warm up one model version
+        
+        Args:
+            version: Registry version name
+            
+        Returns:
+            Loaded bundle (not yet active)
+            
+        Raises:
+            KeyError: If the version does not exist
+            RuntimeError: If the models cannot be loaded or fail the warm-up
+        """
+        fraud_path, anomaly_path = self.registry.model_paths(version)
+        fraud_model = self._load_model(fraud_path, "fraud")
+        anomaly_model = self._load_model(anomaly_path, "anomaly")
+        
+        # Both models scored in one pass over each feature matrix
+        runner = ModelRunner(fraud_model, anomaly_model)
+        self._warm_up(runner, version)
+        logger.info(f"Model version {version} loaded")
+        return ModelBundle(version, fraud_model, anomaly_model, runner, datetime.utcnow().isoformat())
+    
+    def _warm_up(self, runner: ModelRunner, version: str):
+        """Score a few synthetic rows through both paths; refuse models that fail or return garbage"""
+        rows = np.zeros((32, len(MODEL_FEATURES)))
+        rows[:, 0] = np.linspace(0, 172800, len(rows))
+        rows[:, -2] = np.log1p(np.linspace(0, 5000, len(rows)))
+        try:
+            fraud_probs, anomaly_scores, _ = runner.run(rows)
+            fraud_prob, anomaly_score, _ = runner.run_single(rows[:1])
+        except Exception as e:
+            raise RuntimeError(f"Model version {version} failed its warm-up: {str(e)}")
+        values = np.concatenate([fraud_probs, anomaly_scores, [fraud_prob, anomaly_score]])
+        if not np.isfinite(values).all() or not ((fraud_probs >= 0) & (fraud_probs <= 1)).all():
+            raise RuntimeError(f"Model version {version} returned invalid scores in its warm-up")
+    
+    def activate_version(self, version: str) -> ModelBundle:
+        """
+        Load a version, warm it up and make it the active one
+        
+        Requests already running finish on the previous version. The change
+        is recorded in the registry before the swap, so other processes
+        follow it and this one never serves a version the registry does not
+        record.
+        
+        Args:
+            version: Registry version name
+            
+        Returns:
+            The now active bundle
+            
+        Raises:
+            KeyError: If the version does not exist
+            RuntimeError: If it cannot be loaded or fails the warm-up (nothing changes)
+            OSError: If the registry cannot be written (nothing changes)
+        """
+        with self._swap_lock:
+            bundle = self._load_bundle(version) if version != self.bundle.version else self.bundle
+            self.registry.record_activation(version)
+            self._swap(bundle)
+        return bundle
+    
+    def rollback(self) -> ModelBundle:
+        """
+        Return to the previously active version in one call
+        
+        Returns:
+            The now active bundle
+            
+        The target is loaded first and the rollback recorded only if it is
+        still the registry's previous version; the swap follows the write,
+        so this process serves exactly the version the registry records.
+        
+        Raises:
+            ValueError: If there is no earlier version, or another process
+                changed the registry meanwhile (nothing changes)
+            RuntimeError: If it cannot be loaded (the registry is left unchanged)
+            OSError: If the registry cannot be written (nothing changes)
+        """
+        with self._swap_lock:
+            history = self.registry.state()["history"]
+            if len(history) < 2:
+                raise ValueError("No earlier model version to roll back to")
+            version = history[-2]
+            if self._previous is not None and self._previous.version == version:
+                bundle = self._previous
+            else:
+                bundle = self._load_bundle(version)
+            self.registry.record_rollback(expected=version)
+            self._swap(bundle)
+        return bundle
+    
+    def sync_with_registry(self, force: bool = False) -> bool:
+        """
+        Follow version changes recorded by other processes
+        
+        Args:
+            force: Check even if the registry state file looks unchanged
+            
+        Returns:
+            True if a different version was swapped in
+        """
+        self._registry_checked = time.monotonic()
+        mtime = self.registry.state_mtime()
+        if not force and mtime == self._registry_mtime:
+            return False
+        with self._swap_lock:
+            self._registry_mtime = mtime
+            version = self.registry.active_version()
+            if version == self.bundle.version:
+                return False
+            try:
+                bundle = self._load_bundle(version)
+            except (KeyError, RuntimeError) as e:
+                logger.error(f"Keeping model version {self.bundle.version}: {str(e)}")
+                return False
+            self._swap(bundle)
+        return True
+    
+    def sync_with_registry_if_due(self):
+        """sync_with_registry at most once per MODEL_REGISTRY_POLL_SECONDS (for pool worker processes)"""
+        interval = settings.MODEL_REGISTRY_POLL_SECONDS
+        if interval > 0 and time.monotonic() - self._registry_checked >= interval:
+            self.sync_with_registry()
+    
+    def _swap(self, bundle: ModelBundle):
+        """Make bundle the active one (a single reference assignment)"""
+        if bundle is self.bundle:
+            return
+        previous, self.bundle = self.bundle, bundle
+        released, self._previous = self._previous, previous
+        logger.info(f"Model version {previous.version} -> {bundle.version}")
+        
+        # Only the active and previous bundles are kept: stop the released runner's threads
+        if released is not None and released is not bundle and released is not previous:
+            released.runner.close()
     
     def _load_model(self, model_path: str, model_type: str) -> object:
-        """Load model with error handling"""
+        """
+        Load model with error handling
+        
+        With the compiled backend, a memory-mapped artifact exported from the
+        current pickle (services.model_artifacts) is preferred over the pickle.
+        """
+        backend = settings.FRAUD_MODEL_BACKEND if model_type == "fraud" else settings.ANOMALY_MODEL_BACKEND
+        if backend == "compiled":
+            model = load_model_artifact(model_path)
+            if model is not None:
+                logger.info(f"Successfully loaded {model_type} model from {artifact_path(model_path)} (memory-mapped)")
+                return model
         try:
             model = joblib.load(model_path)
             logger.info(f"Successfully loaded {model_type} model from {model_path}")
@@ -96,6 +350,116 @@ class MLInferenceService:
         anomaly_score += np.random.normal(0, 0.1)
         
         return anomaly_score > 0.5
+    
+    def predict_batch_user_friendly(self, transactions: List[Dict],
+                                    threshold: Optional[float] = None) -> LazyResults:
+        """
+        Predict fraud for multiple user-friendly transactions with hybrid decision logic
+        
+        Rule scoring, ML probability, anomaly simulation and the blocking decision
+        are evaluated over NumPy columns for the whole batch at once. The
+        per-row result dictionaries are only assembled when the results are
+        first read (see LazyResults).
+        
+        Args:
+            transactions: List of transaction dictionaries with user-friendly fields
+            threshold: Custom fraud threshold (optional)
+            
+        Returns:
+            Sequence of prediction results, in the form predict_single_user_friendly returns them
+        """
+        if len(transactions) > settings.MAX_BATCH_SIZE:
+            raise ValueError(f"Batch size exceeds maximum allowed ({settings.MAX_BATCH_SIZE})")
+        
+        threshold = threshold or self.default_threshold
+        columns = user_friendly_columns(transactions)
+        
+        # Steps 1-4 of predict_single_user_friendly, evaluated column-wise
+        rules = rule_engine.rules
+        scores = rules.score_columns(columns)
+        fraud_probs = feature_generator.generate_realistic_ml_probabilities_batch(columns)
+        anomaly_flags = self._simulate_anomaly_detection_batch(columns, fraud_probs)
+        should_block, block_reasons = rule_engine.should_block_transactions(
+            scores.score, fraud_probs, anomaly_flags, threshold
+        )
+        
+        combined_risk_scores = self._calculate_combined_risk_scores_batch(
+            fraud_probs, anomaly_flags, scores.score
+        )
+        confidences = self._calculate_hybrid_confidences_batch(
+            fraud_probs, anomaly_flags, scores.score, threshold
+        )
+        
+        results = LazyResults(len(transactions), functools.partial(
+            self._hybrid_batch_results, rules, scores, [columns[rule_input.field] for rule_input in rules.inputs],
+            threshold, fraud_probs, anomaly_flags, should_block, block_reasons, combined_risk_scores, confidences
+        ))
+        
+        logger.info(f"Processed hybrid batch of {len(transactions)} transactions "
+                    f"({int(np.count_nonzero(should_block))} flagged as fraud)")
+        return results
+    
+    def _hybrid_batch_results(self, rules: RuleSet, scores: RuleScores, values: List[np.ndarray], threshold: float,
+                              fraud_probs: np.ndarray, anomaly_flags: np.ndarray, should_block: np.ndarray,
+                              block_reasons: np.ndarray, combined_risk_scores: np.ndarray,
+                              confidences: np.ndarray) -> List[Dict]:
+        """Result dictionaries of predict_batch_user_friendly, with the text fields rendered column-wise"""
+        risk_factors = rules.render_factor_columns(scores.factor_mask, values)
+        detail_keys, detail_columns = rules.detail_columns(scores)
+        detail_keys += ['total_risk_score', 'risk_level', 'risk_factors', 'risk_factor_count']
+        rule_risk_scores = scores.score.tolist()
+        detail_columns += [rule_risk_scores, scores.risk_level.tolist(), risk_factors, map(len, risk_factors)]
+        rule_details = [dict(zip(detail_keys, row)) for row in zip(*detail_columns)]
+        explanations = self._generate_hybrid_explanations_batch(
+            fraud_probs, anomaly_flags, threshold, scores.score, risk_factors, should_block, block_reasons
+        )
+        
+        timestamp = datetime.utcnow().isoformat()
+        rounded_probs = [round(fraud_prob, 4) for fraud_prob in fraud_probs.tolist()]
+        final_decisions = np.where(should_block, "FRAUD", "LEGITIMATE").tolist()
+        ml_decisions = np.where(fraud_probs >= threshold, "FRAUD", "LEGITIMATE").tolist()
+        return [
+            {
+                "fraud_probability": rounded_prob,
+                "anomaly_detected": anomaly_flag,
+                "rule_risk_score": rule_risk_score,
+                "rule_risk_level": details['risk_level'],
+                "rule_risk_factors": details['risk_factors'],
+                "combined_risk_score": combined_risk_score,
+                "threshold_used": threshold,
+                "final_decision": final_decision,
+                "decision_reason": block_reason,
+                "confidence": confidence,
+                "explanation": explanation,
+                "ml_analysis": {
+                    "fraud_probability": rounded_prob,
+                    "anomaly_detected": anomaly_flag,
+                    "ml_decision": ml_decision
+                },
+                "rule_analysis": details,
+                "timestamp": timestamp,
+                "transaction_id": transaction_id
+            }
+            for transaction_id, (rounded_prob, anomaly_flag, rule_risk_score, details, final_decision,
+                                 block_reason, combined_risk_score, confidence, explanation, ml_decision)
+            in enumerate(zip(rounded_probs, anomaly_flags.tolist(), rule_risk_scores, rule_details,
+                             final_decisions, block_reasons.tolist(), combined_risk_scores.tolist(),
+                             confidences.tolist(), explanations, ml_decisions), start=1)
+        ]
+    
+    def _simulate_anomaly_detection_batch(self, columns: Dict[str, np.ndarray], fraud_probs: np.ndarray) -> np.ndarray:
+        """Vectorized equivalent of _simulate_anomaly_detection"""
+        anomaly_score = (
+            0.3 * (columns['Amount'] > 100000)
+            + 0.2 * (columns['daily_transactions'] > 30)
+            + 0.2 * (columns['customer_age_days'] < 7)
+            + 0.3 * (fraud_probs > 0.7)
+        )
+        
+        # Add randomness
+        anomaly_score = anomaly_score + np.random.normal(0, 0.1, size=len(fraud_probs))
+        
+        return anomaly_score > 0.5
 
     def predict_single(self, transaction: Dict, threshold: Optional[float] = None) -> Dict:
         """
@@ -109,20 +473,134 @@ class MLInferenceService:
             Prediction result dictionary
         """
         threshold = threshold or self.default_threshold
+        bundle = self.bundle
         
-        # Validate and process features
-        clean_transaction = feature_service.validate_transaction_features(transaction)
-        processed_df = feature_service.process_single_transaction(clean_transaction)
+        # Validate and process features straight into a (1, 31) array
+        features = feature_service.process_single_array(transaction)
         
         # Get predictions
-        fraud_prob = self._get_fraud_probability(processed_df)
-        anomaly_flag = self._get_anomaly_flag(processed_df)
+        fraud_prob, anomaly_flag = self._score_single(bundle.runner, features)
         
         # Business decision logic
         decision_result = self._make_fraud_decision(fraud_prob, anomaly_flag, threshold)
+        decision_result["model_version"] = bundle.version
         
         # Log prediction for monitoring
-        self._log_prediction(clean_transaction, decision_result)
+        self._log_prediction(transaction, decision_result)
+        
+        return decision_result
+    
+    def predict_packed(self, time_value: float, amount: float, v: Union[List[float], bytes],
+                       threshold: Optional[float] = None) -> Dict:
+        """
+        Predict fraud for a single transaction with V1-V28 packed into one vector
+        
+        Args:
+            time_value: Transaction time
+            amount: Transaction amount
+            v: 28 floats, or 112 bytes holding 28 little-endian float32 values
+            threshold: Custom fraud threshold (optional)
+            
+        Returns:
+            Prediction result dictionary
+            
+        Raises:
+            ValueError: If v does not hold exactly 28 finite values
+        """
+        threshold = threshold or self.default_threshold
+        bundle = self.bundle
+        
+        features = feature_service.process_packed_array(time_value, amount, v)
+        fraud_prob, anomaly_flag = self._score_single(bundle.runner, features)
+        
+        decision_result = self._make_fraud_decision(fraud_prob, anomaly_flag, threshold)
+        decision_result["model_version"] = bundle.version
+        self._log_prediction({"Amount": amount}, decision_result)
+        
+        return decision_result
+    
+    async def run_in_executor(self, method: str, *args):
+        """
+        Call one of this service's methods on the inference executor
+        
+        Args:
+            method: Method name, e.g. "predict_batch"
+            *args: Method arguments
+            
+        Returns:
+            The method's return value
+            
+        Raises:
+            ExecutorSaturatedError: If the executor is refusing new jobs
+        """
+        return await self.executor.run(call_service_method, method, *args)
+    
+    async def predict_single_async(self, transaction: Dict, threshold: Optional[float] = None) -> Dict:
+        """
+        Predict fraud for a single transaction through the micro-batcher
+        
+        Concurrent calls are scored as one batch on the inference executor.
+        Runs predict_single on the executor when the batcher is not running.
+        
+        Args:
+            transaction: Transaction dictionary
+            threshold: Custom fraud threshold (optional)
+            
+        Returns:
+            Prediction result dictionary
+            
+        Raises:
+            ExecutorSaturatedError: If the batch queue or the executor is full
+        """
+        if not self.batcher.running:
+            return await self.run_in_executor("predict_single", transaction, threshold)
+        
+        # Copy: the per-thread row buffer is reused by the next request
+        features = feature_service.process_single_array(transaction).copy()
+        return await self._predict_row_async(features, transaction, threshold)
+    
+    async def predict_packed_async(self, time_value: float, amount: float, v: Union[List[float], bytes],
+                                   threshold: Optional[float] = None) -> Dict:
+        """
+        predict_single_async for a transaction with V1-V28 packed into one vector
+        
+        Args:
+            time_value: Transaction time
+            amount: Transaction amount
+            v: 28 floats, or 112 bytes holding 28 little-endian float32 values
+            threshold: Custom fraud threshold (optional)
+            
+        Returns:
+            Prediction result dictionary
+            
+        Raises:
+            ValueError: If v does not hold exactly 28 finite values
+            ExecutorSaturatedError: If the batch queue or the executor is full
+        """
+        if not self.batcher.running:
+            return await self.run_in_executor("predict_packed", time_value, amount, v, threshold)
+        
+        # Decoded straight into a row of its own, which the batcher keeps
+        features = feature_service.process_packed_array(time_value, amount, v, out=np.empty((1, len(MODEL_FEATURES))))
+        return await self._predict_row_async(features, {"Amount": amount}, threshold)
+    
+    async def _predict_row_async(self, features: np.ndarray, transaction: Dict,
+                                 threshold: Optional[float]) -> Dict:
+        """Score one (1, 31) row through the micro-batcher"""
+        threshold = threshold or self.default_threshold
+        
+        try:
+            fraud_probs, _, anomaly_flags, versions = await self.batcher.submit(features)
+            fraud_prob, anomaly_flag, version = float(fraud_probs[0]), bool(anomaly_flags[0]), versions[0]
+        except ExecutorSaturatedError:
+            raise
+        except Exception as e:
+            logger.error(f"Model prediction failed: {str(e)}")
+            fraud_prob, anomaly_flag, version = 0.5, False, None  # Conservative fallback
+        
+        decision_result = self._make_fraud_decision(fraud_prob, anomaly_flag, threshold)
+        decision_result["model_version"] = version
+        self._log_prediction(transaction, decision_result)
         
         return decision_result
     
@@ -141,17 +619,19 @@ class MLInferenceService:
             raise ValueError(f"Batch size exceeds maximum allowed ({settings.MAX_BATCH_SIZE})")
         
         threshold = threshold or self.default_threshold
+        bundle = self.bundle
         results = []
         
         # Process transactions in batch for efficiency
         clean_transactions = [
             feature_service.validate_transaction_features(t) for t in transactions
         ]
-        processed_df = feature_service.process_batch_transactions(clean_transactions)
+        # Columns in model order: validation appends missing V features at the end
+        processed_df = feature_service.process_batch_transactions(clean_transactions)[MODEL_FEATURES]
         
         # Get batch predictions
-        fraud_probs = self._get_fraud_probabilities_batch(processed_df)
-        anomaly_flags = self._get_anomaly_flags_batch(processed_df)
+        features = processed_df.to_numpy(dtype=np.float64)
+        fraud_probs, anomaly_flags = self._score_batch(bundle.runner, features)
         
         # Generate results
         for i, (transaction, fraud_prob, anomaly_flag) in enumerate(
@@ -159,46 +639,106 @@ class MLInferenceService:
         ):
             decision_result = self._make_fraud_decision(fraud_prob, anomaly_flag, threshold)
             decision_result["transaction_id"] = i + 1
+            decision_result["model_version"] = bundle.version
             results.append(decision_result)
         
         logger.info(f"Processed batch of {len(transactions)} transactions")
         return results
     
-    def _get_fraud_probability(self, df: pd.DataFrame) -> float:
-        """Get fraud probability from LightGBM model"""
-        try:
-            prob = self.fraud_model.predict_proba(df)[0][1]
-            return float(prob)
-        except Exception as e:
-            logger.error(f"Fraud model prediction failed: {str(e)}")
-            return 0.5  # Conservative fallback
+    def predict_arrays(self, times: np.ndarray, amount: np.ndarray, v_features: np.ndarray,
+                       threshold: Optional[float] = None) -> List[Dict]:
+        """
+        Predict fraud for transactions given as columns
+        
+        Same results as predict_batch without building per-row dictionaries
+        or a DataFrame on the way in, and without the MAX_BATCH_SIZE limit
+        (callers stream large inputs through in chunks).
+        
+        Args:
+            times: Transaction times, shape (N,)
+            amount: Transaction amounts, shape (N,)
+            v_features: V1-V28 values, shape (N, 28)
+            threshold: Custom fraud threshold (optional)
+        
+        Returns:
+            List of prediction results, in input order
+        """
+        threshold = threshold or self.default_threshold
+        bundle = self.bundle
+        
+        # Same bounds as validate_transaction_features
+        features = feature_service.process_arrays(
+            np.maximum(times, 0.0), np.maximum(amount, 0.0), v_features
+        )
+        fraud_probs, anomaly_flags = self._score_batch(bundle.runner, features)
+        
+        results = []
+        for fraud_prob, anomaly_flag in zip(fraud_probs, anomaly_flags):
+            decision_result = self._make_fraud_decision(fraud_prob, anomaly_flag, threshold)
+            decision_result["model_version"] = bundle.version
+            results.append(decision_result)
+        return results
     
-    def _get_anomaly_flag(self, df: pd.DataFrame) -> bool:
-        """Get anomaly flag from Isolation Forest"""
+    def score_columns(self, times: np.ndarray, amount: np.ndarray, v_features,
+                      threshold: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        Columnar equivalent of predict_arrays for bulk scoring
+        
+        Decisions are computed on whole columns; the per-row explanation and
+        timestamp are left out.
+        
+        Args:
+            times: Transaction times, shape (N,)
+            amount: Transaction amounts, shape (N,)
+            v_features: V1-V28 values, shape (N, 28), or 28 columns of shape (N,)
+            threshold: Custom fraud threshold (optional)
+            
+        Returns:
+            Dictionary of (N,) arrays: fraud_probability, anomaly_detected,
+            risk_score, final_decision and confidence; plus the scalars
+            threshold_used and model_version
+        """
+        threshold = threshold or self.default_threshold
+        bundle = self.bundle
+        
+        features = feature_service.process_arrays(
+            np.maximum(times, 0.0), np.maximum(amount, 0.0), v_features
+        )
         try:
-            prediction = self.anomaly_model.predict(df)[0]
-            return prediction == -1  # -1 indicates anomaly
+            fraud_probs, _, anomaly_flags = bundle.runner.run(features)
         except Exception as e:
-            logger.error(f"Anomaly model prediction failed: {str(e)}")
-            return False  # Conservative fallback
+            logger.error(f"Batch model prediction failed: {str(e)}")
+            fraud_probs = np.full(len(features), 0.5)  # Conservative fallback
+            anomaly_flags = np.zeros(len(features), dtype=bool)
+        
+        is_fraud = (fraud_probs >= threshold) | anomaly_flags
+        return {
+            "fraud_probability": np.round(fraud_probs, 4),
+            "anomaly_detected": anomaly_flags,
+            "risk_score": self._calculate_risk_scores_batch(fraud_probs, anomaly_flags),
+            "final_decision": np.where(is_fraud, "FRAUD", "LEGITIMATE"),
+            "confidence": self._calculate_confidences_batch(fraud_probs, anomaly_flags),
+            "threshold_used": threshold,
+            "model_version": bundle.version
+        }
     
-    def _get_fraud_probabilities_batch(self, df: pd.DataFrame) -> List[float]:
-        """Get fraud probabilities for batch"""
+    def _score_single(self, runner: ModelRunner, features: np.ndarray) -> Tuple[float, bool]:
+        """Get fraud probability and anomaly flag for one (1, 31) feature row"""
         try:
-            probs = self.fraud_model.predict_proba(df)[:, 1]
-            return [float(p) for p in probs]
+            fraud_prob, _, anomaly_flag = runner.run_single(features)
+            return fraud_prob, anomaly_flag
         except Exception as e:
-            logger.error(f"Batch fraud prediction failed: {str(e)}")
-            return [0.5] * len(df)
+            logger.error(f"Model prediction failed: {str(e)}")
+            return 0.5, False  # Conservative fallback
     
-    def _get_anomaly_flags_batch(self, df: pd.DataFrame) -> List[bool]:
-        """Get anomaly flags for batch"""
+    def _score_batch(self, runner: ModelRunner, features: np.ndarray) -> Tuple[List[float], List[bool]]:
+        """Get fraud probabilities and anomaly flags for an (N, 31) feature batch"""
         try:
-            predictions = self.anomaly_model.predict(df)
-            return [pred == -1 for pred in predictions]
+            fraud_probs, _, anomaly_flags = runner.run(features)
+            return fraud_probs.tolist(), anomaly_flags.tolist()
         except Exception as e:
-            logger.error(f"Batch anomaly prediction failed: {str(e)}")
-            return [False] * len(df)
+            logger.error(f"Batch model prediction failed: {str(e)}")
+            return [0.5] * len(features), [False] * len(features)
     
     def _make_hybrid_fraud_decision(self, fraud_prob: float, anomaly_flag: bool, threshold: float,
                                   rule_risk_score: int, rule_details: Dict, should_block: bool, 
@@ -280,6 +820,16 @@ class MLInferenceService:
         else:
             return "LOW"
     
+    def _calculate_combined_risk_scores_batch(self, fraud_probs: np.ndarray, anomaly_flags: np.ndarray,
+                                              rule_risk_scores: np.ndarray) -> np.ndarray:
+        """Vectorized equivalent of _calculate_combined_risk_score"""
+        ml_scores = fraud_probs * 10 + 2 * anomaly_flags
+        combined_scores = (ml_scores * 0.6) + (rule_risk_scores * 0.4)
+        return np.select(
+            [combined_scores >= 8, combined_scores >= 6, combined_scores >= 4],
+            ["CRITICAL", "HIGH", "MEDIUM"], "LOW"
+        )
+    
     def _calculate_hybrid_confidence(self, fraud_prob: float, anomaly_flag: bool, 
                                    rule_risk_score: int, threshold: float) -> str:
         """Calculate confidence based on agreement between ML and rule-based systems"""
@@ -300,6 +850,16 @@ class MLInferenceService:
         else:
             return "LOW"
     
+    def _calculate_hybrid_confidences_batch(self, fraud_probs: np.ndarray, anomaly_flags: np.ndarray,
+                                            rule_risk_scores: np.ndarray, threshold: float) -> np.ndarray:
+        """Vectorized equivalent of _calculate_hybrid_confidence"""
+        ml_says_fraud = (fraud_probs >= threshold) | anomaly_flags
+        rule_says_fraud = rule_risk_scores >= 3
+        return np.select(
+            [ml_says_fraud == rule_says_fraud, (fraud_probs > 0.7) | (rule_risk_scores >= 5)],
+            ["HIGH", "MEDIUM"], "LOW"
+        )
+    
     def _generate_hybrid_explanation(self, fraud_prob: float, anomaly_flag: bool, threshold: float,
                                    rule_risk_score: int, rule_details: Dict, should_block: bool,
                                    block_reason: str, original_transaction: Dict) -> str:
@@ -323,20 +883,54 @@ class MLInferenceService:
             explanations.append(f"Key risks: {', '.join(risk_factors[:3])}")
         
         # Decision reasoning
-        if should_block:
-            if block_reason == "CRITICAL_RULE_RISK":
-                explanations.append("BLOCKED: Critical risk level from business rules")
-            elif block_reason == "ML_FRAUD_DETECTED":
-                explanations.append("BLOCKED: ML model confidence above threshold")
-            elif block_reason == "ANOMALY_DETECTED":
-                explanations.append("BLOCKED: Anomalous transaction pattern")
-            elif "RULE_RISK_WITH_ML_SUPPORT" in block_reason:
-                explanations.append("BLOCKED: High rule-based risk supported by ML analysis")
-        else:
-            explanations.append("APPROVED: Low risk from both ML and rule-based analysis")
+        decision = self._decision_explanation(should_block, block_reason)
+        if decision:
+            explanations.append(decision)
         
         return " | ".join(explanations)
     
+    def _decision_explanation(self, should_block: bool, block_reason: str) -> Optional[str]:
+        """Decision reasoning part of a hybrid explanation (None when there is nothing to add)"""
+        if not should_block:
+            return "APPROVED: Low risk from both ML and rule-based analysis"
+        if block_reason == "CRITICAL_RULE_RISK":
+            return "BLOCKED: Critical risk level from business rules"
+        elif block_reason == "ML_FRAUD_DETECTED":
+            return "BLOCKED: ML model confidence above threshold"
+        elif block_reason == "ANOMALY_DETECTED":
+            return "BLOCKED: Anomalous transaction pattern"
+        elif "RULE_RISK_WITH_ML_SUPPORT" in block_reason:
+            return "BLOCKED: High rule-based risk supported by ML analysis"
+        return None
+    
+    def _generate_hybrid_explanations_batch(self, fraud_probs: np.ndarray, anomaly_flags: np.ndarray,
+                                            threshold: float, rule_risk_scores: np.ndarray,
+                                            risk_factors: List[List[str]], should_block: np.ndarray,
+                                            block_reasons: np.ndarray) -> List[str]:
+        """
+        Vectorized equivalent of _generate_hybrid_explanation
+        
+        Each part of the explanation is selected column-wise and formatted only
+        for the rows that include it; the rows then just join their parts.
+        """
+        n = len(fraud_probs)
+        ml_parts = [None] * n
+        for i in np.flatnonzero(fraud_probs >= threshold).tolist():
+            ml_parts[i] = f"ML model detected high fraud probability ({fraud_probs[i]:.1%})"
+        anomaly_parts = np.where(anomaly_flags, "Anomaly detection flagged unusual transaction pattern", None).tolist()
+        rule_parts = [None] * n
+        for i in np.flatnonzero(rule_risk_scores >= 4).tolist():
+            rule_parts[i] = f"Rule engine identified {len(risk_factors[i])} risk factors"
+        key_parts = [f"Key risks: {', '.join(factors[:3])}" if factors else None for factors in risk_factors]
+        decisions = list(zip(should_block.tolist(), block_reasons.tolist()))
+        decision_texts = {decision: self._decision_explanation(*decision) for decision in set(decisions)}
+        decision_parts = [decision_texts[decision] for decision in decisions]
+        
+        return [
+            " | ".join(filter(None, parts))
+            for parts in zip(ml_parts, anomaly_parts, rule_parts, key_parts, decision_parts)
+        ]
+    
     def _log_hybrid_prediction(self, transaction: Dict, result: Dict):
         """Log hybrid prediction for monitoring and audit"""
         log_data = {
@@ -396,6 +990,13 @@ class MLInferenceService:
         else:
             return "LOW"
     
+    def _calculate_risk_scores_batch(self, fraud_probs: np.ndarray, anomaly_flags: np.ndarray) -> np.ndarray:
+        """Vectorized equivalent of _calculate_risk_score"""
+        return np.select(
+            [anomaly_flags & (fraud_probs > 0.8), (fraud_probs > 0.7) | anomaly_flags, fraud_probs > 0.4],
+            ["CRITICAL", "HIGH", "MEDIUM"], "LOW"
+        )
+    
     def _calculate_confidence(self, fraud_prob: float, anomaly_flag: bool) -> str:
         """Calculate prediction confidence"""
         if anomaly_flag and (fraud_prob > 0.8 or fraud_prob < 0.2):
@@ -407,6 +1008,14 @@ class MLInferenceService:
         else:
             return "LOW"
     
+    def _calculate_confidences_batch(self, fraud_probs: np.ndarray, anomaly_flags: np.ndarray) -> np.ndarray:
+        """Vectorized equivalent of _calculate_confidence"""
+        distance = np.abs(fraud_probs - 0.5)
+        return np.select(
+            [anomaly_flags & ((fraud_probs > 0.8) | (fraud_probs < 0.2)), distance > 0.3, distance > 0.15],
+            ["HIGH", "HIGH", "MEDIUM"], "LOW"
+        )
+    
     def _generate_explanation(self, fraud_prob: float, anomaly_flag: bool, 
                             threshold: float, is_fraud: bool) -> str:
         """Generate human-readable explanation"""
@@ -424,7 +1033,7 @@ class MLInferenceService:
         """Log prediction for monitoring and audit"""
         log_data = {
             "timestamp": result["timestamp"],
-            "amount": transaction["Amount"],
+            "amount": transaction.get("Amount", 0.0),
             "fraud_probability": result["fraud_probability"],
             "anomaly_detected": result["anomaly_detected"],
             "final_decision": result["final_decision"],
@@ -433,5 +1042,31 @@ class MLInferenceService:
         logger.info(f"Fraud prediction: {log_data}")
 
 
+def score_features(features: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Both models over a feature matrix (module-level so process workers can run it)
+    
+    Returns:
+        Tuple of (fraud_probs, anomaly_scores, anomaly_flags, model_versions)
+    """
+    _follow_updates_in_pool_worker()
+    bundle = ml_service.bundle
+    fraud_probs, anomaly_scores, anomaly_flags = bundle.runner.run(features)
+    return fraud_probs, anomaly_scores, anomaly_flags, np.full(len(features), bundle.version, dtype=object)
+
+
+def call_service_method(method: str, *args):
+    """Call an ml_service method by name (module-level so process workers can run it)"""
+    _follow_updates_in_pool_worker()
+    return getattr(ml_service, method)(*args)
+
+
+def _follow_updates_in_pool_worker():
+    """Process pool workers have no watchers of their own: check for model swaps and rules changes now and then"""
+    if ml_service.watcher_pid is not None and os.getpid() != ml_service.watcher_pid:
+        ml_service.sync_with_registry_if_due()
+        rule_engine.sync_with_rules_file_if_due()
+
+
 # Global service instance
 ml_service = MLInferenceService()
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+Memory-Mapped Model Artifacts
+Flat binary exports of the compiled models and scaler, loaded with np.load(mmap_mode="r")
+
+Each pickle ``models/<name>.pkl`` gets a sibling directory ``models/<name>.mmap/``
+holding one ``.npy`` file per array and a ``metadata.json`` with the scalar
+parameters and the SHA-256 of the pickle it was exported from. Loading maps
+the arrays read-only, so it takes milliseconds and every worker process
+shares the same pages through the OS page cache.
+
+Export (after changing a pickle): python -m services.model_artifacts
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from config.settings import settings
+from services.isolation_forest import CompiledIsolationForest
+from services.tree_ensemble import CompiledTreeEnsemble
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 1
+ARTIFACT_SUFFIX = ".mmap"
+METADATA_FILE = "metadata.json"
+
+
+class ScalerConstants:
+    """The parts of a fitted StandardScaler that inference uses"""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.n_features_in_ = len(mean)
+
+    def transform(self, X) -> np.ndarray:
+        """Equivalent of ``StandardScaler.transform``"""
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+def artifact_path(pickle_path: str) -> str:
+    """Artifact directory of a pickle (``models/x.pkl`` -> ``models/x.mmap``)"""
+    return os.path.splitext(pickle_path)[0] + ARTIFACT_SUFFIX
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_model_artifact(model, pickle_path: str, directory: Optional[str] = None) -> str:
+    """
+    Write the memory-mappable export of a loaded model
+
+    Args:
+        model: LGBMClassifier, IsolationForest or StandardScaler loaded from pickle_path
+        pickle_path: Pickle the model came from (its hash is recorded)
+        directory: Output directory (default artifact_path(pickle_path))
+
+    Returns:
+        Artifact directory
+
+    Raises:
+        ValueError: If the model type is not supported
+    """
+    directory = directory or artifact_path(pickle_path)
+    if hasattr(model, "booster_"):
+        ensemble = CompiledTreeEnsemble.from_booster(model.booster_)
+        kind, arrays = "tree_ensemble", ensemble.to_arrays()
+        scalars = {"num_features": ensemble.num_features, "sigmoid": ensemble.sigmoid,
+                   "code_tag": sys.implementation.cache_tag}
+    elif hasattr(model, "estimators_features_"):
+        forest = CompiledIsolationForest(model)
+        kind, arrays, scalars = "isolation_forest", forest.to_arrays(), forest.to_scalars()
+    elif hasattr(model, "mean_") and hasattr(model, "scale_"):
+        kind, arrays, scalars = "scaler", {"mean": model.mean_, "scale": model.scale_}, {}
+    else:
+        raise ValueError(f"Cannot export a {type(model).__name__} as a model artifact")
+
+    # Write next to the target and rename, so readers never see a partial export
+    staging = directory + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for name, array in arrays.items():
+        np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array))
+    metadata = {
+        "format": ARTIFACT_FORMAT,
+        "kind": kind,
+        "source": os.path.basename(pickle_path),
+        "source_sha256": file_sha256(pickle_path),
+        "created": datetime.utcnow().isoformat(),
+        "arrays": sorted(arrays),
+        "scalars": scalars
+    }
+    with open(os.path.join(staging, METADATA_FILE), "w") as f:
+        json.dump(metadata, f, indent=2)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(staging, directory)
+    logger.info(f"Exported {kind} artifact to {directory}")
+    return directory
+
+
+def load_model_artifact(pickle_path: str, verify: bool = True) -> Optional[Any]:
+    """
+    Load the memory-mapped export of a pickle, if there is a usable one
+
+    Args:
+        pickle_path: Pickle whose artifact directory to load
+        verify: Check the artifact was exported from the current pickle (when the pickle exists)
+
+    Returns:
+        CompiledTreeEnsemble, CompiledIsolationForest or ScalerConstants; None when
+        there is no artifact, or it is stale or unreadable (callers load the pickle)
+    """
+    directory = artifact_path(pickle_path)
+    metadata_path = os.path.join(directory, METADATA_FILE)
+    if not os.path.exists(metadata_path):
+        return None
+    try:
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+        if metadata.get("format") != ARTIFACT_FORMAT:
+            logger.warning(f"Ignoring {directory}: artifact format {metadata.get('format')} is not supported")
+            return None
+        if verify and os.path.exists(pickle_path) and file_sha256(pickle_path) != metadata["source_sha256"]:
+            logger.warning(f"Ignoring {directory}: {pickle_path} changed since it was exported")
+            return None
+
+        # Plain ndarray views of read-only maps: pages are shared and loaded on first use
+        arrays: Dict[str, np.ndarray] = {
+            name: np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r"))
+            for name in metadata["arrays"]
+        }
+        scalars = metadata["scalars"]
+        kind = metadata["kind"]
+        if kind == "tree_ensemble":
+            return CompiledTreeEnsemble.from_arrays(arrays, **scalars)
+        if kind == "isolation_forest":
+            return CompiledIsolationForest.from_arrays(arrays, **scalars)
+        if kind == "scaler":
+            return ScalerConstants(arrays["mean"], arrays["scale"])
+        logger.warning(f"Ignoring {directory}: unknown artifact kind {kind!r}")
+        return None
+    except (OSError, EOFError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable artifact {directory}: {str(e)}")
+        return None
+
+
+def main():
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Export memory-mapped model artifacts next to the pickles")
+    parser.add_argument("paths", nargs="*", help="Pickles to export (default: the configured models and scaler)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    paths = args.paths or [settings.FRAUD_MODEL_PATH, settings.ANOMALY_MODEL_PATH, settings.SCALER_PATH]
+    for path in paths:
+        export_model_artifact(joblib.load(path), path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Versioned Model Registry
+Model versions stored under settings.MODEL_DIR, with the active version recorded on disk
+
+Layout::
+
+    models/
+        fraud_model.pkl, anomaly_model.pkl     the "default" version
+        versions/
+            registry.json                      {"active": "v2", "history": ["default", "v2"]}
+            v2/
+                fraud_model.pkl                (and optionally fraud_model.mmap/)
+                anomaly_model.pkl              (and optionally anomaly_model.mmap/)
+
+Every serving process follows ``registry.json``, so activating or rolling
+back a version through one worker reaches all of them.
+"""
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from services.model_artifacts import artifact_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VERSION = "default"
+STATE_FILE = "registry.json"
+VERSION_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+class ModelRegistry:
+    """Lists model versions and records which one is active"""
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        Args:
+            root: Versions directory (default <settings.MODEL_DIR>/versions)
+        """
+        self.root = root or os.path.join(settings.MODEL_DIR, "versions")
+        self.state_path = os.path.join(self.root, STATE_FILE)
+        self._lock = threading.Lock()
+
+    def model_paths(self, version: str) -> Tuple[str, str]:
+        """
+        Fraud and anomaly model pickle paths of a version
+
+        Args:
+            version: Version name
+
+        Returns:
+            Tuple of (fraud_model_path, anomaly_model_path)
+
+        Raises:
+            KeyError: If the version does not exist
+        """
+        if version == DEFAULT_VERSION:
+            return settings.FRAUD_MODEL_PATH, settings.ANOMALY_MODEL_PATH
+        if not VERSION_PATTERN.match(version):
+            raise KeyError(version)
+        directory = os.path.join(self.root, version)
+        paths = (os.path.join(directory, os.path.basename(settings.FRAUD_MODEL_PATH)),
+                 os.path.join(directory, os.path.basename(settings.ANOMALY_MODEL_PATH)))
+        if not all(os.path.exists(path) or os.path.isdir(artifact_path(path)) for path in paths):
+            raise KeyError(version)
+        return paths
+
+    def versions(self) -> List[str]:
+        """All available versions, "default" first"""
+        found = []
+        if os.path.isdir(self.root):
+            for name in sorted(os.listdir(self.root)):
+                try:
+                    self.model_paths(name)
+                    found.append(name)
+                except KeyError:
+                    continue
+        return [DEFAULT_VERSION] + [name for name in found if name != DEFAULT_VERSION]
+
+    def state(self) -> Dict[str, Any]:
+        """Recorded state: {"active": version or None, "history": [...], "updated": timestamp}"""
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {"active": None, "history": [], "updated": None}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable registry state {self.state_path}: {str(e)}")
+            return {"active": None, "history": [], "updated": None}
+        state.setdefault("history", [])
+        state.setdefault("updated", None)
+        return state
+
+    def state_mtime(self) -> Optional[float]:
+        """Modification time of the state file (cheap change detection)"""
+        try:
+            return os.stat(self.state_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def active_version(self) -> str:
+        """Version to serve: the recorded one if it still exists, else "default" """
+        active = self.state().get("active")
+        if active and active in self.versions():
+            return active
+        return DEFAULT_VERSION
+
+    def record_activation(self, version: str) -> Dict[str, Any]:
+        """Make version the active one and append it to the history"""
+        with self._lock:
+            state = self.state()
+            if state.get("active") != version:
+                history = state["history"] or ([state["active"]] if state.get("active") else [DEFAULT_VERSION])
+                state["history"] = (history + [version])[-settings.MODEL_REGISTRY_HISTORY:]
+            state["active"] = version
+            return self._write(state)
+
+    def record_rollback(self, expected: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Drop the active version from the history and make the previous one active
+
+        Args:
+            expected: Version the caller prepared to roll back to; the state
+                is left unchanged if the previous version is a different one
+
+        Returns:
+            Tuple of (version rolled back to, new state)
+
+        Raises:
+            ValueError: If there is no earlier version to roll back to, or it is not expected
+        """
+        with self._lock:
+            state = self.state()
+            history = list(state["history"])
+            if len(history) < 2:
+                raise ValueError("No earlier model version to roll back to")
+            if expected is not None and history[-2] != expected:
+                raise ValueError(f"Model registry changed during the rollback (previous version is now "
+                                 f"{history[-2]}, not {expected})")
+            history.pop()
+            state["history"] = history
+            state["active"] = history[-1]
+            return history[-1], self._write(state)
+
+    def _write(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace the state file atomically"""
+        os.makedirs(self.root, exist_ok=True)
+        state["updated"] = datetime.utcnow().isoformat()
+        staging = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(staging, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(staging, self.state_path)
+        return state
+
+
+# Global registry instance
+model_registry = ModelRegistry()
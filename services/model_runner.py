@@ -0,0 +1,143 @@
+"""
+Fused Model Runner
+Runs the fraud and anomaly models over one feature matrix in a single pass
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from services.isolation_forest import CompiledIsolationForest, compile_isolation_forest
+from services.tree_ensemble import CompiledTreeEnsemble, compile_lightgbm_model
+
+
+class ModelRunner:
+    """
+    Scores feature matrices with both models from one entry point
+
+    The input is converted to one contiguous float64 matrix once and handed
+    to the configured fraud and anomaly backends. Batches larger than
+    ``block_rows`` can be split into row blocks scored on a thread pool; the
+    compiled backends spend their time in NumPy calls that release the GIL.
+    """
+
+    def __init__(self, fraud_model, anomaly_model, fraud_backend: Optional[str] = None,
+                 anomaly_backend: Optional[str] = None, threads: Optional[int] = None,
+                 block_rows: Optional[int] = None):
+        """
+        Args:
+            fraud_model: Fitted LGBMClassifier, or a CompiledTreeEnsemble
+            anomaly_model: Fitted IsolationForest, or a CompiledIsolationForest
+            fraud_backend: "compiled", "booster" or "sklearn" (default settings.FRAUD_MODEL_BACKEND)
+            anomaly_backend: "compiled" or "sklearn" (default settings.ANOMALY_MODEL_BACKEND)
+            threads: Row-block worker threads; 0 or 1 scores inline (default settings.MODEL_RUNNER_THREADS)
+            block_rows: Rows per block when a pool is used (default settings.MODEL_RUNNER_BLOCK_ROWS)
+        """
+        self.fraud_model = fraud_model
+        self.anomaly_model = anomaly_model
+
+        # Fraud model backend: the raw LightGBM booster skips sklearn's input checks,
+        # the compiled ensemble skips LightGBM altogether (falling back to the booster)
+        self.fraud_backend = fraud_backend or settings.FRAUD_MODEL_BACKEND
+        if self.fraud_backend not in ("compiled", "booster", "sklearn"):
+            raise ValueError(f"Unknown fraud model backend {self.fraud_backend!r}; "
+                             f"expected 'compiled', 'booster' or 'sklearn'")
+        if isinstance(fraud_model, CompiledTreeEnsemble):
+            # Loaded precompiled (memory-mapped artifact): there is no LightGBM model to fall back to
+            if self.fraud_backend != "compiled":
+                raise ValueError(f"Fraud model backend {self.fraud_backend!r} needs the pickled model")
+            self.fraud_booster, self.fraud_ensemble = None, fraud_model
+        else:
+            self.fraud_booster = fraud_model.booster_ if self.fraud_backend != "sklearn" else None
+            self.fraud_ensemble = (
+                compile_lightgbm_model(fraud_model) if self.fraud_backend == "compiled" else None
+            )
+
+        # Anomaly model backend: packed NumPy trees give the same flags as sklearn
+        self.anomaly_backend = anomaly_backend or settings.ANOMALY_MODEL_BACKEND
+        if self.anomaly_backend not in ("compiled", "sklearn"):
+            raise ValueError(f"Unknown anomaly model backend {self.anomaly_backend!r}; "
+                             f"expected 'compiled' or 'sklearn'")
+        if isinstance(anomaly_model, CompiledIsolationForest):
+            if self.anomaly_backend != "compiled":
+                raise ValueError(f"Anomaly model backend {self.anomaly_backend!r} needs the pickled model")
+            self.anomaly_forest = anomaly_model
+        else:
+            self.anomaly_forest = (
+                compile_isolation_forest(anomaly_model) if self.anomaly_backend == "compiled" else None
+            )
+
+        threads = settings.MODEL_RUNNER_THREADS if threads is None else threads
+        self.block_rows = block_rows or settings.MODEL_RUNNER_BLOCK_ROWS
+        self._pool = (
+            ThreadPoolExecutor(max_workers=threads, thread_name_prefix="model-runner") if threads > 1 else None
+        )
+
+    def run(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Score a batch with both models
+
+        Args:
+            features: Array of shape (N, 31) in MODEL_FEATURES order
+
+        Returns:
+            Tuple of (fraud_probs, anomaly_scores, anomaly_flags) arrays of length N.
+            Anomaly scores follow IsolationForest.decision_function: negative
+            means anomalous, and the flag is set exactly when the score is negative.
+        """
+        X = np.ascontiguousarray(features, dtype=np.float64)
+        if X.ndim != 2:
+            raise ValueError(f"Expected a 2-D feature matrix, got shape {X.shape}")
+        pool = self._pool
+        if pool is None or len(X) <= self.block_rows:
+            return self._run_block(X, settings.BOOSTER_THREADS_BATCH)
+
+        # One LightGBM thread per block: the pool already provides the parallelism
+        blocks = [X[start:start + self.block_rows] for start in range(0, len(X), self.block_rows)]
+        results = list(pool.map(lambda block: self._run_block(block, 1), blocks))
+        fraud_probs, anomaly_scores, anomaly_flags = (np.concatenate(parts) for parts in zip(*results))
+        return fraud_probs, anomaly_scores, anomaly_flags
+
+    def run_single(self, features: np.ndarray) -> Tuple[float, float, bool]:
+        """
+        Score one transaction with both models
+
+        Args:
+            features: Array of shape (1, 31), e.g. from FeatureEngineeringService.process_single_array
+
+        Returns:
+            Tuple of (fraud_prob, anomaly_score, anomaly_flag)
+        """
+        if self.fraud_ensemble is not None:
+            fraud_prob = self.fraud_ensemble.predict_row(features[0])
+        else:
+            fraud_prob = float(self._fraud_probabilities(features, settings.BOOSTER_THREADS_SINGLE)[0])
+        anomaly_score = float(self._anomaly_scores(features)[0])
+        return fraud_prob, anomaly_score, anomaly_score < 0
+
+    def close(self):
+        """Shut down the row-block thread pool; later batches are scored inline"""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def _run_block(self, X: np.ndarray, num_threads: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Both models over one contiguous block of rows"""
+        fraud_probs = self._fraud_probabilities(X, num_threads)
+        anomaly_scores = self._anomaly_scores(X)
+        return fraud_probs, anomaly_scores, anomaly_scores < 0
+
+    def _fraud_probabilities(self, X: np.ndarray, num_threads: int) -> np.ndarray:
+        """Fraud probabilities from the configured backend (num_threads applies to the booster)"""
+        if self.fraud_ensemble is not None:
+            return self.fraud_ensemble.predict(X)
+        if self.fraud_booster is not None:
+            return self.fraud_booster.predict(X, num_threads=num_threads)
+        return self.fraud_model.predict_proba(X)[:, 1]
+
+    def _anomaly_scores(self, X: np.ndarray) -> np.ndarray:
+        """Isolation Forest decision function from the configured backend"""
+        if self.anomaly_forest is not None:
+            return self.anomaly_forest.decision_function(X)
+        return self.anomaly_model.decision_function(X)
@@ -1,221 +1,626 @@
 """
 Rule-Based Risk Engine
 Implements business logic for fraud detection based on transaction characteristics
+
+The scoring rules are declared in a rules file (settings.RULES_PATH, JSON or
+YAML) and compiled once into a RuleSet: a closure tree over NumPy arrays for
+batches and a dense lookup table for single transactions.
 """
-from typing import Dict, Any, Tuple
+from bisect import bisect_left, bisect_right
+from string import Formatter
+from typing import Any, Callable, Container, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import json
+import keyword
 import logging
+import operator
+import os
+import threading
+import time
+import numpy as np
+
+from config.settings import settings
+from services.columnar import encode_labels
+
+try:
+    import yaml
+except ImportError:  # YAML rules files are optional; JSON needs no extra dependency
+    yaml = None
 
 logger = logging.getLogger(__name__)
 
 
-class RuleBasedRiskEngine:
+# Largest lookup table compiled for single-transaction scoring; bigger rule
+# sets are scored by interpreting the rules instead
+MAX_RULE_TABLE_CELLS = 1_000_000
+
+_SCALAR_OPERATORS = {
+    '>=': operator.ge, '>': operator.gt, '<=': operator.le, '<': operator.lt,
+    '==': operator.eq, '!=': operator.ne
+}
+
+_ARRAY_OPERATORS = {
+    '>=': np.greater_equal, '>': np.greater, '<=': np.less_equal, '<': np.less,
+    '==': np.equal, '!=': np.not_equal
+}
+
+
+class RuleCompilationError(ValueError):
+    """Raised when a rules file is malformed"""
+
+
+class RuleInput(NamedTuple):
+    """An input read from each transaction, optionally mapped to a risk score"""
+    name: str
+    field: str
+    default: Any
+    scores: Optional[Dict[str, Any]]
+    unknown_score: Any
+    dtype: type
+
+
+class Condition(NamedTuple):
     """
-    Rule-based risk assessment engine that evaluates transaction risk
-    based on business logic and domain expertise
+    One comparison of an input against constants
+    
+    ``check`` evaluates a scalar and ``test`` a NumPy array. ``cuts`` are the
+    points where the outcome can change, as (value, side) pairs: side 0 splits
+    just below the value (x >= value), side 1 just above it (x > value).
+    """
+    input: str
+    check: Callable[[Any], bool]
+    test: Callable[[np.ndarray], np.ndarray]
+    cuts: Tuple[Tuple[float, int], ...]
+
+
+class RuleCase(NamedTuple):
+    """A rule outcome and the conditions (all required) that select it"""
+    conditions: Tuple[Condition, ...]
+    score: int
+    label: Optional[str]
+    factor: int  # index into RuleSet.factor_messages, -1 for none
+
+
+class Rule(NamedTuple):
+    """First-match list of cases; ``otherwise`` applies when none match"""
+    name: str
+    cases: Tuple[RuleCase, ...]
+    otherwise: RuleCase
+    detail: Optional[str]
+    detail_input: Optional[str]
+
+
+class RuleScores(NamedTuple):
+    """Column-wise output of RuleSet.score_columns (and RuleBasedRiskEngine.score_arrays)"""
+    score: np.ndarray
+    risk_level: np.ndarray
+    factor_mask: np.ndarray
+    cases: Dict[str, np.ndarray]
+    values: Dict[str, np.ndarray]
+
+
+class TableDimension(NamedTuple):
     """
+    Buckets one input into its lookup table axis
     
-    def __init__(self):
-        # Risk scoring thresholds
-        self.high_amount_threshold = 20000
-        self.very_high_amount_threshold = 50000
-        self.new_customer_days = 60
-        self.very_new_customer_days = 30
-        self.high_velocity_threshold = 10
-        self.very_high_velocity_threshold = 20
-        
-        # Risk hours (late night/early morning)
-        self.risky_hours = [0, 1, 2, 3, 4, 23]
-        self.very_risky_hours = [1, 2, 3]
-        
-        # Location risk mapping
-        self.location_risk_scores = {
-            "Low Risk (Home Country)": 0,
-            "Medium Risk (Neighboring)": 1,
-            "High Risk (International)": 2,
-            "Very High Risk (Restricted)": 3
-        }
+    Mapped inputs use ``labels`` (label -> (score, class)) and ``unknown``.
+    Numeric inputs are bucketed between the sorted condition cut points
+    (``cuts_at`` for side 0, ``cuts_after`` for side 1) and ``classes`` maps
+    the bucket to its table class. Buckets that satisfy exactly the same
+    conditions share a class.
+    """
+    input: str
+    field: str
+    default: Any
+    stride: int
+    labels: Optional[Dict[str, Tuple[Any, int]]]
+    unknown: Optional[Tuple[Any, int]]
+    cuts_at: Optional[List[float]]
+    cuts_after: Optional[List[float]]
+    classes: Optional[List[int]]
+
+
+class RuleTable(NamedTuple):
+    """
+    Rule set evaluated over every combination of input classes
+    
+    ``cells`` holds (score, risk level, factor mask, detail labels) per cell in
+    C order of ``shape``, so a transaction is scored by bucketing its inputs and
+    one list lookup. ``cases`` holds the case chosen by each rule per cell
+    (flattened), for scoring whole columns through the table.
+    """
+    shape: Tuple[int, ...]
+    score: np.ndarray
+    factor_mask: np.ndarray
+    cells: List[Tuple[int, str, int, Tuple[Optional[str], ...]]]
+    dimensions: Tuple[TableDimension, ...]
+    cases: Tuple[np.ndarray, ...]
+
+
+def load_rule_spec(path: str) -> Dict[str, Any]:
+    """
+    Read a rules file
+    
+    Args:
+        path: Path to a .json, .yaml or .yml rules file
+    
+    Returns:
+        The parsed rules specification
+    """
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if path.endswith(('.yaml', '.yml')):
+        if yaml is None:
+            raise RuleCompilationError(f"PyYAML is required to load rules file {path}")
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+def _compile_condition(name: str, op: str, operand: Any) -> Condition:
+    """Compile one ``[op, operand]`` comparison into scalar and array checks"""
+    if op in _SCALAR_OPERATORS:
+        value = float(operand)
+        compare, array_compare = _SCALAR_OPERATORS[op], _ARRAY_OPERATORS[op]
+        cuts = {'>=': ((value, 0),), '<': ((value, 0),), '>': ((value, 1),), '<=': ((value, 1),)}.get(
+            op, ((value, 0), (value, 1))
+        )
+        return Condition(name, lambda x: compare(x, value), lambda x: array_compare(x, value), cuts)
+    if op == 'in':
+        members = tuple(float(v) for v in operand)
+        member_set = frozenset(members)
+        return Condition(
+            name, lambda x: x in member_set, lambda x: np.isin(x, members),
+            tuple(cut for v in members for cut in ((v, 0), (v, 1)))
+        )
+    if op == 'between':
+        low, high = (float(v) for v in operand)
+        return Condition(
+            name, lambda x: low <= x <= high, lambda x: (x >= low) & (x <= high), ((low, 0), (high, 1))
+        )
+    raise RuleCompilationError(f"Unknown operator {op!r} for input {name!r}")
+
+
+def _check_message(rule_name: str, template: str, names: Container[str]):
+    """
+    Validate a risk factor template for rendering with str.format_map
+    
+    Only plain references to declared inputs are allowed: no attribute or
+    index access, no conversions and no replacement fields nested in the
+    format spec.
+    """
+    try:
+        fields = list(Formatter().parse(template))
+    except ValueError as e:
+        raise RuleCompilationError(f"Rule {rule_name!r}: malformed message {template!r}: {e}") from e
+    for _, field, format_spec, conversion in fields:
+        if field is None:
+            continue
+        if field not in names:
+            raise RuleCompilationError(f"Rule {rule_name!r}: message refers to unknown input {field!r}")
+        if conversion is not None or '{' in format_spec or '}' in format_spec:
+            raise RuleCompilationError(
+                f"Rule {rule_name!r}: message field {field!r} may only have a plain format spec"
+            )
+
+
+def _mtime(path: str) -> Optional[int]:
+    """Modification time of a file in nanoseconds (None if it is missing)"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _whole(value: float):
+    """Render whole-number floats (from NumPy columns) the way ints are rendered"""
+    if type(value) is int:
+        return value
+    return int(value) if float(value).is_integer() else value
+
+
+def _interval_representatives(cuts: List[Tuple[float, int]]) -> List[float]:
+    """One value inside each interval delimited by sorted (value, side) cut points"""
+    if not cuts:
+        return [0.0]
+    first, side = cuts[0]
+    points = [first - 1 if side == 0 else first]
+    for (low, low_side), (high, high_side) in zip(cuts, cuts[1:]):
+        points.append(low if low_side == 0 else high if high_side == 1 else (low + high) / 2)
+    last, side = cuts[-1]
+    points.append(last if side == 0 else last + 1)
+    return points
+
+
+def _classify(points: Sequence[Any], conditions: Sequence[Condition]) -> Tuple[List[int], List[Any]]:
+    """
+    Group points that satisfy exactly the same conditions
+    
+    Returns:
+        Tuple of (class index per point, representative point per class)
+    """
+    signatures = {}
+    classes, representatives = [], []
+    for point in points:
+        signature = tuple(condition.check(point) for condition in conditions)
+        if signature not in signatures:
+            signatures[signature] = len(representatives)
+            representatives.append(point)
+        classes.append(signatures[signature])
+    return classes, representatives
+
+
+class RuleSet:
+    """
+    A rules specification compiled for evaluation
+    
+    Instances are immutable once built: RuleBasedRiskEngine swaps in a new
+    RuleSet to change rules, so a request holding a reference keeps scoring
+    against one consistent version.
+    """
+    
+    def __init__(self, spec: Dict[str, Any], source: Optional[str] = None):
+        if not isinstance(spec, dict):
+            raise RuleCompilationError("Rules specification must be a mapping")
+        self.source = source
+        try:
+            self._compile(spec)
+        except (KeyError, TypeError, AttributeError, SyntaxError) as e:
+            raise RuleCompilationError(f"Malformed rules specification: {e!r}") from e
+    
+    def _compile(self, spec: Dict[str, Any]):
+        """Validate the specification and build the evaluators"""
+        self.version = str(spec.get('version', 'unversioned'))
+        self.inputs = self._compile_inputs(spec.get('inputs') or {})
+        self.factor_messages: List[str] = []
+        self.rules = tuple(self._compile_rule(rule) for rule in spec.get('rules') or [])
+        if len(self.factor_messages) > 62:
+            raise RuleCompilationError("At most 62 risk factors are supported")
         
-        # Merchant risk mapping
-        self.merchant_risk_scores = {
-            "ATM": 0,
-            "Grocery Store": 0,
-            "Gas Station": 0,
-            "Restaurant": 1,
-            "Department Store": 1,
-            "Online Retail": 2,
-            "Hotel": 2,
-            "Other": 3
-        }
+        low, high = spec.get('score_range', (0, 10))
+        self.score_range = (int(low), int(high))
+        self._compile_levels(spec.get('risk_levels') or [{'level': 'LOW'}])
         
-        # Transaction type risk mapping
-        self.transaction_type_risk_scores = {
-            "Recurring Payment": 0,
-            "Purchase": 1,
-            "Online Payment": 2,
-            "Cash Withdrawal": 2,
-            "International": 3,
-            "Refund": 1
+        names = [rule_input.name for rule_input in self.inputs]
+        self._names = tuple(names)
+        self._numeric = tuple(rule_input.scores is None for rule_input in self.inputs)
+        self._message_inputs = tuple(
+            tuple(dict.fromkeys(names.index(field) for _, field, _, _ in Formatter().parse(message) if field))
+            for message in self.factor_messages
+        )
+        self._details = tuple(
+            (rule.detail, rule.detail_input, index, names.index(rule.detail_input) if rule.detail_input else -1)
+            for index, rule in enumerate(self.rules) if rule.detail
+        )
+        self._message_cache: Dict[int, Tuple[str, ...]] = {}
+        self._evaluate = self._compile_evaluator()
+        self.table = self._compile_table()
+        self._score = self._compile_scorer()
+    
+    @classmethod
+    def from_file(cls, path: str) -> 'RuleSet':
+        """Load and compile a rules file"""
+        return cls(load_rule_spec(path), source=path)
+    
+    def _compile_inputs(self, inputs: Dict[str, Any]) -> Tuple[RuleInput, ...]:
+        """Validate the input declarations"""
+        compiled = []
+        for name, spec in inputs.items():
+            if not name.isidentifier() or keyword.iskeyword(name):
+                raise RuleCompilationError(f"Input name {name!r} must be a valid identifier")
+            scores = spec.get('scores')
+            unknown_score = spec.get('unknown_score', 0)
+            dtype = float
+            if scores is not None:
+                scores = dict(scores)
+                if all(isinstance(v, int) for v in list(scores.values()) + [unknown_score]):
+                    dtype = int
+            compiled.append(RuleInput(
+                name=name,
+                field=spec.get('field', name),
+                default=spec.get('default', 0),
+                scores=scores,
+                unknown_score=unknown_score,
+                dtype=dtype
+            ))
+        return tuple(compiled)
+    
+    def _compile_case(self, rule_name: str, spec: Dict[str, Any]) -> RuleCase:
+        """Compile one case of a rule"""
+        input_names = {rule_input.name for rule_input in self.inputs}
+        conditions = []
+        for name, comparison in (spec.get('when') or {}).items():
+            if name not in input_names:
+                raise RuleCompilationError(f"Rule {rule_name!r} refers to unknown input {name!r}")
+            if not isinstance(comparison, (list, tuple)) or len(comparison) != 2:
+                raise RuleCompilationError(f"Rule {rule_name!r}: condition on {name!r} must be [operator, value]")
+            conditions.append(_compile_condition(name, *comparison))
+        
+        factor = -1
+        if spec.get('factor'):
+            _check_message(rule_name, spec['factor'], input_names)
+            factor = len(self.factor_messages)
+            self.factor_messages.append(spec['factor'])
+        return RuleCase(tuple(conditions), int(spec.get('score', 0)), spec.get('label'), factor)
+    
+    def _compile_rule(self, spec: Dict[str, Any]) -> Rule:
+        """Compile one first-match rule"""
+        name = spec.get('name', 'rule')
+        cases = tuple(self._compile_case(name, case) for case in spec.get('cases') or [])
+        otherwise = self._compile_case(name, spec.get('otherwise') or {})
+        if otherwise.conditions:
+            raise RuleCompilationError(f"Rule {name!r}: 'otherwise' cannot have conditions")
+        detail_input = spec.get('detail_input')
+        if detail_input is not None and detail_input not in {rule_input.name for rule_input in self.inputs}:
+            raise RuleCompilationError(f"Rule {name!r} reports unknown input {detail_input!r}")
+        return Rule(name, cases, otherwise, spec.get('detail'), detail_input)
+    
+    def _compile_levels(self, levels: List[Dict[str, Any]]):
+        """Risk levels as ascending score bounds for np.digitize"""
+        bounded = sorted((int(level['min_score']), level['level']) for level in levels if 'min_score' in level)
+        defaults = [level['level'] for level in levels if 'min_score' not in level]
+        if len(defaults) != 1:
+            raise RuleCompilationError("Exactly one risk level must omit min_score")
+        self.level_bounds = tuple(bound for bound, _ in bounded)
+        self.level_names = tuple(defaults + [name for _, name in bounded])
+        self._level_array = np.array(self.level_names)
+    
+    def _case_labels(self, index: int) -> np.ndarray:
+        """Detail labels of a rule's cases, ``otherwise`` last"""
+        rule = self.rules[index]
+        return np.array([case.label for case in rule.cases + (rule.otherwise,)], dtype=object)
+    
+    def _level(self, score: int) -> str:
+        """Risk level of one score"""
+        return self.level_names[bisect_right(self.level_bounds, score)]
+    
+    def _compile_evaluator(self) -> Callable[[Dict[str, np.ndarray]], Tuple]:
+        """
+        Build the vectorized evaluator as a tree of closures
+        
+        Each rule becomes an np.select over its case conditions; the evaluator
+        sums case scores, ORs factor bits and returns
+        (score, level index, factor mask, case index per rule).
+        """
+        def conjunction(conditions):
+            if not conditions:
+                return lambda values: True
+            tests = [(condition.input, condition.test) for condition in conditions]
+            
+            def test(values):
+                result = None
+                for name, check in tests:
+                    outcome = check(values[name])
+                    result = outcome if result is None else result & outcome
+                return result
+            return test
+        
+        def rule_evaluator(rule):
+            tests = [conjunction(case.conditions) for case in rule.cases]
+            outcomes = rule.cases + (rule.otherwise,)
+            scores = np.array([case.score for case in outcomes], dtype=np.int64)
+            bits = np.array([1 << case.factor if case.factor >= 0 else 0 for case in outcomes], dtype=np.int64)
+            choices = list(range(len(tests)))
+            
+            def evaluate(values, shape):
+                if not tests:
+                    case = np.zeros(shape, dtype=np.int64)
+                else:
+                    conditions = [np.broadcast_to(test(values), shape) for test in tests]
+                    case = np.select(conditions, choices, len(tests))
+                return case, scores[case], bits[case]
+            return evaluate
+        
+        evaluators = [rule_evaluator(rule) for rule in self.rules]
+        low, high = self.score_range
+        bounds = self.level_bounds
+        
+        def evaluate(values):
+            shape = np.broadcast_shapes(*(np.shape(v) for v in values.values()))
+            score = np.zeros(shape, dtype=np.int64)
+            factor_mask = np.zeros(shape, dtype=np.int64)
+            cases = []
+            for evaluate_rule in evaluators:
+                case, case_score, case_bits = evaluate_rule(values, shape)
+                score += case_score
+                factor_mask |= case_bits
+                cases.append(case)
+            score = np.clip(score, low, high)
+            return score, np.digitize(score, bounds), factor_mask, cases
+        return evaluate
+    
+    def _compile_table(self) -> Optional[RuleTable]:
+        """
+        Evaluate the rules once over every combination of input classes
+        
+        Returns:
+            RuleTable, or None when the rule set is too large to tabulate
+        """
+        dimensions, representatives = [], []
+        for rule_input in self.inputs:
+            conditions = [
+                condition for rule in self.rules for case in rule.cases
+                for condition in case.conditions if condition.input == rule_input.name
+            ]
+            if rule_input.scores is not None:
+                domain = sorted(set(rule_input.scores.values()) | {rule_input.unknown_score})
+                classes, points = _classify(domain, conditions)
+                class_of = dict(zip(domain, classes))
+                dimension = dict(
+                    labels={label: (score, class_of[score]) for label, score in rule_input.scores.items()},
+                    unknown=(rule_input.unknown_score, class_of[rule_input.unknown_score]),
+                    cuts_at=None, cuts_after=None, classes=None
+                )
+            else:
+                cuts = sorted({cut for condition in conditions for cut in condition.cuts})
+                classes, points = _classify(_interval_representatives(cuts), conditions)
+                dimension = dict(
+                    labels=None, unknown=None, classes=classes,
+                    cuts_at=[value for value, side in cuts if side == 0],
+                    cuts_after=[value for value, side in cuts if side == 1]
+                )
+            dimensions.append(dimension)
+            representatives.append(np.array(points, dtype=rule_input.dtype))
+        
+        shape = tuple(len(points) for points in representatives)
+        size = int(np.prod(shape, dtype=np.int64))
+        if size > MAX_RULE_TABLE_CELLS:
+            logger.warning(f"Rule set {self.version} needs {size} table cells; scoring by interpretation")
+            return None
+        
+        grid = np.indices(shape)
+        values = {
+            rule_input.name: points[index]
+            for rule_input, points, index in zip(self.inputs, representatives, grid)
         }
+        score, level, factor_mask, cases = self._evaluate(values)
+        
+        labelled = [
+            self._case_labels(index)[cases[index]].ravel().tolist()
+            for _, detail_input, index, _ in self._details if detail_input is None
+        ]
+        cells = list(zip(
+            score.ravel().tolist(), self._level_array[level].ravel().tolist(),
+            factor_mask.ravel().tolist(), zip(*labelled) if labelled else [()] * size
+        ))
+        
+        strides = [int(np.prod(shape[i + 1:], dtype=np.int64)) for i in range(len(shape))]
+        table = RuleTable(
+            shape=shape,
+            score=score,
+            factor_mask=factor_mask,
+            cells=cells,
+            dimensions=tuple(
+                TableDimension(rule_input.name, rule_input.field, rule_input.default, stride, **dimension)
+                for rule_input, stride, dimension in zip(self.inputs, strides, dimensions)
+            ),
+            cases=tuple(
+                np.broadcast_to(case, shape).ravel().astype(np.min_scalar_type(len(rule.cases)))
+                for rule, case in zip(self.rules, cases)
+            )
+        )
+        self._table_axes = tuple(self._table_axis(dimension) for dimension in table.dimensions)
+        logger.debug(f"Compiled rule set {self.version} into a table of {size} cells")
+        return table
     
-    def calculate_rule_risk_score(self, transaction_data: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    @staticmethod
+    def _table_axis(dimension: TableDimension) -> Tuple[str, int, Optional[np.ndarray], Optional[Tuple], np.ndarray]:
         """
-        Calculate rule-based risk score and return detailed risk factors
-        Uses industry-standard tiered scoring with both positive and negative risk factors
+        Sorted arrays that bucket a column of input values into table classes
+        
+        Returns:
+            (input name, stride, sorted mapped values or None, cut points,
+            class per bucket); numeric inputs are bucketed like the generated
+            scorer does, mapped inputs by the position of their mapped value
+        """
+        if dimension.labels is not None:
+            class_of = dict(list(dimension.labels.values()) + [dimension.unknown])
+            domain = sorted(class_of)
+            return (dimension.input, dimension.stride, np.array(domain, dtype=np.float64), None,
+                    np.array([class_of[value] for value in domain], dtype=np.intp))
+        cuts = (np.array(dimension.cuts_at, dtype=np.float64), np.array(dimension.cuts_after, dtype=np.float64))
+        return dimension.input, dimension.stride, None, cuts, np.array(dimension.classes, dtype=np.intp)
+    
+    def score(self, transaction_data: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Score one transaction through the lookup table
         
         Args:
             transaction_data: Dictionary containing transaction details
-            
+        
         Returns:
             Tuple of (risk_score, risk_details)
         """
+        return self._score(transaction_data)
+    
+    def _compile_scorer(self) -> Callable[[Dict[str, Any]], Tuple[int, Dict[str, Any]]]:
+        """
+        Generate a straight-line scoring function for the lookup table
+        
+        The generated code reads each field, buckets it (dictionary lookup for
+        mapped inputs, two bisects for numeric ones), sums the strides into a
+        cell offset and builds the details dictionary as a literal.
+        """
+        table = self.table
+        if table is None:
+            return self.interpret
+        
+        env = {'_bisect_left': bisect_left, '_bisect_right': bisect_right, '_cells': table.cells,
+               '_render': self.render_risk_factors}
+        lines = ['def score(transaction_data):', '    get = transaction_data.get']
+        offset = []
+        for i, dimension in enumerate(table.dimensions):
+            env[f'_default{i}'] = dimension.default
+            lines.append(f'    v{i} = get({dimension.field!r}, _default{i})')
+            if dimension.labels is not None:
+                env[f'_labels{i}'], env[f'_unknown{i}'] = dimension.labels, dimension.unknown
+                lines.append(f'    m{i}, c{i} = _labels{i}.get(v{i}, _unknown{i})')
+            else:
+                env[f'_classes{i}'], env[f'_at{i}'], env[f'_after{i}'] = (
+                    dimension.classes, dimension.cuts_at, dimension.cuts_after
+                )
+                lines.append(f'    c{i} = _classes{i}[_bisect_right(_at{i}, v{i}) + _bisect_left(_after{i}, v{i})]')
+            offset.append(f'c{i} * {dimension.stride}')
+        values = ', '.join(f'v{i}' for i in range(len(table.dimensions)))
+        lines += [
+            f'    risk_score, risk_level, factor_mask, labels = _cells[{" + ".join(offset)}]',
+            f'    risk_factors = _render(factor_mask, ({values},)) if factor_mask else []'
+        ]
+        
+        details, label_index = [], 0
+        for key, detail_input, _, position in self._details:
+            if detail_input is None:
+                details.append(f'{key!r}: labels[{label_index}]')
+                label_index += 1
+            elif table.dimensions[position].labels is not None:
+                details.append(f'{key!r}: m{position}')
+            else:
+                details.append(f'{key!r}: v{position}')
+        details += ["'total_risk_score': risk_score", "'risk_level': risk_level",
+                    "'risk_factors': risk_factors", "'risk_factor_count': len(risk_factors)"]
+        lines.append(f'    return risk_score, {{{", ".join(details)}}}')
+        
+        exec('\n'.join(lines), env)
+        return env['score']
+    
+    def interpret(self, transaction_data: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Reference evaluation of the rules case by case
+        
+        Used when the rule set is too large to tabulate, and to validate the
+        lookup table and the columnar scorer.
+        
+        Args:
+            transaction_data: Dictionary containing transaction details
+        
+        Returns:
+            Tuple of (risk_score, risk_details)
+        """
+        raw, values = {}, {}
+        for rule_input in self.inputs:
+            value = transaction_data.get(rule_input.field, rule_input.default)
+            raw[rule_input.name] = value if rule_input.scores is not None else _whole(value)
+            values[rule_input.name] = (
+                rule_input.scores.get(value, rule_input.unknown_score) if rule_input.scores is not None else value
+            )
+        
         risk_score = 0
         risk_factors = []
         risk_details = {}
-        
-        # Extract transaction details
-        amount = transaction_data.get('Amount', 0)
-        location_risk = transaction_data.get('location_risk', 'Low Risk (Home Country)')
-        hour_of_day = transaction_data.get('hour_of_day', 12)
-        customer_age_days = transaction_data.get('customer_age_days', 365)
-        daily_transactions = transaction_data.get('daily_transactions', 3)
-        merchant_type = transaction_data.get('merchant_type', 'Other')
-        transaction_type = transaction_data.get('transaction_type', 'Purchase')
-        
-        # 1. Amount-based risk assessment (TIERED)
-        if amount >= 100000:  # Very high amounts
-            risk_score += 4
-            risk_factors.append(f"Very high transaction amount (${amount:,.2f})")
-            risk_details['amount_risk'] = 'VERY_HIGH'
-        elif amount >= 50000:  # High amounts
-            risk_score += 3
-            risk_factors.append(f"High transaction amount (${amount:,.2f})")
-            risk_details['amount_risk'] = 'HIGH'
-        elif amount >= 20000:  # Elevated amounts
-            risk_score += 2
-            risk_factors.append(f"Elevated transaction amount (${amount:,.2f})")
-            risk_details['amount_risk'] = 'MEDIUM'
-        elif amount >= 10000:  # Moderate amounts
-            risk_score += 1
-            risk_factors.append(f"Moderate transaction amount (${amount:,.2f})")
-            risk_details['amount_risk'] = 'MEDIUM'
-        elif amount < 100:  # Very low amounts (reduce risk)
-            risk_score -= 1
-            risk_details['amount_risk'] = 'LOW'
-        else:
-            risk_details['amount_risk'] = 'LOW'
-        
-        # 2. Location risk assessment
-        location_score = self.location_risk_scores.get(location_risk, 0)
-        if location_score >= 3:
-            risk_score += 3
-            risk_factors.append("Very high-risk location (restricted)")
-        elif location_score >= 2:
-            risk_score += 2
-            risk_factors.append("High-risk location (international)")
-        elif location_score >= 1:
-            risk_score += 1
-            risk_factors.append("Medium-risk location (neighboring)")
-        else:
-            risk_score -= 1  # Home country reduces risk
-        
-        risk_details['location_risk_score'] = location_score
-        
-        # 3. Time-based risk assessment (MORE RESTRICTIVE)
-        if hour_of_day in [1, 2, 3]:  # Only very late hours
-            risk_score += 2
-            risk_factors.append(f"Very unusual transaction time ({hour_of_day}:00)")
-            risk_details['time_risk'] = 'VERY_HIGH'
-        elif hour_of_day in [0, 4, 23]:  # Slightly unusual
-            risk_score += 1
-            risk_factors.append(f"Unusual transaction time ({hour_of_day}:00)")
-            risk_details['time_risk'] = 'HIGH'
-        elif 9 <= hour_of_day <= 17:  # Business hours reduce risk
-            risk_score -= 1
-            risk_details['time_risk'] = 'LOW'
-        else:
-            risk_details['time_risk'] = 'MEDIUM'
-        
-        # 4. Customer age risk assessment (MORE BALANCED)
-        if customer_age_days <= 7:  # Very new
-            risk_score += 3
-            risk_factors.append(f"Very new customer account ({customer_age_days} days)")
-            risk_details['customer_age_risk'] = 'VERY_HIGH'
-        elif customer_age_days <= 30:  # New
-            risk_score += 2
-            risk_factors.append(f"New customer account ({customer_age_days} days)")
-            risk_details['customer_age_risk'] = 'HIGH'
-        elif customer_age_days <= 90:  # Somewhat new
-            risk_score += 1
-            risk_factors.append(f"Relatively new customer account ({customer_age_days} days)")
-            risk_details['customer_age_risk'] = 'MEDIUM'
-        elif customer_age_days >= 365:  # Established customer reduces risk
-            risk_score -= 1
-            risk_details['customer_age_risk'] = 'LOW'
-        else:
-            risk_details['customer_age_risk'] = 'MEDIUM'
-        
-        # 5. Transaction velocity risk assessment (MORE RESTRICTIVE)
-        if daily_transactions >= 50:  # Extremely high
-            risk_score += 3
-            risk_factors.append(f"Extremely high transaction velocity ({daily_transactions}/day)")
-            risk_details['velocity_risk'] = 'VERY_HIGH'
-        elif daily_transactions >= 25:  # Very high
-            risk_score += 2
-            risk_factors.append(f"Very high transaction velocity ({daily_transactions}/day)")
-            risk_details['velocity_risk'] = 'VERY_HIGH'
-        elif daily_transactions >= 15:  # High
-            risk_score += 1
-            risk_factors.append(f"High transaction velocity ({daily_transactions}/day)")
-            risk_details['velocity_risk'] = 'HIGH'
-        elif daily_transactions <= 2:  # Low velocity reduces risk
-            risk_score -= 1
-            risk_details['velocity_risk'] = 'LOW'
-        else:
-            risk_details['velocity_risk'] = 'MEDIUM'
-        
-        # 6. Merchant type risk assessment (REDUCED IMPACT)
-        merchant_score = self.merchant_risk_scores.get(merchant_type, 1)
-        if merchant_score >= 3 and amount >= 5000:  # Only for high amounts
-            risk_score += 1
-            risk_factors.append(f"High-risk merchant type with significant amount ({merchant_type})")
-        elif merchant_score == 0:  # Low-risk merchants reduce risk
-            risk_score -= 1
-        risk_details['merchant_risk_score'] = merchant_score
-        
-        # 7. Transaction type risk assessment (REDUCED IMPACT)
-        txn_type_score = self.transaction_type_risk_scores.get(transaction_type, 1)
-        if txn_type_score >= 3:
-            risk_score += 1
-            risk_factors.append(f"High-risk transaction type ({transaction_type})")
-        elif txn_type_score == 0:  # Low-risk types reduce risk
-            risk_score -= 1
-        risk_details['transaction_type_risk_score'] = txn_type_score
-        
-        # 8. Combination risk factors (ONLY FOR EXTREME CASES)
-        if (amount >= 50000 and location_score >= 3):
-            risk_score += 2
-            risk_factors.append("Very high amount + restricted location combination")
-        
-        if (customer_age_days <= 7 and daily_transactions >= 25):
-            risk_score += 2
-            risk_factors.append("Brand new customer + very high velocity combination")
-        
-        if (hour_of_day in [1, 2, 3] and amount >= 20000):
-            risk_score += 1
-            risk_factors.append("Very late hour + high amount combination")
+        for rule in self.rules:
+            for case in rule.cases:
+                if all(condition.check(values[condition.input]) for condition in case.conditions):
+                    break
+            else:
+                case = rule.otherwise
+            risk_score += case.score
+            if case.factor >= 0:
+                risk_factors.append(self.factor_messages[case.factor].format_map(raw))
+            if rule.detail:
+                risk_details[rule.detail] = values[rule.detail_input] if rule.detail_input else case.label
         
         # Ensure risk score stays within reasonable bounds
-        risk_score = max(0, min(risk_score, 10))
-        
-        # Calculate overall risk level
-        if risk_score >= 8:
-            risk_level = "CRITICAL"
-        elif risk_score >= 6:
-            risk_level = "HIGH"
-        elif risk_score >= 3:
-            risk_level = "MEDIUM"
-        else:
-            risk_level = "LOW"
+        low, high = self.score_range
+        risk_score = max(low, min(risk_score, high))
+        risk_level = self._level(risk_score)
         
         risk_details.update({
             'total_risk_score': risk_score,
@@ -223,11 +628,286 @@ class RuleBasedRiskEngine:
             'risk_factors': risk_factors,
             'risk_factor_count': len(risk_factors)
         })
+        return risk_score, risk_details
+    
+    def render_risk_factors(self, factor_mask: int, values: Sequence[Any]) -> List[str]:
+        """
+        Render the risk factor messages for one transaction's factor mask
+        
+        Args:
+            factor_mask: Bitmask of triggered factors (bit i is factor_messages[i])
+            values: Raw input values in declaration order
+        
+        Returns:
+            List of risk factor descriptions in reporting order
+        """
+        factor_mask = int(factor_mask)
+        if not factor_mask:
+            return []
+        raw = {
+            name: _whole(value) if numeric else value
+            for name, value, numeric in zip(self._names, values, self._numeric)
+        }
+        return [message.format_map(raw) for message in self._factor_messages(factor_mask)]
+    
+    def _factor_messages(self, factor_mask: int) -> Tuple[str, ...]:
+        """Message templates for the bits set in a factor mask, in reporting order"""
+        messages = self._message_cache.get(factor_mask)
+        if messages is None:
+            messages = tuple(message for i, message in enumerate(self.factor_messages) if factor_mask & (1 << i))
+            self._message_cache[factor_mask] = messages
+        return messages
+    
+    def render_factor_columns(self, factor_mask: np.ndarray, values: Sequence[np.ndarray]) -> List[List[str]]:
+        """
+        Vectorized equivalent of render_risk_factors for a whole batch
+        
+        Each factor is rendered once per distinct combination of the values it
+        quotes, and only for the rows whose mask has its bit set.
+        
+        Args:
+            factor_mask: Factor bitmask per row
+            values: Raw input columns in declaration order
+        
+        Returns:
+            Risk factor descriptions per row, in reporting order
+        """
+        factor_mask = np.asarray(factor_mask)
+        risk_factors = [[] for _ in range(len(factor_mask))]
+        for i, (message, positions) in enumerate(zip(self.factor_messages, self._message_inputs)):
+            rows = np.flatnonzero(factor_mask & (1 << i))
+            if not len(rows):
+                continue
+            rows = rows.tolist()
+            if not positions:
+                for row in rows:
+                    risk_factors[row].append(message)
+                continue
+            quoted = [np.asarray(values[p])[rows].tolist() for p in positions]
+            rendered = {}
+            for row, key in zip(rows, zip(*quoted)):
+                text = rendered.get(key)
+                if text is None:
+                    text = rendered[key] = message.format_map({
+                        self._names[p]: _whole(value) if self._numeric[p] else value
+                        for p, value in zip(positions, key)
+                    })
+                risk_factors[row].append(text)
+        return risk_factors
+    
+    def score_columns(self, columns: Dict[str, np.ndarray]) -> RuleScores:
+        """
+        Score whole arrays of transactions with the same rules as score
+        
+        Args:
+            columns: Column arrays keyed by transaction field
+        
+        Returns:
+            RuleScores with score, risk level, factor mask, the case chosen by
+            each rule and the (mapped) input values
+        """
+        values = {}
+        for rule_input in self.inputs:
+            column = columns[rule_input.field]
+            if rule_input.scores is not None:
+                dtype = np.int64 if rule_input.dtype is int else np.float64
+                values[rule_input.name] = encode_labels(column, rule_input.scores, rule_input.unknown_score, dtype)
+            else:
+                values[rule_input.name] = np.asarray(column, dtype=np.float64)
+        
+        if self.table is not None and self._tabulable(values):
+            score, level, factor_mask, cases = self._lookup_columns(values)
+        else:
+            score, level, factor_mask, cases = self._evaluate(values)
+        return RuleScores(
+            score=score,
+            risk_level=self._level_array[level],
+            factor_mask=factor_mask,
+            cases={rule.name: case for rule, case in zip(self.rules, cases)},
+            values=values
+        )
+    
+    @staticmethod
+    def _tabulable(values: Dict[str, np.ndarray]) -> bool:
+        """Whether columns can be bucketed into the table (1-D, equal length, no NaN or inf)"""
+        shapes = {value.shape for value in values.values()}
+        return len(shapes) == 1 and len(next(iter(shapes))) == 1 and all(
+            np.isfinite(value).all() for value in values.values()
+        )
+    
+    def _lookup_columns(self, values: Dict[str, np.ndarray]) -> Tuple:
+        """
+        Score columns by bucketing each input and gathering from the lookup table
         
-        logger.info(f"Rule-based risk assessment: Score={risk_score}, Level={risk_level}, Factors={len(risk_factors)}")
+        Same result as the evaluator, (score, level index, factor mask, case
+        index per rule), without evaluating any rule.
+        """
+        offset = None
+        for name, stride, domain, cuts, classes in self._table_axes:
+            column = values[name]
+            if domain is not None:
+                bucket = np.searchsorted(domain, column)
+            else:
+                bucket = np.searchsorted(cuts[0], column, 'right') + np.searchsorted(cuts[1], column, 'left')
+            axis = classes[bucket] * stride
+            offset = axis if offset is None else offset + axis
+        score = self.table.score.ravel()[offset]
+        return (score, np.digitize(score, self.level_bounds), self.table.factor_mask.ravel()[offset],
+                [case[offset] for case in self.table.cases])
+    
+    def detail_columns(self, scores: RuleScores) -> Tuple[List[str], List[List[Any]]]:
+        """
+        The rule-specific entries of the risk details, column-wise
+        
+        Args:
+            scores: Output of score_columns
+        
+        Returns:
+            Tuple of (detail keys, one list of per-row values per key); the
+            score, level and risk factor entries are not included
+        """
+        keys, details = [], []
+        for key, detail_input, index, _ in self._details:
+            keys.append(key)
+            if detail_input is None:
+                details.append(self._case_labels(index)[scores.cases[self.rules[index].name]].tolist())
+            else:
+                details.append(scores.values[detail_input].tolist())
+        return keys, details
+    
+    def score_batch(self, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        """
+        Vectorized equivalent of score for a whole batch
+        
+        Args:
+            columns: Column arrays keyed by transaction field
+        
+        Returns:
+            Tuple of (risk_scores array, list of per-transaction risk_details)
+        """
+        scores = self.score_columns(columns)
+        risk_factors = self.render_factor_columns(
+            scores.factor_mask, [columns[rule_input.field] for rule_input in self.inputs]
+        )
+        
+        keys, details = self.detail_columns(scores)
+        keys += ['total_risk_score', 'risk_level', 'risk_factors', 'risk_factor_count']
+        details += [scores.score.tolist(), scores.risk_level.tolist(), risk_factors, map(len, risk_factors)]
+        
+        return scores.score, [dict(zip(keys, row)) for row in zip(*details)]
+
+
+class RuleBasedRiskEngine:
+    """
+    Rule-based risk assessment engine that evaluates transaction risk
+    based on business logic and domain expertise
+    
+    The rules are loaded from a rules file into a RuleSet. Reloading compiles
+    the new file off to the side and then replaces ``self.rules`` in a single
+    assignment; in-flight requests keep the RuleSet they started with and are
+    never blocked.
+    
+    Each process holds its own RuleSet. Processes that did not handle a
+    reload follow the rules file through sync_with_rules_file, which
+    recompiles it whenever its modification time changes.
+    """
+    
+    def __init__(self, rules_path: Optional[str] = None):
+        self.rules_path = rules_path or settings.RULES_PATH
+        self._reload_lock = threading.Lock()
+        self._rules_mtime = _mtime(self.rules_path)
+        self._rules_checked = time.monotonic()
+        self.rules = RuleSet.from_file(self.rules_path)
+        logger.info(f"Loaded rules version {self.rules.version} from {self.rules_path}")
+    
+    def reload_rules(self, rules_path: Optional[str] = None) -> RuleSet:
+        """
+        Recompile the rules file and atomically switch to it
+        
+        On any error the current rules stay active and the error is raised.
+        
+        Args:
+            rules_path: Rules file to load (defaults to the current one)
+        
+        Returns:
+            The newly active RuleSet
+        """
+        with self._reload_lock:
+            path = rules_path or self.rules_path
+            # Taken before reading, so a write racing the read is picked up by the next sync
+            mtime = _mtime(path)
+            rules = RuleSet.from_file(path)
+            self.rules = rules
+            self.rules_path = path
+            self._rules_mtime = mtime
+        logger.info(f"Reloaded rules version {rules.version} from {path}")
+        return rules
+    
+    def sync_with_rules_file(self) -> bool:
+        """
+        Follow changes to the rules file made or reloaded through other processes
+        
+        An invalid file is logged and the current rules stay active until the
+        file changes again.
+        
+        Returns:
+            True if a new rule set was swapped in
+        """
+        self._rules_checked = time.monotonic()
+        mtime = _mtime(self.rules_path)
+        if mtime == self._rules_mtime:
+            return False
+        try:
+            self.reload_rules()
+        except (ValueError, OSError) as e:
+            self._rules_mtime = mtime
+            logger.error(f"Keeping rules version {self.rules.version}: {str(e)}")
+            return False
+        return True
+    
+    def sync_with_rules_file_if_due(self):
+        """sync_with_rules_file at most once per RULES_POLL_SECONDS (for pool worker processes)"""
+        interval = settings.RULES_POLL_SECONDS
+        if interval > 0 and time.monotonic() - self._rules_checked >= interval:
+            self.sync_with_rules_file()
+    
+    def load_rules(self, spec: Dict[str, Any]) -> RuleSet:
+        """
+        Compile an in-memory rules specification and atomically switch to it
+        
+        Args:
+            spec: Parsed rules specification (same layout as the rules file)
+        
+        Returns:
+            The newly active RuleSet
+        """
+        with self._reload_lock:
+            rules = RuleSet(spec)
+            self.rules = rules
+        logger.info(f"Loaded rules version {rules.version}")
+        return rules
+    
+    def calculate_rule_risk_score(self, transaction_data: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Calculate rule-based risk score and return detailed risk factors
+        
+        Args:
+            transaction_data: Dictionary containing transaction details
+        
+        Returns:
+            Tuple of (risk_score, risk_details)
+        """
+        risk_score, risk_details = self.rules.score(transaction_data)
+        
+        logger.info(f"Rule-based risk assessment: Score={risk_score}, Level={risk_details['risk_level']}, "
+                    f"Factors={risk_details['risk_factor_count']}")
         
         return risk_score, risk_details
     
+    def _interpret_rule_risk_score(self, transaction_data: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Reference evaluation of the active rules, see RuleSet.interpret"""
+        return self.rules.interpret(transaction_data)
+    
     def should_block_transaction(self, rule_risk_score: int, ml_fraud_prob: float, 
                                 anomaly_detected: bool, ml_threshold: float = 0.35) -> Tuple[bool, str]:
         """
@@ -238,7 +918,7 @@ class RuleBasedRiskEngine:
             ml_fraud_prob: ML model fraud probability (0-1)
             anomaly_detected: Whether anomaly was detected
             ml_threshold: ML fraud threshold
-            
+        
         Returns:
             Tuple of (should_block, reason)
         """
@@ -273,7 +953,109 @@ class RuleBasedRiskEngine:
         
         # DEFAULT: Allow transaction
         return False, "APPROVED"
+    
+    def score_arrays(self, amount, location, hour, age, velocity, merchant, txn_type) -> RuleScores:
+        """
+        Score whole arrays of transactions with the same rules as calculate_rule_risk_score
+        
+        Args:
+            amount: Transaction amounts
+            location: Location risk labels
+            hour: Hours of day (0-23)
+            age: Customer account ages in days
+            velocity: Daily transaction counts
+            merchant: Merchant type labels
+            txn_type: Transaction type labels
+        
+        Returns:
+            RuleScores from RuleSet.score_columns; render factor masks with
+            render_risk_factors
+        """
+        return self.rules.score_columns({
+            'Amount': amount,
+            'location_risk': location,
+            'hour_of_day': hour,
+            'customer_age_days': age,
+            'daily_transactions': velocity,
+            'merchant_type': merchant,
+            'transaction_type': txn_type
+        })
+    
+    def render_risk_factors(self, factor_mask: int, amount: float = 0, hour: int = 12, age: int = 365,
+                            velocity: int = 3, merchant_type: str = 'Other',
+                            transaction_type: str = 'Purchase') -> List[str]:
+        """
+        Render the risk factor messages for one transaction's factor mask
+        
+        Args:
+            factor_mask: Bitmask from score_arrays
+            amount, hour, age, velocity, merchant_type, transaction_type: Values quoted in the messages
+        
+        Returns:
+            List of risk factor descriptions in reporting order
+        """
+        rules = self.rules
+        named = {'amount': amount, 'hour': hour, 'age': age, 'velocity': velocity,
+                 'merchant_type': merchant_type, 'transaction_type': transaction_type}
+        values = [named.get(rule_input.name, rule_input.default) for rule_input in rules.inputs]
+        return rules.render_risk_factors(factor_mask, values)
+    
+    def calculate_rule_risk_scores_batch(self, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        """
+        Vectorized equivalent of calculate_rule_risk_score for a whole batch
+        
+        Args:
+            columns: Column arrays as produced by services.columnar.user_friendly_columns
+        
+        Returns:
+            Tuple of (risk_scores array, list of per-transaction risk_details)
+        """
+        risk_scores, risk_details = self.rules.score_batch(columns)
+        
+        logger.info(f"Rule-based risk assessment: Scored batch of {len(risk_scores)} transactions")
+        
+        return risk_scores, risk_details
+    
+    def should_block_transactions(self, rule_risk_scores: np.ndarray, ml_fraud_probs: np.ndarray,
+                                  anomalies_detected: np.ndarray, ml_threshold: float = 0.35) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized equivalent of should_block_transaction
+        
+        Args:
+            rule_risk_scores: Rule-based risk scores (0-10)
+            ml_fraud_probs: ML model fraud probabilities (0-1)
+            anomalies_detected: Anomaly flags
+            ml_threshold: ML fraud threshold
+        
+        Returns:
+            Tuple of (should_block array, reason array)
+        """
+        ml_prob_pct = np.asarray(ml_fraud_probs) * 100
+        rule_risk_scores = np.asarray(rule_risk_scores)
+        anomalies_detected = np.asarray(anomalies_detected, dtype=bool)
+        
+        # Conditions are evaluated in the same precedence as should_block_transaction
+        conditions = [
+            rule_risk_scores >= 8,
+            ml_prob_pct >= 80,
+            (rule_risk_scores >= 6) & (ml_prob_pct >= 40),
+            ml_prob_pct >= 70,
+            (rule_risk_scores >= 4) & (ml_prob_pct >= 60),
+            anomalies_detected & ((rule_risk_scores >= 3) | (ml_prob_pct >= 50)),
+            (ml_prob_pct >= (ml_threshold * 100)) & (rule_risk_scores >= 0),
+        ]
+        reasons = [
+            "CRITICAL_RULE_RISK",
+            "CRITICAL_ML_RISK",
+            "HIGH_COMBINED_RISK",
+            "HIGH_ML_RISK",
+            "MEDIUM_RULE_WITH_HIGH_ML",
+            "ANOMALY_WITH_RISK_FACTORS",
+            "ML_THRESHOLD_EXCEEDED",
+        ]
+        block_reason = np.select(conditions, reasons, "APPROVED")
+        return block_reason != "APPROVED", block_reason
 
 
 # Global instance
-rule_engine = RuleBasedRiskEngine()
\ No newline at end of file
+rule_engine = RuleBasedRiskEngine()
@@ -0,0 +1,234 @@
+"""
+Streaming Transaction Scoring
+Incremental NDJSON and CSV parsing and fixed-size chunk scoring for unbounded transaction feeds
+
+Input is read in chunks of settings.STREAM_CHUNK_ROWS rows (NDJSON lines
+split out of the byte stream as it arrives, or CSV rows read with fixed
+column types) and each chunk is validated into column arrays and scored
+in one vectorized call. Only one chunk of input and one chunk of results
+are held at a time, so memory stays bounded whatever the size of the feed.
+"""
+import csv
+import io
+import json
+import logging
+from typing import IO, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.feature_service import V_FEATURE_COLUMNS
+from services.ml_service import ml_service
+
+logger = logging.getLogger(__name__)
+
+# Raw input columns in the order they are parsed
+TRANSACTION_COLUMNS = ["Time", "Amount"] + V_FEATURE_COLUMNS
+
+# Fixed CSV column types: no per-chunk type inference, and V1-V28 at the
+# float32 precision both tree models compare features at
+CSV_DTYPES = {"Time": np.float64, "Amount": np.float64, **{name: np.float32 for name in V_FEATURE_COLUMNS}}
+
+# Columns of CSV results, in order
+CSV_RESULT_COLUMNS = [
+    "transaction_id", "fraud_probability", "anomaly_detected", "risk_score", "threshold_used",
+    "final_decision", "confidence", "explanation", "timestamp", "model_version"
+]
+
+# Result formats of chunk scoring and their media types
+RESULT_MEDIA_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class LineTooLongError(ValueError):
+    """An input line exceeded the configured maximum length"""
+
+
+async def iter_lines(chunks: AsyncIterable[bytes], max_line_bytes: int) -> AsyncIterator[bytes]:
+    """
+    Split a byte stream into lines as it arrives
+
+    Args:
+        chunks: Byte chunks, e.g. Request.stream()
+        max_line_bytes: Longest line accepted
+
+    Yields:
+        Each line without its terminator (blank lines included, so callers can count lines)
+
+    Raises:
+        LineTooLongError: If a line grows past max_line_bytes
+    """
+    pending = b""
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        if len(pending) > max_line_bytes:
+            raise LineTooLongError(f"Line longer than {max_line_bytes} bytes")
+        for line in lines:
+            if len(line) > max_line_bytes:
+                raise LineTooLongError(f"Line longer than {max_line_bytes} bytes")
+            yield line
+    if pending:
+        yield pending
+
+
+def parse_ndjson_chunk(lines: List[bytes]) -> Tuple[np.ndarray, np.ndarray, Dict[int, str]]:
+    """
+    Validate a chunk of NDJSON transactions into one column array
+
+    Each line must be an object with numeric Time and Amount (>= 0); V1-V28
+    are optional and default to 0.0, as in TransactionRequest. Blank lines
+    are skipped.
+
+    Args:
+        lines: Raw lines
+
+    Returns:
+        Tuple of (values, rows, errors): a (K, 30) float64 array in
+        TRANSACTION_COLUMNS order for the K valid lines, the index within
+        lines of each of them, and error messages by line index
+    """
+    values = np.empty((len(lines), len(TRANSACTION_COLUMNS)))
+    rows, errors = [], {}
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+            get = record.get
+            values[len(rows)] = [record["Time"], record["Amount"]] + [get(name, 0.0) for name in V_FEATURE_COLUMNS]
+            rows.append(i)
+        except KeyError as e:
+            errors[i] = f"missing field {e.args[0]}"
+        except (ValueError, TypeError) as e:
+            errors[i] = f"invalid transaction: {str(e)}"
+
+    values, rows = values[:len(rows)], np.asarray(rows, dtype=np.int64)
+    # Range checks on whole columns rather than per field
+    negative = (values[:, 0] < 0) | (values[:, 1] < 0)
+    if negative.any():
+        for i in rows[negative].tolist():
+            errors[i] = "Time and Amount must be non-negative"
+        values, rows = values[~negative], rows[~negative]
+    return values, rows, errors
+
+
+def score_ndjson_chunk(lines: List[bytes], first_line: int, threshold: Optional[float] = None) -> bytes:
+    """
+    Parse and score one chunk of NDJSON transactions
+
+    Module-level so it can run on any inference executor, including a
+    process pool.
+
+    Args:
+        lines: Raw lines
+        first_line: 1-based line number of lines[0] in the whole input
+        threshold: Custom fraud threshold (optional)
+
+    Returns:
+        NDJSON results, one per non-blank line, in input order. Each carries
+        the input line number as transaction_id; invalid lines get an
+        error message instead of a prediction.
+    """
+    values, rows, errors = parse_ndjson_chunk(lines)
+    results = iter(ml_service.predict_arrays(values[:, 0], values[:, 1], values[:, 2:], threshold)
+                   if len(rows) else [])
+    valid = set(rows.tolist())
+
+    out = []
+    for i, line in enumerate(lines):
+        if i in valid:
+            result = next(results)
+        elif i in errors:
+            result = {"error": errors[i]}
+        else:
+            continue
+        result["transaction_id"] = first_line + i
+        out.append(json.dumps(result))
+    return ("\n".join(out) + "\n").encode() if out else b""
+
+
+def open_csv_chunks(file: IO, chunk_rows: int) -> "pd.io.parsers.TextFileReader":
+    """
+    Check a CSV file's header and read it back in chunks
+
+    Args:
+        file: Seekable CSV file object (text or binary)
+        chunk_rows: Rows per chunk
+
+    Returns:
+        Iterator of DataFrames holding TRANSACTION_COLUMNS with CSV_DTYPES
+
+    Raises:
+        ValueError: If required columns are missing
+        pd.errors.EmptyDataError: If the file is empty
+    """
+    header = pd.read_csv(file, nrows=0)
+    missing = [column for column in TRANSACTION_COLUMNS if column not in header.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+    file.seek(0)
+    return pd.read_csv(file, usecols=TRANSACTION_COLUMNS, dtype=CSV_DTYPES, chunksize=chunk_rows)
+
+
+def csv_chunk_columns(chunk: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Time, Amount and (N, 28) V1-V28 arrays of a chunk from open_csv_chunks"""
+    return (chunk["Time"].to_numpy(), chunk["Amount"].to_numpy(),
+            chunk[V_FEATURE_COLUMNS].to_numpy(dtype=np.float32))
+
+
+def format_results(results: List[Dict], output_format: str) -> bytes:
+    """
+    Serialize prediction results for a streamed response
+
+    Args:
+        results: Prediction results
+        output_format: "ndjson" (one object per line), "json" (comma-separated
+            objects, to go inside an array) or "csv" (CSV_RESULT_COLUMNS rows, no header)
+
+    Returns:
+        Encoded results
+    """
+    if output_format == "ndjson":
+        return "".join(json.dumps(result) + "\n" for result in results).encode()
+    if output_format == "json":
+        return ",".join(json.dumps(result) for result in results).encode()
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_RESULT_COLUMNS, extrasaction="ignore", lineterminator="\n")
+    writer.writerows(results)
+    return buffer.getvalue().encode()
+
+
+def csv_result_header() -> bytes:
+    """Header line of CSV results"""
+    return (",".join(CSV_RESULT_COLUMNS) + "\n").encode()
+
+
+def score_columns_chunk(time: np.ndarray, amount: np.ndarray, v_features: np.ndarray, first_id: int,
+                        threshold: Optional[float], output_format: str) -> Tuple[bytes, int]:
+    """
+    Score one chunk of column arrays and serialize the results
+
+    Module-level so it can run on any inference executor, including a
+    process pool.
+
+    Args:
+        time: Transaction times, shape (N,)
+        amount: Transaction amounts, shape (N,)
+        v_features: V1-V28 values, shape (N, 28)
+        first_id: transaction_id of the first row
+        threshold: Custom fraud threshold (optional)
+        output_format: See format_results
+
+    Returns:
+        Tuple of (encoded results, number of FRAUD decisions)
+    """
+    results = ml_service.predict_arrays(time, amount, v_features, threshold)
+    fraud_count = 0
+    for i, result in enumerate(results):
+        result["transaction_id"] = first_id + i
+        fraud_count += result["final_decision"] == "FRAUD"
+    return format_results(results, output_format), fraud_count
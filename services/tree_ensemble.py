@@ -0,0 +1,388 @@
+"""
+Compiled Tree-Ensemble Evaluator
+Evaluates a binary LightGBM model from flat NumPy arrays, without calling LightGBM
+"""
+import logging
+import marshal
+import math
+import sys
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per block by the bitmask evaluator (keeps the mask blocks in cache)
+EVAL_BLOCK_ROWS = 256
+
+
+class TreeCompilationError(ValueError):
+    """Raised when a model uses features the compiled evaluator does not support"""
+
+
+class CompiledTreeEnsemble:
+    """
+    A binary LightGBM model compiled into flat arrays
+
+    Nodes of all trees are stored in flat arrays (split feature, threshold,
+    left and right child). A negative child ``~i`` refers to leaf ``i`` of
+    ``leaf_value``. Two evaluators are built from them:
+
+    - ``predict``: batch scoring with per-feature threshold search and
+      precomputed per-tree leaf bitmasks (the QuickScorer scheme), which visits
+      every split once per row instead of walking each tree.
+    - ``predict_row``: one row through a generated straight-line function
+      with the thresholds inlined.
+
+    Both add tree outputs in LightGBM's order, so results match
+    ``Booster.predict`` to floating-point rounding.
+    """
+
+    def __init__(self, split_feature: np.ndarray, threshold: np.ndarray, left_child: np.ndarray,
+                 right_child: np.ndarray, leaf_value: np.ndarray, tree_root: np.ndarray,
+                 num_features: int, sigmoid: float = 1.0):
+        """
+        Args:
+            split_feature: Feature index of each split node
+            threshold: Threshold of each split node (left when value <= threshold)
+            left_child: Left child of each split node (``~leaf`` for leaves)
+            right_child: Right child of each split node (``~leaf`` for leaves)
+            leaf_value: Output of each leaf; each tree's leaves are contiguous, left to right
+            tree_root: Root node of each tree (``~leaf`` for single-leaf trees)
+            num_features: Number of model input columns
+            sigmoid: Sigmoid parameter of the binary objective
+        """
+        self.split_feature = np.asarray(split_feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left_child = np.asarray(left_child, dtype=np.int32)
+        self.right_child = np.asarray(right_child, dtype=np.int32)
+        self.leaf_value = np.asarray(leaf_value, dtype=np.float64)
+        self.tree_root = np.asarray(tree_root, dtype=np.int32)
+        self.num_features = num_features
+        self.sigmoid = sigmoid
+
+        self._build_bitmask_tables()
+        self._predict_raw_row = self._compile_row_scorer()
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        All arrays the evaluators use, precomputed tables included
+
+        Returns:
+            Mapping of array name to array, for ``from_arrays``
+        """
+        threshold_offsets = np.cumsum([0] + [len(t) for t in self._feature_thresholds])
+        return {
+            "split_feature": self.split_feature,
+            "threshold": self.threshold,
+            "left_child": self.left_child,
+            "right_child": self.right_child,
+            "leaf_value": self.leaf_value,
+            "tree_root": self.tree_root,
+            "tree_leaf_start": self._tree_leaf_start,
+            "feature_threshold_offsets": threshold_offsets.astype(np.int64),
+            "feature_thresholds": np.concatenate(self._feature_thresholds),
+            "feature_tables": np.concatenate(self._feature_tables),
+            "row_scorer_code": np.frombuffer(marshal.dumps(self._row_scorer_code), dtype=np.uint8),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], num_features: int, sigmoid: float,
+                    code_tag: Optional[str] = None) -> "CompiledTreeEnsemble":
+        """
+        Rebuild an ensemble from ``to_arrays`` output without recomputing anything
+
+        The arrays are used as given (they may be read-only memory maps).
+
+        Args:
+            arrays: Output of ``to_arrays``
+            num_features: Number of model input columns
+            sigmoid: Sigmoid parameter of the binary objective
+            code_tag: ``sys.implementation.cache_tag`` of the interpreter that
+                wrote ``row_scorer_code``; the scorer is regenerated if it differs
+
+        Returns:
+            Compiled ensemble
+        """
+        ensemble = cls.__new__(cls)
+        ensemble.split_feature = arrays["split_feature"]
+        ensemble.threshold = arrays["threshold"]
+        ensemble.left_child = arrays["left_child"]
+        ensemble.right_child = arrays["right_child"]
+        ensemble.leaf_value = arrays["leaf_value"]
+        ensemble.tree_root = arrays["tree_root"]
+        ensemble.num_features = num_features
+        ensemble.sigmoid = sigmoid
+
+        # Per-feature views into the concatenated tables (rows: splits + 1)
+        offsets = arrays["feature_threshold_offsets"].tolist()
+        thresholds, tables = arrays["feature_thresholds"], arrays["feature_tables"]
+        ensemble._mask_dtype = tables.dtype.type
+        ensemble._tree_leaf_start = arrays["tree_leaf_start"]
+        ensemble._feature_thresholds = [thresholds[offsets[f]:offsets[f + 1]] for f in range(num_features)]
+        ensemble._feature_tables = [tables[offsets[f] + f:offsets[f + 1] + f + 1] for f in range(num_features)]
+
+        code = None
+        if code_tag == sys.implementation.cache_tag and "row_scorer_code" in arrays:
+            code = marshal.loads(arrays["row_scorer_code"].tobytes())
+        ensemble._predict_raw_row = ensemble._compile_row_scorer(code)
+        return ensemble
+
+    @classmethod
+    def from_model_dump(cls, dump: Dict[str, Any]) -> "CompiledTreeEnsemble":
+        """
+        Parse ``Booster.dump_model()`` output into flat arrays
+
+        Args:
+            dump: Model dump of a binary LightGBM model
+
+        Returns:
+            Compiled ensemble
+
+        Raises:
+            TreeCompilationError: For multiclass models, averaged outputs,
+                categorical splits or missing-value handling other than "None"
+        """
+        objective = str(dump.get("objective", ""))
+        if dump.get("num_class", 1) != 1 or not objective.startswith("binary"):
+            raise TreeCompilationError(f"Only binary models are supported (objective {objective!r})")
+        if dump.get("average_output"):
+            raise TreeCompilationError("Averaged tree outputs (random forest mode) are not supported")
+        sigmoid = 1.0
+        for token in objective.split()[1:]:
+            if token.startswith("sigmoid:"):
+                sigmoid = float(token.split(":", 1)[1])
+
+        split_feature: List[int] = []
+        threshold: List[float] = []
+        left_child: List[int] = []
+        right_child: List[int] = []
+        leaf_value: List[float] = []
+
+        def add(node: Dict[str, Any]) -> int:
+            if "split_index" not in node:
+                leaf_value.append(node["leaf_value"])
+                return ~(len(leaf_value) - 1)
+            if node["decision_type"] != "<=":
+                raise TreeCompilationError(f"Unsupported split type {node['decision_type']!r}")
+            if node["missing_type"] != "None":
+                raise TreeCompilationError(f"Unsupported missing value handling {node['missing_type']!r}")
+            index = len(split_feature)
+            split_feature.append(node["split_feature"])
+            threshold.append(node["threshold"])
+            left_child.append(0)
+            right_child.append(0)
+            left_child[index] = add(node["left_child"])
+            right_child[index] = add(node["right_child"])
+            return index
+
+        tree_root = [add(tree["tree_structure"]) for tree in dump["tree_info"]]
+        return cls(split_feature, threshold, left_child, right_child, leaf_value, tree_root,
+                   num_features=dump["max_feature_idx"] + 1, sigmoid=sigmoid)
+
+    @classmethod
+    def from_booster(cls, booster) -> "CompiledTreeEnsemble":
+        """Compile a ``lightgbm.Booster`` (e.g. ``LGBMClassifier.booster_``)"""
+        return cls.from_model_dump(booster.dump_model())
+
+    @property
+    def num_trees(self) -> int:
+        return len(self.tree_root)
+
+    def _tree_nodes(self, root: int) -> List[int]:
+        """Split nodes of one tree, in depth-first order"""
+        nodes, stack = [], [root]
+        while stack:
+            node = stack.pop()
+            if node >= 0:
+                nodes.append(node)
+                stack.extend((self.right_child[node], self.left_child[node]))
+        return nodes
+
+    def _build_bitmask_tables(self):
+        """
+        Precompute the bitmask evaluator's per-feature tables
+
+        Bit i of a tree's mask stands for its i-th leaf. A split that sends a
+        row right rules out every leaf of its left subtree. Sorting each
+        feature's splits by threshold, the splits a value sends right are a
+        prefix of that order, so the combined mask of every prefix is stored:
+        ``_feature_tables[f][k]`` holds all trees' masks after the first ``k``
+        splits on feature ``f``. ANDing one row per feature leaves the exit
+        leaf as the lowest set bit.
+        """
+        num_trees = self.num_trees
+        tree_leaf_start = np.empty(num_trees, dtype=np.int64)
+        tree_leaf_count = np.empty(num_trees, dtype=np.int64)
+        # Leaf range [first, last) under each split node
+        left_leaves = {}
+
+        def leaf_range(node: int):
+            if node < 0:
+                return ~node, ~node + 1
+            first, middle = leaf_range(self.left_child[node])
+            _, last = leaf_range(self.right_child[node])
+            left_leaves[node] = (first, middle)
+            return first, last
+
+        split_tree = np.empty(len(self.split_feature), dtype=np.int64)
+        for tree, root in enumerate(self.tree_root.tolist()):
+            first, last = leaf_range(root)
+            tree_leaf_start[tree] = first
+            tree_leaf_count[tree] = last - first
+            split_tree[self._tree_nodes(root)] = tree
+
+        max_leaves = int(tree_leaf_count.max()) if num_trees else 1
+        if max_leaves > 64:
+            raise TreeCompilationError(f"Trees with more than 64 leaves are not supported ({max_leaves})")
+        mask_dtype = np.uint32 if max_leaves <= 32 else np.uint64
+        all_leaves = np.iinfo(mask_dtype).max
+
+        self._mask_dtype = mask_dtype
+        self._feature_thresholds = []
+        self._feature_tables = []
+        for feature in range(self.num_features):
+            nodes = np.flatnonzero(self.split_feature == feature)
+            nodes = nodes[np.argsort(self.threshold[nodes], kind="stable")]
+            table = np.empty((len(nodes) + 1, num_trees), dtype=mask_dtype)
+            masks = np.full(num_trees, all_leaves, dtype=mask_dtype)
+            table[0] = masks
+            for k, node in enumerate(nodes.tolist(), start=1):
+                tree = split_tree[node]
+                first, middle = left_leaves[node]
+                first -= tree_leaf_start[tree]
+                middle -= tree_leaf_start[tree]
+                masks[tree] &= mask_dtype(all_leaves ^ (((1 << (middle - first)) - 1) << first))
+                table[k] = masks
+            self._feature_thresholds.append(self.threshold[nodes])
+            self._feature_tables.append(table)
+        self._tree_leaf_start = tree_leaf_start
+
+    def _compile_row_scorer(self, code=None):
+        """
+        Generate a straight-line function summing the trees' outputs for one row
+
+        Args:
+            code: Previously compiled code of the function (skips generation)
+        """
+        if code is None:
+            code = self._generate_row_scorer()
+        self._row_scorer_code = code
+        namespace: Dict[str, Any] = {}
+        exec(code, namespace)
+        return namespace["predict_raw_row"]
+
+    def _generate_row_scorer(self):
+        """Source of the row scorer, compiled"""
+        split_feature = self.split_feature.tolist()
+        threshold = self.threshold.tolist()
+        left_child = self.left_child.tolist()
+        right_child = self.right_child.tolist()
+        leaf_value = self.leaf_value.tolist()
+        # Unpack the row into locals once; comparisons then avoid indexing
+        names = [f"x{feature}" for feature in range(self.num_features)]
+        lines = ["def predict_raw_row(x):", f"    {', '.join(names)}, = x", "    score = 0.0"]
+
+        def emit(node: int, indent: str):
+            if node < 0:
+                lines.append(f"{indent}score += {leaf_value[~node]!r}")
+                return
+            lines.append(f"{indent}if {names[split_feature[node]]} <= {threshold[node]!r}:")
+            emit(left_child[node], indent + "    ")
+            lines.append(f"{indent}else:")
+            emit(right_child[node], indent + "    ")
+
+        for root in self.tree_root.tolist():
+            emit(root, "    ")
+        lines.append("    return score")
+        return compile("\n".join(lines), "<compiled tree ensemble>", "exec")
+
+    def _raw_block(self, X: np.ndarray) -> np.ndarray:
+        """Raw scores for one block of rows (bitmask evaluator)"""
+        masks = None
+        for feature, (thresholds, table) in enumerate(zip(self._feature_thresholds, self._feature_tables)):
+            if not len(thresholds):
+                continue
+            # Number of this feature's splits each row goes right at (threshold < value)
+            rows = table.take(np.searchsorted(thresholds, X[:, feature], side="left"), axis=0)
+            if masks is None:
+                masks = rows
+            else:
+                masks &= rows
+        if masks is None:
+            masks = np.full((len(X), self.num_trees), np.iinfo(self._mask_dtype).max, dtype=self._mask_dtype)
+
+        # Lowest set bit is the exit leaf; log2 of a power of two is exact
+        exit_bits = masks & (~masks + self._mask_dtype(1))
+        leaves = np.log2(exit_bits).astype(np.int64) + self._tree_leaf_start
+        return self.leaf_value.take(leaves).sum(axis=1)
+
+    def predict_raw(self, X: np.ndarray) -> np.ndarray:
+        """
+        Raw scores (sum of tree outputs) for a batch
+
+        Args:
+            X: Array of shape (N, num_features)
+
+        Returns:
+            Array of N raw scores
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.num_features:
+            raise ValueError(f"Expected an array of shape (N, {self.num_features}), got {X.shape}")
+        # Missing values are treated as zero (missing_type "None")
+        if np.isnan(X).any():
+            X = np.where(np.isnan(X), 0.0, X)
+        if len(X) <= EVAL_BLOCK_ROWS:
+            return self._raw_block(X)
+        return np.concatenate([
+            self._raw_block(X[start:start + EVAL_BLOCK_ROWS]) for start in range(0, len(X), EVAL_BLOCK_ROWS)
+        ])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Probabilities of the positive class for a batch, like ``Booster.predict``
+
+        Args:
+            X: Array of shape (N, num_features)
+
+        Returns:
+            Array of N probabilities
+        """
+        return 1.0 / (1.0 + np.exp(-self.sigmoid * self.predict_raw(X)))
+
+    def predict_row(self, row) -> float:
+        """
+        Probability of the positive class for one row (generated scorer)
+
+        Args:
+            row: Sequence (or 1-D array) of num_features values
+
+        Returns:
+            Probability as a float
+        """
+        values = row.tolist() if isinstance(row, np.ndarray) else list(row)
+        if len(values) != self.num_features:
+            raise ValueError(f"Expected {self.num_features} values, got {len(values)}")
+        total = sum(values)
+        if total != total:  # Some value is NaN (or +inf and -inf): treat NaN as zero
+            values = [0.0 if value != value else value for value in values]
+        return 1.0 / (1.0 + math.exp(-self.sigmoid * self._predict_raw_row(values)))
+
+
+def compile_lightgbm_model(model) -> Optional[CompiledTreeEnsemble]:
+    """
+    Compile an LGBMClassifier or Booster, or return None when unsupported
+
+    Args:
+        model: ``lightgbm.LGBMClassifier`` or ``lightgbm.Booster``
+
+    Returns:
+        Compiled ensemble, or None if the model cannot be compiled
+    """
+    booster = getattr(model, "booster_", model)
+    try:
+        return CompiledTreeEnsemble.from_booster(booster)
+    except TreeCompilationError as e:
+        logger.warning(f"Tree ensemble compilation skipped: {str(e)}")
+        return None
@@ -1,6 +1,6 @@
 """
 ULTRA ADVANCED FRAUD DETECTION - ALL IN ONE FILE
-Complete ML-powered fraud detection system with no external dependencies
+Complete ML-powered fraud detection system; risk rules come from config/rules.json
 """
 
 import streamlit as st
@@ -10,6 +10,8 @@ import math
 import hashlib
 import numpy as np
 
+from services.rule_engine import rule_engine
+
 # IMMEDIATE UI RENDERING
 st.set_page_config(
     page_title="SecureGuard AI - Advanced Fraud Detection",
@@ -262,170 +264,6 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# ADVANCED RULE ENGINE CLASS (EMBEDDED)
-class AdvancedRuleEngine:
-    def __init__(self):
-        self.location_risk_scores = {
-            "Low Risk (Home Country)": 0,
-            "Medium Risk (Neighboring)": 1,
-            "High Risk (International)": 2,
-            "Very High Risk (Restricted)": 3
-        }
-        
-        self.merchant_risk_scores = {
-            "ATM": 0, "Grocery Store": 0, "Gas Station": 0,
-            "Restaurant": 1, "Department Store": 1,
-            "Online Retail": 2, "Hotel": 2, "Other": 3
-        }
-    
-    def calculate_rule_risk_score(self, transaction_data):
-        risk_score = 0
-        risk_factors = []
-        
-        amount = transaction_data.get('Amount', 0)
-        location_risk = transaction_data.get('location_risk', 'Low Risk (Home Country)')
-        hour_of_day = transaction_data.get('hour_of_day', 12)
-        customer_age_days = transaction_data.get('customer_age_days', 365)
-        daily_transactions = transaction_data.get('daily_transactions', 3)
-        merchant_type = transaction_data.get('merchant_type', 'Other')
-        
-        # Amount-based risk (TIERED)
-        if amount >= 100000:
-            risk_score += 4
-            risk_factors.append(f"Very high transaction amount (${amount:,.2f})")
-        elif amount >= 50000:
-            risk_score += 3
-            risk_factors.append(f"High transaction amount (${amount:,.2f})")
-        elif amount >= 20000:
-            risk_score += 2
-            risk_factors.append(f"Elevated transaction amount (${amount:,.2f})")
-        elif amount >= 10000:
-            risk_score += 1
-            risk_factors.append(f"Moderate transaction amount (${amount:,.2f})")
-        elif amount < 100:
-            risk_score -= 1  # Low amounts reduce risk
-        
-        # Location risk
-        location_score = self.location_risk_scores.get(location_risk, 0)
-        if location_score >= 3:
-            risk_score += 3
-            risk_factors.append("Very high-risk location (restricted)")
-        elif location_score >= 2:
-            risk_score += 2
-            risk_factors.append("High-risk location (international)")
-        elif location_score >= 1:
-            risk_score += 1
-            risk_factors.append("Medium-risk location (neighboring)")
-        else:
-            risk_score -= 1  # Home country reduces risk
-        
-        # Time-based risk
-        if hour_of_day in [1, 2, 3]:
-            risk_score += 2
-            risk_factors.append(f"Very unusual transaction time ({hour_of_day}:00)")
-        elif hour_of_day in [0, 4, 23]:
-            risk_score += 1
-            risk_factors.append(f"Unusual transaction time ({hour_of_day}:00)")
-        elif 9 <= hour_of_day <= 17:
-            risk_score -= 1  # Business hours reduce risk
-        
-        # Customer age risk
-        if customer_age_days <= 7:
-            risk_score += 3
-            risk_factors.append(f"Very new customer account ({customer_age_days} days)")
-        elif customer_age_days <= 30:
-            risk_score += 2
-            risk_factors.append(f"New customer account ({customer_age_days} days)")
-        elif customer_age_days <= 90:
-            risk_score += 1
-            risk_factors.append(f"Relatively new customer account ({customer_age_days} days)")
-        elif customer_age_days >= 365:
-            risk_score -= 1  # Established customer reduces risk
-        
-        # Transaction velocity risk
-        if daily_transactions >= 50:
-            risk_score += 3
-            risk_factors.append(f"Extremely high transaction velocity ({daily_transactions}/day)")
-        elif daily_transactions >= 25:
-            risk_score += 2
-            risk_factors.append(f"Very high transaction velocity ({daily_transactions}/day)")
-        elif daily_transactions >= 15:
-            risk_score += 1
-            risk_factors.append(f"High transaction velocity ({daily_transactions}/day)")
-        elif daily_transactions <= 2:
-            risk_score -= 1  # Low velocity reduces risk
-        
-        # Merchant type risk
-        merchant_score = self.merchant_risk_scores.get(merchant_type, 1)
-        if merchant_score >= 3 and amount >= 5000:
-            risk_score += 1
-            risk_factors.append(f"High-risk merchant type with significant amount ({merchant_type})")
-        elif merchant_score == 0:
-            risk_score -= 1  # Low-risk merchants reduce risk
-        
-        # Combination risk factors
-        if amount >= 50000 and location_score >= 3:
-            risk_score += 2
-            risk_factors.append("Very high amount + restricted location combination")
-        
-        if customer_age_days <= 7 and daily_transactions >= 25:
-            risk_score += 2
-            risk_factors.append("Brand new customer + very high velocity combination")
-        
-        if hour_of_day in [1, 2, 3] and amount >= 20000:
-            risk_score += 1
-            risk_factors.append("Very late hour + high amount combination")
-        
-        # Ensure risk score stays within bounds
-        risk_score = max(0, min(risk_score, 10))
-        
-        # Calculate risk level
-        if risk_score >= 8:
-            risk_level = "CRITICAL"
-        elif risk_score >= 6:
-            risk_level = "HIGH"
-        elif risk_score >= 3:
-            risk_level = "MEDIUM"
-        else:
-            risk_level = "LOW"
-        
-        return risk_score, {
-            'risk_level': risk_level,
-            'risk_factors': risk_factors,
-            'total_risk_score': risk_score
-        }
-    
-    def should_block_transaction(self, rule_risk_score, ml_fraud_prob, anomaly_detected, ml_threshold=0.35):
-        ml_prob_pct = ml_fraud_prob * 100
-        
-        # CRITICAL RISK: Always block
-        if rule_risk_score >= 8:
-            return True, "CRITICAL_RULE_RISK"
-        
-        if ml_prob_pct >= 80:
-            return True, "CRITICAL_ML_RISK"
-        
-        # HIGH RISK: Block with combined evidence
-        if rule_risk_score >= 6 and ml_prob_pct >= 40:
-            return True, "HIGH_COMBINED_RISK"
-        
-        if ml_prob_pct >= 70:
-            return True, "HIGH_ML_RISK"
-        
-        # MEDIUM RISK: Block only with strong ML support
-        if rule_risk_score >= 4 and ml_prob_pct >= 60:
-            return True, "MEDIUM_RULE_WITH_HIGH_ML"
-        
-        # ANOMALY: Block only if combined with other risk factors
-        if anomaly_detected and (rule_risk_score >= 3 or ml_prob_pct >= 50):
-            return True, "ANOMALY_WITH_RISK_FACTORS"
-        
-        # STANDARD ML THRESHOLD: Only if no negative risk factors
-        if ml_prob_pct >= (ml_threshold * 100) and rule_risk_score >= 0:
-            return True, "ML_THRESHOLD_EXCEEDED"
-        
-        return False, "APPROVED"
-
 # ADVANCED FEATURE GENERATOR CLASS (EMBEDDED)
 class AdvancedFeatureGenerator:
     def __init__(self):
@@ -497,7 +335,6 @@ class AdvancedFeatureGenerator:
         return max(0.01, min(0.99, prob))
 
 # INITIALIZE SERVICES
-rule_engine = AdvancedRuleEngine()
 feature_generator = AdvancedFeatureGenerator()
 
 # SIDEBAR
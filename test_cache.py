@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded LRU and ARC caches
+"""
+
+import random
+import threading
+
+from services.cache import ARCCache, LRUCache, make_cache
+
+
+def test_lru_evicts_least_recently_used():
+    """A full LRU cache evicts the entry untouched for longest"""
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get_many(["a", "c"]) == [1, 3]
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+    assert cache.evictions == 1 and len(cache) == 2
+
+
+def test_arc_keeps_frequent_keys_through_a_scan():
+    """One-off keys do not flush keys that recur under ARC"""
+    arc, lru = ARCCache(100), LRUCache(100)
+    for cache in (arc, lru):
+        for _ in range(2):
+            for key in range(50):
+                if cache.get(key) is None:
+                    cache.put(key, key)
+        for key in range(1000, 1200):
+            if cache.get(key) is None:
+                cache.put(key, key)
+    assert all(arc.get(key) == key for key in range(50))
+    assert all(lru.get(key) is None for key in range(50))
+
+
+def test_caches_stay_bounded_under_concurrent_use():
+    """Random concurrent traffic never grows a cache past its size"""
+    for policy in ("lru", "arc"):
+        cache = make_cache(policy, 64)
+
+        def worker(seed):
+            rng = random.Random(seed)
+            for _ in range(5000):
+                key = int(rng.paretovariate(1.2)) if rng.random() < 0.7 else rng.randrange(10000)
+                value = cache.get(key)
+                if value is None:
+                    cache.put(key, key)
+                else:
+                    assert value == key
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        assert stats["size"] <= 64 and stats["hits"] + stats["misses"] == 20000
+        assert stats["hits"] > 0
+    assert make_cache("lru", 0) is None
+
+
+if __name__ == "__main__":
+    print("🧪 Testing caches...")
+    test_lru_evicts_least_recently_used()
+    test_arc_keeps_frequent_keys_through_a_scan()
+    test_caches_stay_bounded_under_concurrent_use()
+    print("✅ LRU and ARC caches behave")
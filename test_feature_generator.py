@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tests for V1-V28 feature generation
+Checks determinism per seed key, thread safety and batch/single agreement
+"""
+
+import threading
+
+import numpy as np
+
+from services.columnar import user_friendly_columns
+from services.feature_generator import (
+    FeatureGenerator, V_FEATURE_DRAWS, V_FEATURE_NAMES, v_feature_draws, v_feature_seed_key
+)
+from services.feature_service import FeatureEngineeringService, MODEL_FEATURES
+
+TRANSACTIONS = [
+    {"Time": 3600.0 * i, "Amount": amount, "merchant_type": merchant, "transaction_type": txn_type,
+     "location_risk": location, "hour_of_day": hour, "customer_age_days": 30 * i + 1, "daily_transactions": i + 1}
+    for i, (amount, merchant, txn_type, location, hour) in enumerate([
+        (25.0, "Grocery Store", "Purchase", "Low Risk (Home Country)", 10),
+        (1500.0, "Online Retail", "Online Payment", "Medium Risk (Neighboring)", 22),
+        (75000.0, "Other", "International", "Very High Risk (Restricted)", 2),
+        (200.0, "ATM", "Cash Withdrawal", "High Risk (International)", 3),
+        (200.0, "ATM", "Cash Withdrawal", "High Risk (International)", 3),
+        (49.99, "Unknown Merchant", "Refund", "Unknown", 0),
+    ])
+]
+
+
+def test_v_features_are_deterministic_per_key():
+    """The same transaction always yields the same features, across instances"""
+    first = [FeatureGenerator().generate_v_features(t) for t in TRANSACTIONS]
+    second = [FeatureGenerator().generate_v_features(t) for t in TRANSACTIONS]
+    assert first == second
+    assert set(first[0]) == {f"V{i}" for i in range(1, 29)}
+    assert all(-5.0 <= value <= 5.0 for features in first for value in features.values())
+
+
+def test_int_and_float_inputs_share_a_key():
+    """Dictionary ints and NumPy floats map to the same seed key"""
+    assert v_feature_seed_key(200, 3, 1, 2, 3) == v_feature_seed_key(200.0, 3, 1, 2, 3.0)
+    generator = FeatureGenerator()
+    assert generator.generate_v_features({"Amount": 200, "hour_of_day": 3}) == \
+        generator.generate_v_features({"Amount": 200.0, "hour_of_day": 3.0})
+
+
+def test_v_features_do_not_touch_global_random_state():
+    """Generating features leaves NumPy's global RNG alone"""
+    generator = FeatureGenerator()
+    np.random.seed(123)
+    expected = np.random.random(3)
+    np.random.seed(123)
+    generator.generate_v_features(TRANSACTIONS[2])
+    assert np.array_equal(np.random.random(3), expected)
+
+
+def test_v_features_are_thread_safe():
+    """Concurrent callers each get the features for their own key"""
+    generator = FeatureGenerator()
+    expected = [generator.generate_v_features(t) for t in TRANSACTIONS]
+    mismatches = []
+
+    def worker(offset):
+        for i in range(300):
+            index = (i + offset) % len(TRANSACTIONS)
+            if generator.generate_v_features(TRANSACTIONS[index]) != expected[index]:
+                mismatches.append(index)
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not mismatches
+
+
+def test_batch_draws_match_single_draws():
+    """Row i of the batch draws equals the draws for transaction i's key"""
+    generator = FeatureGenerator()
+    columns = user_friendly_columns(TRANSACTIONS)
+    draws = generator.generate_v_feature_draws_batch(columns)
+    assert draws.shape == (len(TRANSACTIONS), V_FEATURE_DRAWS)
+    for row, key in zip(draws, generator.v_feature_seed_keys(columns)):
+        assert np.array_equal(row, v_feature_draws(key))
+    assert np.array_equal(draws[3], draws[4])
+    assert not np.array_equal(draws[2], draws[3])
+
+
+def test_batch_features_match_single_features():
+    """generate_v_features_batch reproduces generate_v_features row by row"""
+    generator = FeatureGenerator()
+    features = generator.generate_v_features_batch(user_friendly_columns(TRANSACTIONS))
+    assert features.dtype == np.float32 and features.shape == (len(TRANSACTIONS), 28)
+    expected = np.array(
+        [[generator.generate_v_features(t)[name] for name in V_FEATURE_NAMES] for t in TRANSACTIONS],
+        dtype=np.float32
+    )
+    assert np.array_equal(features, expected)
+
+
+def test_draw_cache_matches_uncached_draws():
+    """Cached draws give the same features as fresh draws and count hits"""
+    cached = FeatureGenerator()
+    uncached = FeatureGenerator()
+    uncached.draw_cache = None
+    columns = user_friendly_columns(TRANSACTIONS)
+    
+    first = cached.generate_v_features_batch(columns)
+    assert cached.draw_cache.stats()["misses"] == len(TRANSACTIONS)
+    assert np.array_equal(cached.generate_v_features_batch(columns), first)
+    assert cached.draw_cache.stats()["hits"] == len(TRANSACTIONS)
+    assert np.array_equal(uncached.generate_v_features_batch(columns), first)
+    
+    # Only keyed draws are cached: a different Time reuses them with a new time term
+    for t in TRANSACTIONS:
+        later = dict(t, Time=t["Time"] + 86400)
+        assert cached.generate_v_features(later) == uncached.generate_v_features(later)
+    assert cached.draw_cache.stats()["hits"] == 2 * len(TRANSACTIONS)
+
+
+def test_process_arrays_matches_dataframe_path():
+    """The array path builds the same model inputs as the DataFrame path"""
+    generator = FeatureGenerator()
+    service = FeatureEngineeringService()
+    columns = user_friendly_columns(TRANSACTIONS)
+    features = service.process_arrays(
+        columns["Time"], columns["Amount"], generator.generate_v_features_batch(columns)
+    )
+    frame = service.process_batch_transactions(
+        [generator.convert_user_friendly_to_standard(t) for t in TRANSACTIONS]
+    )
+    assert list(frame.columns) == MODEL_FEATURES
+    assert np.allclose(features, frame.to_numpy(), rtol=0, atol=1e-6)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing V-feature generation...")
+    test_v_features_are_deterministic_per_key()
+    test_int_and_float_inputs_share_a_key()
+    test_v_features_do_not_touch_global_random_state()
+    print("✅ Features are deterministic per key")
+    test_v_features_are_thread_safe()
+    print("✅ Features are thread safe")
+    test_batch_draws_match_single_draws()
+    print("✅ Batch draws match single draws")
+    test_batch_features_match_single_features()
+    test_process_arrays_matches_dataframe_path()
+    print("✅ Batch features match the per-transaction path")
+    test_draw_cache_matches_uncached_draws()
+    print("✅ Cached draws match fresh draws")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded inference executor
+Checks admission control and the 503 responses of the API
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from services.inference_executor import InferenceExecutor, ExecutorSaturatedError
+
+logging.getLogger("api.app").setLevel(logging.ERROR)
+logging.getLogger("services.ml_service").setLevel(logging.WARNING)
+
+
+def test_saturated_executor_refuses_jobs():
+    """Jobs beyond max_pending fail fast; capacity comes back when jobs finish"""
+    executor = InferenceExecutor("thread", workers=1, max_pending=2)
+    executor.start()
+    release = threading.Event()
+
+    async def scenario():
+        blocked = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        try:
+            await executor.run(math.sqrt, 4.0)
+        except ExecutorSaturatedError:
+            refused = True
+        else:
+            refused = False
+        release.set()
+        await asyncio.gather(*blocked)
+        return refused, await executor.run(math.sqrt, 9.0)
+
+    try:
+        refused, result = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert refused and result == 3.0
+    stats = executor.stats()
+    assert stats["rejected"] == 1 and stats["completed"] == 3 and stats["pending"] == 0
+
+
+def test_cancelled_requests_stay_pending_until_their_job_finishes():
+    """A request that goes away (e.g. client disconnect) does not free capacity its running job still uses"""
+    executor = InferenceExecutor("thread", workers=1, max_pending=1)
+    executor.start()
+    release = threading.Event()
+
+    async def scenario():
+        request = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.01)
+        request.cancel()
+        await asyncio.sleep(0.01)
+        pending_after_cancel = executor.pending
+        try:
+            # Admitted by mistake, it would queue behind the still running job
+            await asyncio.wait_for(executor.run(math.sqrt, 4.0), 1.0)
+        except ExecutorSaturatedError:
+            refused = True
+        except asyncio.TimeoutError:
+            refused = False
+        release.set()
+        while executor.pending:
+            await asyncio.sleep(0.01)
+        return pending_after_cancel, refused, await executor.run(math.sqrt, 9.0)
+
+    try:
+        pending_after_cancel, refused, result = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert pending_after_cancel == 1 and refused and result == 3.0
+
+
+def test_process_and_inline_executors():
+    """Process workers run module-level functions; unstarted executors run inline"""
+    process = InferenceExecutor("process", workers=1, max_pending=4)
+    process.start()
+    try:
+        assert asyncio.run(process.run(math.sqrt, 16.0)) == 4.0
+    finally:
+        process.shutdown()
+    assert asyncio.run(InferenceExecutor("inline", workers=1, max_pending=0).run(math.sqrt, 25.0)) == 5.0
+    try:
+        InferenceExecutor("gpu", workers=1, max_pending=1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown executor kind was accepted")
+
+
+def test_process_workers_follow_rules_changes(tmp_path):
+    """Forked pool workers recompile the rules file after it changes in the serving process"""
+    from config.settings import settings
+    from services.ml_service import ml_service, call_service_method
+    from services.rule_engine import rule_engine, load_rule_spec
+
+    transaction = {"Amount": 20000.0}
+    path = tmp_path / "rules.json"
+    spec = load_rule_spec(settings.RULES_PATH)
+    path.write_text(json.dumps(spec))
+    rule_engine.reload_rules(str(path))
+    poll, watcher_pid = settings.RULES_POLL_SECONDS, ml_service.watcher_pid
+    settings.RULES_POLL_SECONDS, ml_service.watcher_pid = 0.001, os.getpid()
+    process = InferenceExecutor("process", workers=1, max_pending=4)
+    process.start()
+    try:
+        score = lambda: asyncio.run(process.run(call_service_method, "predict_single_user_friendly", transaction))
+        assert "Elevated transaction amount ($20,000.00)" in score()["rule_risk_factors"]
+        spec["rules"][0]["cases"][2]["factor"] = "Changed rule ({amount:,.0f})"
+        path.write_text(json.dumps(spec))
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+        rule_engine.reload_rules()
+        assert "Changed rule (20,000)" in score()["rule_risk_factors"]
+    finally:
+        process.shutdown()
+        settings.RULES_POLL_SECONDS, ml_service.watcher_pid = poll, watcher_pid
+        rule_engine.reload_rules(settings.RULES_PATH)
+
+
+def test_api_returns_503_when_saturated():
+    """Prediction endpoints answer 503 with Retry-After instead of queueing"""
+    from fastapi.testclient import TestClient
+    from api.app import app
+    from services.ml_service import ml_service
+
+    transaction = {"Time": 1000.0, "Amount": 50.0}
+    with TestClient(app) as client:
+        assert client.post("/predict", json=transaction).status_code == 200
+        assert client.post("/predict/batch", json={"transactions": [transaction]}).status_code == 200
+
+        ml_service.executor._pending = ml_service.executor.max_pending
+        try:
+            for path, body in (("/predict", transaction), ("/predict/batch", {"transactions": [transaction]})):
+                response = client.post(path, json=body)
+                assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+            assert client.get("/health").status_code == 200
+        finally:
+            ml_service.executor._pending = 0
+        assert client.get("/metrics").json()["executor"]["rejected"] >= 2
+
+
+def test_rules_reload_refused_when_process_workers_cannot_follow():
+    """A process pool that does not poll the rules file gets 409 instead of a partial reload"""
+    from fastapi.testclient import TestClient
+    from api.app import app
+    from config.settings import settings
+    from services.ml_service import ml_service
+
+    kind, poll = ml_service.executor.kind, settings.RULES_POLL_SECONDS
+    with TestClient(app) as client:
+        try:
+            ml_service.executor.kind, settings.RULES_POLL_SECONDS = "process", 0
+            assert client.post("/rules/reload").status_code == 409
+        finally:
+            ml_service.executor.kind, settings.RULES_POLL_SECONDS = kind, poll
+        assert client.post("/rules/reload").status_code == 200
+
+
+if __name__ == "__main__":
+    print("🧪 Testing inference executor...")
+    test_saturated_executor_refuses_jobs()
+    print("✅ Saturated executor refuses jobs")
+    test_cancelled_requests_stay_pending_until_their_job_finishes()
+    print("✅ Cancelled requests keep their job counted until it finishes")
+    test_process_and_inline_executors()
+    print("✅ Process and inline executors run jobs")
+    test_api_returns_503_when_saturated()
+    print("✅ API answers 503 when saturated")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_process_workers_follow_rules_changes(Path(tmp))
+    print("✅ Process workers follow rules changes")
+    test_rules_reload_refused_when_process_workers_cannot_follow()
+    print("✅ Rules reload is refused when process workers cannot follow it")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled Isolation Forest scorer
+Checks scores and flags against sklearn on the bundled anomaly model
+"""
+
+import warnings
+
+import numpy as np
+
+from model_testing import anomaly_model, make_rows as model_rows
+from services.isolation_forest import CompiledIsolationForest, EVAL_BLOCK_ROWS
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+forest = CompiledIsolationForest(anomaly_model)
+
+
+def make_rows(n, seed=0):
+    """Model inputs spanning normal and anomalous regions"""
+    rows = model_rows(n, seed)
+    rows[:, 29] = np.abs(rows[:, 29]) * 2
+    rows[::5] *= 4
+    return rows
+
+
+def test_scores_match_sklearn_exactly():
+    """score_samples is bit-identical to sklearn across block boundaries"""
+    rows = make_rows(2 * EVAL_BLOCK_ROWS + 7)
+    assert forest.num_trees == len(anomaly_model.estimators_)
+    assert np.array_equal(forest.score_samples(rows), anomaly_model.score_samples(rows))
+    assert np.array_equal(forest.score_samples(rows[:1]), anomaly_model.score_samples(rows[:1]))
+
+
+def test_flags_match_sklearn_exactly():
+    """predict gives sklearn's flags, including both outcomes"""
+    rows = make_rows(3000, seed=1)
+    expected = anomaly_model.predict(rows)
+    assert {-1, 1} <= set(expected.tolist())
+    assert np.array_equal(forest.predict(rows), expected)
+
+
+def test_threshold_and_rounding_edge_cases():
+    """Values on split thresholds, float32 rounding and NaNs follow sklearn"""
+    rows = np.repeat(make_rows(1, seed=2), 500, axis=0)
+    nodes = np.flatnonzero(forest.feature != 0)[:500]
+    rows[np.arange(len(nodes)), forest.feature[nodes]] = forest.threshold[nodes]
+    rows[1::2] = np.nextafter(rows[1::2], np.inf)
+    rows[::9, 4] = np.nan
+    assert np.array_equal(forest.score_samples(rows), anomaly_model.score_samples(rows))
+
+
+if __name__ == "__main__":
+    print("🧪 Testing compiled Isolation Forest...")
+    test_scores_match_sklearn_exactly()
+    test_flags_match_sklearn_exactly()
+    print("✅ Scores and flags match sklearn")
+    test_threshold_and_rounding_edge_cases()
+    print("✅ Threshold, rounding and NaN edge cases match")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for the asynchronous micro-batcher
+Checks batching, result routing and the /predict integration
+"""
+
+import asyncio
+import logging
+
+import numpy as np
+
+from services.micro_batcher import MicroBatcher, Histogram
+
+logging.getLogger("services.ml_service").setLevel(logging.WARNING)
+
+
+def double_and_sum(features):
+    """Two outputs per row, so routing mistakes show up"""
+    return features[:, 0] * 2, features.sum(axis=1)
+
+
+def test_concurrent_submissions_share_batches():
+    """Concurrent rows are scored together and each caller gets its own rows back"""
+    async def scenario():
+        batcher = MicroBatcher(double_and_sum, max_batch_rows=16, max_wait_us=20000)
+        batcher.start()
+        rows = [np.full((1 + i % 3, 4), float(i)) for i in range(40)]
+        results = await asyncio.gather(*(batcher.submit(r) for r in rows))
+        stats = batcher.stats()
+        await batcher.stop()
+        return rows, results, stats
+
+    rows, results, stats = asyncio.run(scenario())
+    for row, (doubled, summed) in zip(rows, results):
+        assert np.array_equal(doubled, row[:, 0] * 2) and np.array_equal(summed, row.sum(axis=1))
+    batch_sizes = stats["batch_size"]
+    assert batch_sizes["sum"] == sum(len(r) for r in rows)
+    assert batch_sizes["count"] < len(rows)
+    assert batch_sizes["max"] <= 16 + 2  # The last submission may overshoot by its own rows
+    assert stats["queue_depth"]["max"] > 1
+
+
+def test_failures_reach_every_caller():
+    """A failing batch raises in each waiting submission and the batcher keeps going"""
+    calls = []
+
+    def flaky(features):
+        calls.append(len(features))
+        if len(calls) == 1:
+            raise RuntimeError("model failed")
+        return (features[:, 0],)
+
+    async def scenario():
+        batcher = MicroBatcher(flaky, max_batch_rows=8, max_wait_us=20000)
+        batcher.start()
+        first = await asyncio.gather(*(batcher.submit(np.ones((1, 2))) for _ in range(3)), return_exceptions=True)
+        second = await batcher.submit(np.ones((1, 2)))
+        await batcher.stop()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in first)
+    assert np.array_equal(second[0], [1.0])
+
+
+def test_histogram_buckets():
+    """Values land in the first bucket whose bound is >= the value"""
+    histogram = Histogram((1, 4, 16))
+    for value in (1, 2, 4, 5, 100):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"<=1": 1, "<=4": 2, "<=16": 1, "+Inf": 1}
+    assert snapshot["count"] == 5 and snapshot["max"] == 100
+
+
+def test_predict_single_async_matches_predict_single():
+    """Batched /predict scoring gives the same decisions as the direct path"""
+    from services.ml_service import ml_service
+    from test_ml_service import make_transactions
+
+    transactions = make_transactions(30)
+
+    async def scenario():
+        ml_service.batcher.start()
+        try:
+            return await asyncio.gather(*(ml_service.predict_single_async(dict(t)) for t in transactions))
+        finally:
+            await ml_service.batcher.stop()
+
+    for transaction, result in zip(transactions, asyncio.run(scenario())):
+        expected = ml_service.predict_single(dict(transaction))
+        assert result["fraud_probability"] == expected["fraud_probability"]
+        assert result["anomaly_detected"] == expected["anomaly_detected"]
+        assert result["final_decision"] == expected["final_decision"]
+
+
+def test_predict_packed_async_matches_predict_single():
+    """Packed /predict vectors go through the micro-batcher with the same decisions"""
+    from services.ml_service import ml_service
+    from test_ml_service import make_transactions
+
+    transactions = make_transactions(30)
+    vectors = [[t.get(f"V{i}", 0.0) for i in range(1, 29)] for t in transactions]
+
+    async def scenario():
+        ml_service.batcher.start()
+        try:
+            return await asyncio.gather(*(ml_service.predict_packed_async(t["Time"], t["Amount"], v)
+                                          for t, v in zip(transactions, vectors)))
+        finally:
+            await ml_service.batcher.stop()
+
+    for transaction, result in zip(transactions, asyncio.run(scenario())):
+        expected = ml_service.predict_single(dict(transaction))
+        assert result["fraud_probability"] == expected["fraud_probability"]
+        assert result["final_decision"] == expected["final_decision"]
+        assert result["model_version"] == expected["model_version"]
+
+
+if __name__ == "__main__":
+    print("🧪 Testing micro-batcher...")
+    test_concurrent_submissions_share_batches()
+    test_failures_reach_every_caller()
+    print("✅ Submissions are batched and routed back")
+    test_histogram_buckets()
+    print("✅ Histograms count into the right buckets")
+    test_predict_single_async_matches_predict_single()
+    print("✅ Micro-batched predictions match predict_single")
+    test_predict_packed_async_matches_predict_single()
+    print("✅ Packed vectors are micro-batched too")
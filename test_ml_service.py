@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the V1-V28 model inference paths
+Checks the array fast paths against the DataFrame/sklearn reference path
+"""
+
+import logging
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from config.settings import settings
+from model_testing import anomaly_model, fraud_model
+from services.feature_service import feature_service, MODEL_FEATURES
+from services.ml_service import ml_service
+from api.warm_up import synthetic_friendly_transactions
+
+logging.getLogger("services.ml_service").setLevel(logging.WARNING)
+
+
+def make_transactions(n, seed=7):
+    """Transactions with a spread of amounts, including missing V features"""
+    rng = random.Random(seed)
+    transactions = []
+    for i in range(n):
+        transaction = {"Time": rng.uniform(0, 172800), "Amount": rng.choice([0.0, 1.0, 88.35, 2500.0, 25691.16])}
+        transaction.update({f"V{j}": rng.gauss(0, 3) for j in range(1, 29) if (i + j) % 7})
+        transactions.append(transaction)
+    return transactions
+
+
+def reference_features(transaction):
+    """Model inputs built through the original DataFrame path"""
+    clean = feature_service.validate_transaction_features(dict(transaction))
+    return feature_service.process_single_transaction(clean)[MODEL_FEATURES]
+
+
+def test_single_array_matches_dataframe_path():
+    """process_single_array builds the same (1, 31) row as the DataFrame path"""
+    for transaction in make_transactions(20):
+        row = feature_service.process_single_array(transaction)
+        assert row.shape == (1, len(MODEL_FEATURES)) and row.dtype == np.float64
+        assert np.allclose(row, reference_features(transaction).to_numpy(), rtol=1e-12, atol=0)
+
+
+def test_packed_array_matches_single_array():
+    """A packed V1-V28 list or float32 blob fills the same row; bad vectors are rejected"""
+    for transaction in make_transactions(20):
+        expected = feature_service.process_single_array(transaction).copy()
+        v = [transaction.get(f"V{i}", 0.0) for i in range(1, 29)]
+        row = feature_service.process_packed_array(transaction["Time"], transaction["Amount"], v)
+        assert np.array_equal(row, expected)
+
+        v32 = np.asarray(v, dtype="<f4")
+        row = feature_service.process_packed_array(transaction["Time"], transaction["Amount"], v32.tobytes())
+        assert np.array_equal(row[0, 1:29], v32.astype(np.float64))
+        assert np.array_equal(row[0, [0, 29, 30]], expected[0, [0, 29, 30]])
+
+    for bad in ([0.0] * 27, b"\0" * 108, [0.0] * 27 + [float("nan")], np.full(28, np.inf, "<f4").tobytes()):
+        try:
+            feature_service.process_packed_array(1.0, 1.0, bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {bad!r}")
+
+
+def test_predict_single_matches_sklearn_path():
+    """predict_single gives the probability and flag of predict_proba/predict on a DataFrame"""
+    for transaction in make_transactions(10):
+        df = reference_features(transaction)
+        result = ml_service.predict_single(dict(transaction))
+        expected_prob = fraud_model.predict_proba(df)[0][1]
+        fraud_prob, _, _ = ml_service.runner.run_single(feature_service.process_single_array(transaction))
+        assert abs(fraud_prob - expected_prob) < 1e-12
+        assert result["fraud_probability"] == round(float(expected_prob), 4)
+        assert result["anomaly_detected"] == (anomaly_model.predict(df)[0] == -1)
+
+
+def test_booster_matches_predict_proba():
+    """The raw booster reproduces LGBMClassifier.predict_proba on the bundled model"""
+    model = fraud_model
+    rows = np.random.default_rng(0).normal(0, 3, size=(2000, len(MODEL_FEATURES)))
+    rows[:, 0] = np.abs(rows[:, 0]) * 20000
+    expected = model.predict_proba(rows)[:, 1]
+    for num_threads in (settings.BOOSTER_THREADS_SINGLE, settings.BOOSTER_THREADS_BATCH):
+        assert np.allclose(model.booster_.predict(rows, num_threads=num_threads), expected, rtol=0, atol=1e-12)
+    assert np.allclose([model.booster_.predict(row[None, :], num_threads=1)[0] for row in rows[:50]],
+                       expected[:50], rtol=0, atol=1e-12)
+
+
+def test_predict_batch_matches_predict_single():
+    """Batch and single-row paths agree on every transaction"""
+    transactions = make_transactions(25)
+    batch = ml_service.predict_batch([dict(t) for t in transactions])
+    for transaction, result in zip(transactions, batch):
+        single = ml_service.predict_single(dict(transaction))
+        assert result["fraud_probability"] == single["fraud_probability"]
+        assert result["anomaly_detected"] == single["anomaly_detected"]
+
+
+def without_noise(loc=0.0, scale=1.0, size=None):
+    """np.random.normal stand-in, so single and batch friendly scoring are deterministic"""
+    return 0.0 if size is None else np.zeros(size)
+
+
+def test_friendly_batch_matches_single(monkeypatch):
+    """Batch and single friendly paths agree on every row, including rule thresholds"""
+    monkeypatch.setattr(np.random, "normal", without_noise)
+    transactions = synthetic_friendly_transactions(60, seed=4)
+    for transaction, amount in zip(transactions, (0.0, 100.0, 5000.0, 10000.0, 20000.0, 50000.0, 100000.0, 150000.0)):
+        transaction["Amount"] = amount
+    for transaction, (hour, age, velocity) in zip(transactions[8:], ((0, 7, 2), (6, 30, 15), (23, 90, 25), (2, 365, 50))):
+        transaction.update(hour_of_day=hour, customer_age_days=age, daily_transactions=velocity)
+
+    batch = ml_service.predict_batch_user_friendly([dict(t) for t in transactions])
+    assert len(batch) == len(transactions)
+    for i, (transaction, result) in enumerate(zip(transactions, batch), start=1):
+        single = ml_service.predict_single_user_friendly(dict(transaction))
+        assert result["transaction_id"] == i
+        for field in ("fraud_probability", "anomaly_detected", "rule_risk_score", "rule_risk_level", "rule_risk_factors",
+                      "combined_risk_score", "final_decision", "decision_reason", "confidence",
+                      "explanation", "ml_analysis", "rule_analysis"):
+            assert result[field] == single[field], field
+    assert pickle.loads(pickle.dumps(batch)) == list(batch)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing model inference paths...")
+    test_single_array_matches_dataframe_path()
+    print("✅ Single-row buffer matches the DataFrame features")
+    test_packed_array_matches_single_array()
+    print("✅ Packed V1-V28 vectors fill the same row")
+    test_predict_single_matches_sklearn_path()
+    print("✅ predict_single matches the sklearn path")
+    test_booster_matches_predict_proba()
+    test_predict_batch_matches_predict_single()
+    print("✅ Booster matches predict_proba on the bundled model")
+    mp = pytest.MonkeyPatch()
+    test_friendly_batch_matches_single(mp)
+    mp.undo()
+    print("✅ Friendly batch rows match the single-transaction path")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped model artifacts
+Exports the bundled pickles to a temporary directory and checks the reloaded models
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from config.settings import settings
+from model_testing import anomaly_model, fraud_model, scaler, make_rows as model_rows
+from services.isolation_forest import CompiledIsolationForest
+from services.model_artifacts import export_model_artifact, load_model_artifact, artifact_path
+from services.model_runner import ModelRunner
+from services.tree_ensemble import CompiledTreeEnsemble
+
+
+def make_rows(n, seed=0):
+    """Model inputs with some NaNs"""
+    rows = model_rows(n, seed)
+    rows[::13, 7] = np.nan
+    return rows
+
+
+def export_all(directory):
+    """Copy the pickles into directory and export their artifacts"""
+    paths = []
+    for model, source in ((fraud_model, settings.FRAUD_MODEL_PATH), (anomaly_model, settings.ANOMALY_MODEL_PATH),
+                          (scaler, settings.SCALER_PATH)):
+        path = os.path.join(directory, os.path.basename(source))
+        shutil.copy(source, path)
+        export_model_artifact(model, path)
+        paths.append(path)
+    return paths
+
+
+def test_artifacts_reproduce_the_models():
+    """Memory-mapped models score exactly like the models compiled from the pickles"""
+    with tempfile.TemporaryDirectory() as directory:
+        fraud_path, anomaly_path, scaler_path = export_all(directory)
+        ensemble = load_model_artifact(fraud_path)
+        forest = load_model_artifact(anomaly_path)
+        scaler_constants = load_model_artifact(scaler_path)
+
+        assert isinstance(ensemble, CompiledTreeEnsemble) and isinstance(forest, CompiledIsolationForest)
+        assert not ensemble.threshold.flags.writeable and not forest.children.flags.writeable
+
+        rows = make_rows(700)
+        reference = CompiledTreeEnsemble.from_booster(fraud_model.booster_)
+        assert np.array_equal(ensemble.predict(rows), reference.predict(rows))
+        assert all(ensemble.predict_row(row) == reference.predict_row(row) for row in rows[:50])
+        assert np.array_equal(forest.score_samples(rows), anomaly_model.score_samples(rows))
+        amounts = np.array([[0.0], [88.35], [25691.16]])
+        assert np.array_equal(scaler_constants.transform(amounts), scaler.transform(amounts))
+
+        runner = ModelRunner(ensemble, forest, fraud_backend="compiled", anomaly_backend="compiled")
+        fraud_probs, _, anomaly_flags = runner.run(rows)
+        assert np.abs(fraud_probs - fraud_model.predict_proba(rows)[:, 1]).max() < 1e-9
+        assert np.array_equal(anomaly_flags, anomaly_model.predict(rows) == -1)
+
+
+def test_row_scorer_is_regenerated_for_other_interpreters():
+    """Stored bytecode is only reused by the interpreter version that wrote it"""
+    original = CompiledTreeEnsemble.from_booster(fraud_model.booster_)
+    rebuilt = CompiledTreeEnsemble.from_arrays(original.to_arrays(), original.num_features, original.sigmoid,
+                                               code_tag="cpython-00")
+    assert rebuilt._row_scorer_code is not original._row_scorer_code
+    rows = np.nan_to_num(make_rows(50, seed=1))
+    assert all(rebuilt.predict_row(row) == original.predict_row(row) for row in rows)
+
+
+def test_stale_and_missing_artifacts_are_ignored():
+    """A changed pickle, a damaged or unknown format or no export at all falls back to the pickle"""
+    with tempfile.TemporaryDirectory() as directory:
+        fraud_path, anomaly_path, scaler_path = export_all(directory)
+        assert load_model_artifact(os.path.join(directory, "missing.pkl")) is None
+
+        with open(scaler_path, "ab") as f:
+            f.write(b"\0")
+        assert load_model_artifact(scaler_path) is None
+        assert load_model_artifact(scaler_path, verify=False) is not None
+
+        metadata_path = os.path.join(artifact_path(anomaly_path), "metadata.json")
+        with open(metadata_path) as f:
+            metadata = f.read()
+        with open(metadata_path, "w") as f:
+            f.write(metadata.replace('"format": 1', '"format": 99'))
+        assert load_model_artifact(anomaly_path) is None
+
+        code_path = os.path.join(artifact_path(fraud_path), "row_scorer_code.npy")
+        np.save(code_path, np.load(code_path)[:16])
+        assert load_model_artifact(fraud_path) is None
+
+
+if __name__ == "__main__":
+    print("🧪 Testing memory-mapped model artifacts...")
+    test_artifacts_reproduce_the_models()
+    test_row_scorer_is_regenerated_for_other_interpreters()
+    print("✅ Artifacts reproduce the models")
+    test_stale_and_missing_artifacts_are_ignored()
+    print("✅ Stale and missing artifacts are ignored")
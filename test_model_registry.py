@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests for model version hot-swapping
+Activates, rolls back and follows versions of a temporary registry
+"""
+
+import contextlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pytest
+
+from config.settings import settings
+from services.feature_service import MODEL_FEATURES
+from services.ml_service import ml_service
+from services.model_registry import ModelRegistry, DEFAULT_VERSION
+
+logging.getLogger("services.ml_service").setLevel(logging.CRITICAL)
+
+TRANSACTION = {"Time": 100.0, "Amount": 12.5}
+
+
+@contextlib.contextmanager
+def temporary_registry():
+    """ml_service on a temporary registry holding a copy of the default models as "v2" """
+    root = tempfile.mkdtemp()
+    version_dir = os.path.join(root, "v2")
+    os.makedirs(version_dir)
+    for path in (settings.FRAUD_MODEL_PATH, settings.ANOMALY_MODEL_PATH):
+        shutil.copy(path, version_dir)
+    registry, bundle = ml_service.registry, ml_service.bundle
+    ml_service.registry = ModelRegistry(root)
+    try:
+        yield ml_service.registry
+    finally:
+        ml_service.registry, ml_service.bundle = registry, bundle
+        shutil.rmtree(root)
+
+
+def test_activate_and_rollback():
+    """Responses report the version that scored them; rollback returns to the previous one"""
+    with temporary_registry() as registry:
+        assert registry.versions() == [DEFAULT_VERSION, "v2"]
+        assert ml_service.predict_single(TRANSACTION)["model_version"] == DEFAULT_VERSION
+
+        ml_service.activate_version("v2")
+        assert ml_service.predict_single(TRANSACTION)["model_version"] == "v2"
+        assert {r["model_version"] for r in ml_service.predict_batch([TRANSACTION] * 3)} == {"v2"}
+        assert registry.state()["active"] == "v2"
+
+        ml_service.rollback()
+        assert ml_service.predict_single(TRANSACTION)["model_version"] == DEFAULT_VERSION
+        assert registry.state()["history"] == [DEFAULT_VERSION]
+        with pytest.raises(ValueError):
+            ml_service.rollback()
+
+
+def test_bad_versions_keep_the_active_one():
+    """Unknown versions and models that fail to load leave the active version in place"""
+    with temporary_registry() as registry:
+        broken = os.path.join(registry.root, "broken")
+        os.makedirs(broken)
+        for path in (settings.FRAUD_MODEL_PATH, settings.ANOMALY_MODEL_PATH):
+            with open(os.path.join(broken, os.path.basename(path)), "wb") as f:
+                f.write(b"not a model")
+
+        with pytest.raises(KeyError):
+            ml_service.activate_version("missing")
+        with pytest.raises(RuntimeError):
+            ml_service.activate_version("broken")
+        assert ml_service.model_version == DEFAULT_VERSION
+        assert registry.state()["active"] is None
+
+
+def test_swaps_only_what_the_registry_records():
+    """A failed registry write or a concurrent change leaves the served version alone"""
+    def failing_write(state):
+        raise OSError("disk full")
+
+    with temporary_registry() as registry:
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(registry, "_write", failing_write)
+            with pytest.raises(OSError):
+                ml_service.activate_version("v2")
+        assert ml_service.model_version == DEFAULT_VERSION and registry.state()["active"] is None
+
+        ml_service.activate_version("v2")
+        load_bundle = ml_service._load_bundle
+
+        def load_while_another_worker_activates(version):
+            ModelRegistry(registry.root).record_activation(DEFAULT_VERSION)
+            return load_bundle(version)
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(ml_service, "_previous", None)
+            mp.setattr(ml_service, "_load_bundle", load_while_another_worker_activates)
+            with pytest.raises(ValueError, match="changed during the rollback"):
+                ml_service.rollback()
+        assert ml_service.model_version == "v2"
+        assert registry.state()["history"] == [DEFAULT_VERSION, "v2", DEFAULT_VERSION]
+
+
+def test_released_runners_are_closed():
+    """Only the active and previous versions keep their row-block threads"""
+    with temporary_registry(), pytest.MonkeyPatch.context() as mp:
+        mp.setattr(settings, "MODEL_RUNNER_THREADS", 2)
+        released = ml_service._load_bundle("v2")
+        mp.setattr(ml_service, "_previous", released)
+
+        ml_service.activate_version("v2")
+        active = ml_service.bundle
+        assert released.runner._pool is None and active.runner._pool is not None
+        assert released.runner.run(np.zeros((3000, len(MODEL_FEATURES))))[0].shape == (3000,)
+
+        ml_service.rollback()
+        assert ml_service.model_version == DEFAULT_VERSION and active.runner._pool is not None
+        active.runner.close()
+
+
+def test_follows_registry_and_serves_during_swap():
+    """Versions activated by another process are picked up; requests never fail mid-swap"""
+    with temporary_registry() as registry:
+        ml_service.sync_with_registry(force=True)
+        versions, errors, stop = set(), [], threading.Event()
+
+        def predict():
+            while not stop.is_set():
+                try:
+                    versions.add(ml_service.predict_single(TRANSACTION)["model_version"])
+                except Exception as e:
+                    errors.append(e)
+
+        worker = threading.Thread(target=predict)
+        worker.start()
+        try:
+            ModelRegistry(registry.root).record_activation("v2")
+            assert ml_service.sync_with_registry()
+            assert not ml_service.sync_with_registry()
+        finally:
+            stop.set()
+            worker.join()
+        assert ml_service.model_version == "v2"
+        assert not errors
+        assert versions <= {DEFAULT_VERSION, "v2"}
+
+
+if __name__ == "__main__":
+    print("🧪 Testing model hot-swapping...")
+    test_activate_and_rollback()
+    print("✅ Activation and rollback switch the reported model version")
+    test_bad_versions_keep_the_active_one()
+    print("✅ Unknown and broken versions keep the active one")
+    test_swaps_only_what_the_registry_records()
+    print("✅ Swaps follow the recorded registry state")
+    test_released_runners_are_closed()
+    print("✅ Released model versions stop their runner threads")
+    test_follows_registry_and_serves_during_swap()
+    print("✅ Registry changes are followed without failed requests")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the fused model runner
+Checks both outputs against the sklearn models, inline and with row-block threads
+"""
+
+import numpy as np
+
+from model_testing import anomaly_model, fraud_model, make_rows
+from services.model_runner import ModelRunner
+
+runner = ModelRunner(fraud_model, anomaly_model, threads=0)
+
+
+def test_run_matches_sklearn_models():
+    """run returns predict_proba, decision_function and predict == -1 in one call"""
+    rows = make_rows(600)
+    fraud_probs, anomaly_scores, anomaly_flags = runner.run(rows)
+    assert np.abs(fraud_probs - fraud_model.predict_proba(rows)[:, 1]).max() < 1e-9
+    assert np.array_equal(anomaly_scores, anomaly_model.decision_function(rows))
+    assert np.array_equal(anomaly_flags, anomaly_model.predict(rows) == -1)
+
+
+def test_run_single_matches_run():
+    """The single-row path agrees with the batch path"""
+    rows = make_rows(40, seed=1)
+    fraud_probs, anomaly_scores, anomaly_flags = runner.run(rows)
+    for i, row in enumerate(rows):
+        fraud_prob, anomaly_score, anomaly_flag = runner.run_single(row[None, :])
+        assert abs(fraud_prob - fraud_probs[i]) < 1e-12
+        assert anomaly_score == anomaly_scores[i] and anomaly_flag == anomaly_flags[i]
+
+
+def test_thread_pool_matches_inline():
+    """Row blocks scored on the pool are merged back in order"""
+    rows = make_rows(1000, seed=2)
+    pooled = ModelRunner(fraud_model, anomaly_model, threads=3, block_rows=128)
+    try:
+        for expected, actual in zip(runner.run(rows), pooled.run(rows)):
+            assert np.array_equal(expected, actual)
+    finally:
+        pooled.close()
+
+
+def test_unknown_backend_is_rejected():
+    """Misconfigured backends fail at startup"""
+    try:
+        ModelRunner(fraud_model, anomaly_model, fraud_backend="onnx")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown backend was accepted")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing fused model runner...")
+    test_run_matches_sklearn_models()
+    test_run_single_matches_run()
+    print("✅ Runner matches the sklearn models")
+    test_thread_pool_matches_inline()
+    print("✅ Thread pool matches inline scoring")
+    test_unknown_backend_is_rejected()
+    print("✅ Unknown backends are rejected")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the orjson response path
+Checks that pre-shaped results render exactly as the validated response models would
+"""
+
+import asyncio
+import json
+import logging
+
+import numpy as np
+import pytest
+
+from api.app import app
+from api.models import (PredictionResponse, HybridPredictionResponse,
+                        BatchPredictionResponse, BatchHybridPredictionResponse)
+from api.responses import ORJSONResponse, response_content
+from api.warm_up import call_app, synthetic_friendly_transactions, synthetic_transactions
+from services.ml_service import ml_service
+
+logging.getLogger("api.app").setLevel(logging.WARNING)
+
+SUMMARY = {"total_transactions": 200, "fraud_rate": 0.0, "processing_timestamp": "2024-01-01T00:00:00"}
+
+
+def test_bodies_match_validated_models():
+    """orjson bodies are byte-identical to the response models' JSON, extra keys dropped"""
+    legacy = ml_service.predict_batch(synthetic_transactions(200, seed=3))
+    friendly = ml_service.predict_batch_user_friendly(synthetic_friendly_transactions(200, seed=3))
+    assert "transaction_id" in legacy[0]
+
+    for model, batch_model, results in ((PredictionResponse, BatchPredictionResponse, legacy),
+                                        (HybridPredictionResponse, BatchHybridPredictionResponse, friendly)):
+        expected = batch_model(results=[model(**r) for r in results], summary=SUMMARY).model_dump_json()
+        body = ORJSONResponse({"results": [response_content(model, r) for r in results], "summary": SUMMARY}).body
+        assert body == expected.encode()
+
+    single = ml_service.predict_single(synthetic_transactions(1)[0])
+    single.pop("model_version")
+    content = response_content(PredictionResponse, single)
+    assert content["model_version"] is None
+    assert ORJSONResponse(content).body == PredictionResponse(**single).model_dump_json().encode()
+
+
+def test_endpoints_answer_with_response_schema():
+    """The hot endpoints still return exactly the documented fields"""
+    transaction = synthetic_transactions(1)[0]
+    status, body = asyncio.run(call_app(app, "POST", "/predict", json.dumps(transaction).encode()))
+    assert status == 200 and list(json.loads(body)) == list(PredictionResponse.model_fields)
+
+    batch = {"transactions": synthetic_friendly_transactions(5)}
+    status, body = asyncio.run(call_app(app, "POST", "/predict/friendly/batch", json.dumps(batch).encode()))
+    result = json.loads(body)
+    assert status == 200 and result["summary"]["total_transactions"] == 5
+    assert all(list(r) == list(HybridPredictionResponse.model_fields) for r in result["results"])
+
+
+def test_friendly_batch_endpoint_matches_single_endpoint(monkeypatch):
+    """/predict/friendly/batch rows and summary agree with /predict/friendly called per transaction"""
+    # Without noise the friendly ML probability and anomaly flag are the same on both paths
+    monkeypatch.setattr(np.random, "normal", lambda loc=0.0, scale=1.0, size=None: 0.0 if size is None else np.zeros(size))
+    transactions = synthetic_friendly_transactions(12, seed=5)
+    transactions[0]["Amount"] = 150000.0
+    body = json.dumps({"transactions": transactions}).encode()
+    status, body = asyncio.run(call_app(app, "POST", "/predict/friendly/batch", body))
+    assert status == 200
+    batch = json.loads(body)
+
+    singles = [json.loads(asyncio.run(call_app(app, "POST", "/predict/friendly", json.dumps(t).encode()))[1])
+               for t in transactions]
+    for result, single in zip(batch["results"], singles):
+        result.pop("timestamp"), single.pop("timestamp")
+        assert result == single
+    fraud = sum(1 for r in singles if r["final_decision"] == "FRAUD")
+    assert fraud > 0 and batch["summary"]["fraud_rate"] == round(fraud / len(transactions), 4)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing orjson responses...")
+    test_bodies_match_validated_models()
+    print("✅ Pre-shaped bodies match the validated response models")
+    test_endpoints_answer_with_response_schema()
+    print("✅ Endpoints return the documented fields")
+    mp = pytest.MonkeyPatch()
+    test_friendly_batch_endpoint_matches_single_endpoint(mp)
+    mp.undo()
+    print("✅ Friendly batch endpoint matches the single endpoint")
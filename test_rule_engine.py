@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Consistency tests for the rule engine
+Checks the compiled rule table and the columnar scorer against the interpreted rules
+"""
+
+import copy
+import itertools
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from config.settings import settings
+from services.rule_engine import RuleBasedRiskEngine, RuleCompilationError, RuleSet, load_rule_spec
+
+logging.getLogger("services.rule_engine").setLevel(logging.WARNING)
+
+
+def _plain(value):
+    """Turn a NumPy scalar into the int/float/str a JSON request would carry"""
+    value = value.item() if hasattr(value, "item") else value
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+
+def representative_transactions(rules):
+    """Yield (cell, transaction) for every cell of the compiled rule table"""
+    choices = []
+    for dimension in rules.table.dimensions:
+        if dimension.labels is not None:
+            # Every label of each class, plus a label missing from the mapping
+            by_class = {}
+            for label, (_, bucket_class) in dimension.labels.items():
+                by_class.setdefault(bucket_class, label)
+            by_class.setdefault(dimension.unknown[1], "Unmapped label")
+            choices.append(sorted(by_class.items()))
+        else:
+            # Values on and next to every cut point reach each bucket
+            points = sorted({
+                point for cut in dimension.cuts_at + dimension.cuts_after
+                for point in (cut - 1, cut - 0.5, cut, cut + 0.5, cut + 1)
+            }) or [0]
+            by_class = {}
+            for point in points:
+                bucket = np.searchsorted(dimension.cuts_at, point, "right") + \
+                    np.searchsorted(dimension.cuts_after, point, "left")
+                by_class.setdefault(dimension.classes[bucket], _plain(point))
+            choices.append(sorted(by_class.items()))
+
+    fields = [dimension.field for dimension in rules.table.dimensions]
+    for combination in itertools.product(*choices):
+        cell = tuple(bucket_class for bucket_class, _ in combination)
+        yield cell, dict(zip(fields, (value for _, value in combination)))
+
+
+def assert_table_matches_interpreted(engine):
+    """Every table cell must agree with the interpreted rules"""
+    rules = engine.rules
+    cells = 0
+    for cell, transaction in representative_transactions(rules):
+        expected_score, expected_details = engine._interpret_rule_risk_score(transaction)
+        score, details = engine.calculate_rule_risk_score(transaction)
+        assert score == expected_score, (cell, transaction)
+        assert details == expected_details, (cell, transaction)
+        assert rules.table.score[cell] == expected_score, (cell, transaction)
+        cells += 1
+    assert cells == len(rules.table.cells)
+    return cells
+
+
+def test_rules_file_compiles():
+    """The bundled rules file compiles into a lookup table"""
+    rules = RuleSet.from_file(settings.RULES_PATH)
+    assert rules.table is not None
+    assert rules.level_names == ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+    assert len(rules.factor_messages) == 20
+
+
+def test_rule_table_matches_interpreted_rules():
+    """Compiled lookup table reproduces the interpreted rules on every cell"""
+    assert_table_matches_interpreted(RuleBasedRiskEngine())
+
+
+def test_rule_table_rebuilds_on_threshold_change():
+    """Loading changed thresholds recompiles the table"""
+    engine = RuleBasedRiskEngine()
+    transaction = {"Amount": 75000.0, "hour_of_day": 5, "merchant_type": "Hotel"}
+    before, _ = engine.calculate_rule_risk_score(transaction)
+
+    spec = copy.deepcopy(load_rule_spec(settings.RULES_PATH))
+    rules = {rule["name"]: rule for rule in spec["rules"]}
+    rules["amount"]["cases"][0]["when"]["amount"] = [">=", 70000]
+    rules["time"]["cases"][0]["when"]["hour"] = ["in", [5]]
+    spec["version"] = "test"
+    engine.load_rules(spec)
+    assert engine.rules.version == "test"
+
+    after, details = engine.calculate_rule_risk_score(transaction)
+    assert (after, details) == engine._interpret_rule_risk_score(transaction)
+    assert after > before
+    assert_table_matches_interpreted(engine)
+
+
+def test_score_columns_matches_interpreted_rules():
+    """Columnar scorer agrees with the interpreted rules"""
+    engine = RuleBasedRiskEngine()
+    transactions = [transaction for _, transaction in representative_transactions(engine.rules)]
+    columns = {
+        key: np.array([t[key] for t in transactions], dtype=object if isinstance(transactions[0][key], str) else None)
+        for key in transactions[0]
+    }
+    scores, details = engine.calculate_rule_risk_scores_batch(columns)
+    for i, transaction in enumerate(transactions):
+        expected_score, expected_details = engine._interpret_rule_risk_score(transaction)
+        assert scores[i] == expected_score
+        assert details[i] == expected_details
+
+
+def test_score_arrays_matches_per_row_scoring():
+    """score_arrays and render_risk_factors agree with calculate_rule_risk_score on and around every threshold"""
+    engine = RuleBasedRiskEngine()
+    dimensions = {dimension.input: dimension for dimension in engine.rules.table.dimensions}
+
+    def around_cuts(name, offsets):
+        dimension = dimensions[name]
+        return sorted({_plain(cut + offset) for cut in dimension.cuts_at + dimension.cuts_after for offset in offsets}
+                      | {0})
+
+    def labels(name):
+        return list(dimensions[name].labels) + ["Unmapped label"]
+
+    amounts = around_cuts("amount", (-1, -0.01, 0, 0.01, 1))
+    hours = list(range(24))
+    ages, velocities = around_cuts("age", (-1, 0, 1)), around_cuts("velocity", (-1, 0, 1))
+    locations, merchants, txn_types = labels("location"), labels("merchant_type"), labels("transaction_type")
+    assert {100, 5000, 10000, 20000, 50000, 100000} <= set(amounts)
+    assert {7, 30, 90, 365} <= set(ages) and {2, 15, 25, 50} <= set(velocities)
+
+    # Every numeric threshold crossed with the others, then every hour crossed with every label;
+    # the remaining inputs cycle through their values
+    rows = [(amount, hours[i % 24], age, velocity, locations[i % len(locations)],
+             merchants[i % len(merchants)], txn_types[i % len(txn_types)])
+            for i, (amount, age, velocity) in enumerate(itertools.product(amounts, ages, velocities))]
+    rows += [(amounts[i % len(amounts)], hour, ages[i % len(ages)], velocities[i % len(velocities)],
+              location, merchant, txn_type)
+             for i, (hour, location, merchant, txn_type) in enumerate(
+                 itertools.product(hours, locations, merchants, txn_types))]
+
+    amount, hour, age, velocity, location, merchant, txn_type = zip(*rows)
+    scores = engine.score_arrays(np.array(amount, dtype=float), np.array(location, dtype=object),
+                                 np.array(hour), np.array(age), np.array(velocity),
+                                 np.array(merchant, dtype=object), np.array(txn_type, dtype=object))
+    for i, (amount, hour, age, velocity, location, merchant, txn_type) in enumerate(rows):
+        score, details = engine.calculate_rule_risk_score({
+            "Amount": amount, "hour_of_day": hour, "customer_age_days": age, "daily_transactions": velocity,
+            "location_risk": location, "merchant_type": merchant, "transaction_type": txn_type
+        })
+        assert scores.score[i] == score
+        assert scores.risk_level[i] == details["risk_level"]
+        assert engine.render_risk_factors(scores.factor_mask[i], amount=amount, hour=hour, age=age,
+                                          velocity=velocity, merchant_type=merchant,
+                                          transaction_type=txn_type) == details["risk_factors"]
+
+
+def test_invalid_rules_keep_current_rules(tmp_path):
+    """A broken rules file is rejected and the active rules stay in place"""
+    engine = RuleBasedRiskEngine()
+    active = engine.rules
+
+    spec = load_rule_spec(settings.RULES_PATH)
+    spec["rules"][0]["cases"][0]["when"] = {"amount": ["~", 1]}
+    broken = tmp_path / "rules.json"
+    broken.write_text(json.dumps(spec))
+
+    try:
+        engine.reload_rules(str(broken))
+    except RuleCompilationError:
+        pass
+    else:
+        raise AssertionError("invalid rules file was accepted")
+    assert engine.rules is active
+
+
+def test_other_processes_follow_the_rules_file(tmp_path):
+    """An engine that did not handle a reload picks up the changed file on its next sync"""
+    path = tmp_path / "rules.json"
+    spec = load_rule_spec(settings.RULES_PATH)
+    path.write_text(json.dumps(spec))
+    handler, follower = RuleBasedRiskEngine(str(path)), RuleBasedRiskEngine(str(path))
+    assert not follower.sync_with_rules_file()
+
+    spec["version"] = "edited"
+    path.write_text(json.dumps(spec))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+    handler.reload_rules()
+    assert not handler.sync_with_rules_file()
+    assert follower.sync_with_rules_file()
+    assert follower.rules.version == "edited"
+
+    path.write_text("{not json")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 2_000_000_000))
+    assert not follower.sync_with_rules_file()
+    assert follower.rules.version == "edited"
+
+
+def test_injected_message_templates_are_refused(tmp_path):
+    """Factor messages that could run code or reach object internals do not compile"""
+    engine = RuleBasedRiskEngine()
+    active = engine.rules
+    for message in ("X {amount:{__import__('os').system('echo PWNED >&2') or ''}}",
+                    "X {amount:{hour}}", "X {amount!r}", "X {amount.__class__}", "X {amount[0]}", "X {}",
+                    "X {amount"):
+        spec = load_rule_spec(settings.RULES_PATH)
+        spec["rules"][0]["cases"][0]["factor"] = message
+        path = tmp_path / "rules.json"
+        path.write_text(json.dumps(spec))
+        try:
+            engine.reload_rules(str(path))
+        except RuleCompilationError:
+            pass
+        else:
+            raise AssertionError(f"message {message!r} was accepted")
+        assert engine.rules is active
+
+
+def test_reload_does_not_disturb_in_flight_scoring():
+    """Scoring keeps returning complete results while rules are reloaded"""
+    engine = RuleBasedRiskEngine()
+    transaction = {"Amount": 75000.0, "location_risk": "Very High Risk (Restricted)", "hour_of_day": 2}
+    expected = {engine.calculate_rule_risk_score(transaction)[0]}
+    errors = []
+    done = threading.Event()
+
+    def score():
+        while not done.is_set():
+            try:
+                assert engine.calculate_rule_risk_score(transaction)[0] in expected
+            except Exception as e:  # surfaced below
+                errors.append(e)
+                return
+
+    worker = threading.Thread(target=score)
+    worker.start()
+    for _ in range(5):
+        engine.reload_rules()
+    done.set()
+    worker.join()
+    assert not errors
+
+
+if __name__ == "__main__":
+    print("🧪 Testing compiled rule table...")
+    test_rules_file_compiles()
+    cells = assert_table_matches_interpreted(RuleBasedRiskEngine())
+    print(f"✅ {cells} table cells match the interpreted rules")
+    test_rule_table_rebuilds_on_threshold_change()
+    print("✅ Rule table rebuilds after threshold changes")
+    test_score_columns_matches_interpreted_rules()
+    print("✅ Columnar scorer matches the interpreted rules")
+    test_score_arrays_matches_per_row_scoring()
+    print("✅ score_arrays matches per-row scoring on every threshold")
+    test_reload_does_not_disturb_in_flight_scoring()
+    print("✅ Reloads do not disturb in-flight scoring")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for the pre-forking server
+Starts api/server.py with two workers and talks to it over HTTP
+"""
+
+import json
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+PORT = 18765
+
+
+def test_prefork_server_serves_and_stops():
+    """Workers start from the parent's models, answer requests and stop cleanly on SIGTERM"""
+    with tempfile.TemporaryFile("w+") as log:
+        server = subprocess.Popen([sys.executable, "-m", "api.server", "--workers", "2", "--port", str(PORT)],
+                                  stdout=subprocess.DEVNULL, stderr=log)
+        try:
+            match, deadline = None, time.monotonic() + 120
+            while match is None and server.poll() is None and time.monotonic() < deadline:
+                time.sleep(0.1)
+                log.seek(0)
+                match = re.search(r"2 workers ready .* pids \[([0-9, ]+)\]", log.read())
+            assert match is not None, "server did not report its workers as ready"
+            assert len(match.group(1).split(",")) == 2
+
+            request = urllib.request.Request(f"http://127.0.0.1:{PORT}/predict",
+                                             data=json.dumps({"Time": 100.0, "Amount": 12.5}).encode(),
+                                             headers={"Content-Type": "application/json"})
+            result = json.loads(urllib.request.urlopen(request, timeout=30).read())
+            assert result["final_decision"] in ("FRAUD", "LEGITIMATE")
+        finally:
+            server.send_signal(signal.SIGTERM)
+            assert server.wait(timeout=60) == 0
+        log.seek(0)
+        assert "All workers stopped" in log.read()
+
+
+if __name__ == "__main__":
+    print("🧪 Testing pre-forking server...")
+    test_prefork_server_serves_and_stops()
+    print("✅ Workers serve requests and stop on SIGTERM")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming NDJSON scoring
+Checks incremental line splitting, chunk scoring against predict_batch, /predict/stream and /predict/upload
+"""
+
+import asyncio
+import json
+import logging
+
+import pandas as pd
+import pytest
+
+from api.app import app
+from api.warm_up import call_app, synthetic_transactions, multipart_csv
+from config.settings import settings
+from services.ml_service import ml_service
+from services.stream_scoring import iter_lines, score_ndjson_chunk, LineTooLongError
+
+logging.getLogger("services.ml_service").setLevel(logging.WARNING)
+logging.getLogger("api.app").setLevel(logging.WARNING)
+
+
+async def collect(chunks, max_line_bytes=100):
+    async def source():
+        for chunk in chunks:
+            yield chunk
+    return [line async for line in iter_lines(source(), max_line_bytes)]
+
+
+def test_iter_lines_splits_across_chunks():
+    """Lines split over chunk boundaries are reassembled; overlong lines are refused"""
+    assert asyncio.run(collect([b'{"a"', b': 1}\n\n{"b": 2', b"}\n", b"", b"tail"])) == \
+        [b'{"a": 1}', b"", b'{"b": 2}', b"tail"]
+    with pytest.raises(LineTooLongError):
+        asyncio.run(collect([b"x" * 60, b"x" * 60]))
+
+
+def test_chunk_scores_match_predict_batch():
+    """Valid lines score as in predict_batch; invalid lines become error results with their line numbers"""
+    transactions = synthetic_transactions(20, seed=3)
+    lines = [json.dumps(t).encode() for t in transactions]
+    lines[4:4] = [b"", b"[1, 2]", b'{"Amount": 5}', b'{"Time": 1, "Amount": -5}', b'{"Time": "x", "Amount": 5}']
+
+    results = [json.loads(line) for line in score_ndjson_chunk(lines, 101).decode().splitlines()]
+    expected = ml_service.predict_batch([dict(t) for t in transactions])
+    errors = [r for r in results if "error" in r]
+    scored = [r for r in results if "error" not in r]
+
+    assert [r["transaction_id"] for r in errors] == [106, 107, 108, 109]
+    assert "missing field Time" in errors[1]["error"]
+    assert [r["fraud_probability"] for r in scored] == [r["fraud_probability"] for r in expected]
+    assert [r["final_decision"] for r in scored] == [r["final_decision"] for r in expected]
+    assert [r["transaction_id"] for r in scored] == list(range(101, 105)) + list(range(110, 126))
+
+
+def test_stream_endpoint_scores_every_line():
+    """/predict/stream answers one NDJSON result per input line, across chunk boundaries"""
+    n = settings.STREAM_CHUNK_ROWS + 7
+    body = "".join(json.dumps(t) + "\n" for t in synthetic_transactions(n, seed=4)).encode()
+    status, response = asyncio.run(call_app(app, "POST", "/predict/stream", body, "application/x-ndjson"))
+    results = [json.loads(line) for line in response.decode().splitlines()]
+    assert status == 200
+    assert [r["transaction_id"] for r in results] == list(range(1, n + 1))
+    assert all(r["final_decision"] in ("FRAUD", "LEGITIMATE") for r in results)
+
+
+def upload(transactions, output_format, extra=b""):
+    body, content_type = multipart_csv(transactions)
+    if extra:
+        body = body.replace(b"\r\n--", extra + b"\r\n--", 1)
+    return asyncio.run(call_app(app, "POST", f"/predict/upload?format={output_format}", body, content_type))
+
+
+def test_upload_streams_every_format():
+    """/predict/upload scores files larger than a chunk the same way in json, ndjson and csv"""
+    transactions = synthetic_transactions(settings.STREAM_CHUNK_ROWS + 3, seed=6)
+    expected = [r["fraud_probability"] for r in ml_service.predict_arrays(
+        *(pd.DataFrame(transactions)[column].to_numpy() for column in ("Time", "Amount")),
+        pd.DataFrame(transactions)[[f"V{i}" for i in range(1, 29)]].to_numpy("float32"))]
+
+    status, body = upload(transactions, "json")
+    document = json.loads(body)
+    assert status == 200 and document["total_transactions"] == len(transactions)
+    assert document["filename"] == "warm-up.csv"
+    assert [r["fraud_probability"] for r in document["results"]] == expected
+    assert document["fraud_detected"] == sum(r["final_decision"] == "FRAUD" for r in document["results"])
+
+    status, body = upload(transactions, "ndjson")
+    assert [json.loads(line)["transaction_id"] for line in body.decode().splitlines()] == \
+        list(range(1, len(transactions) + 1))
+
+    status, body = upload(transactions, "csv")
+    frame = pd.read_csv(pd.io.common.BytesIO(body))
+    assert frame["fraud_probability"].tolist() == expected
+
+
+def test_upload_errors():
+    """Bad headers are refused up front; bad rows end the streamed document with an error"""
+    status, body = asyncio.run(call_app(app, "POST", "/predict/upload",
+                                        *multipart_csv([{"Time": 1.0, "Amount": 2.0}])))
+    assert status == 400 and "Missing required columns" in json.loads(body)["detail"]
+
+    transactions = synthetic_transactions(settings.STREAM_CHUNK_ROWS + 3, seed=6)
+    status, body = upload(transactions, "json", extra=b"\nabc" + b",1" * 29)
+    document = json.loads(body)
+    assert document["total_transactions"] == settings.STREAM_CHUNK_ROWS
+    assert "Invalid CSV data" in document["error"]
+
+
+if __name__ == "__main__":
+    print("🧪 Testing streaming NDJSON scoring...")
+    test_iter_lines_splits_across_chunks()
+    print("✅ Lines are reassembled across chunks")
+    test_chunk_scores_match_predict_batch()
+    print("✅ Chunk scores match predict_batch")
+    test_stream_endpoint_scores_every_line()
+    print("✅ /predict/stream scores every line")
+    test_upload_streams_every_format()
+    print("✅ /predict/upload streams json, ndjson and csv")
+    test_upload_errors()
+    print("✅ /predict/upload reports bad files and rows")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for MessagePack content negotiation
+Checks MessagePack bodies against the JSON results of the same requests
+"""
+
+import asyncio
+import json
+import logging
+
+import numpy as np
+import pytest
+
+msgpack = pytest.importorskip("msgpack")
+
+from api.app import app
+from api.warm_up import call_app, synthetic_friendly_transactions, synthetic_transactions
+
+logging.getLogger("api.app").setLevel(logging.ERROR)
+
+MSGPACK = "application/msgpack"
+# Friendly V features are drawn per request, so only its rule analysis is compared
+STABLE_FIELDS = {"/predict": ["fraud_probability", "anomaly_detected", "final_decision", "model_version"],
+                 "/predict/friendly": ["rule_risk_score", "rule_risk_level", "rule_risk_factors"]}
+
+
+def post(path, payload, content_type=MSGPACK, accept=None):
+    body = msgpack.packb(payload) if content_type == MSGPACK else json.dumps(payload).encode()
+    return asyncio.run(call_app(app, "POST", path, body, content_type, accept))
+
+
+def test_msgpack_matches_json():
+    """MessagePack in and out gives the JSON results on /predict, /predict/friendly and /predict/batch"""
+    transactions = synthetic_transactions(20, seed=6)
+    friendly = synthetic_friendly_transactions(1)[0]
+    for path, payload in (("/predict", transactions[0]), ("/predict/friendly", friendly),
+                          ("/predict/batch", {"transactions": transactions})):
+        status, body = post(path, payload)
+        assert status == 200
+        expected = json.loads(post(path, payload, "application/json")[1])
+        result = msgpack.unpackb(body)
+        if "results" in expected:
+            assert result["summary"]["total_transactions"] == expected["summary"]["total_transactions"]
+            result, expected = result["results"][-1], expected["results"][-1]
+        fields = STABLE_FIELDS.get(path, STABLE_FIELDS["/predict"])
+        assert {f: result[f] for f in fields} == {f: expected[f] for f in fields}
+
+
+def test_negotiation_and_packed_vector():
+    """Accept picks the response format; v_f32 bytes map onto the model row; bad bodies are rejected"""
+    transaction = synthetic_transactions(1, seed=9)[0]
+    v = np.asarray([transaction[f"V{i}"] for i in range(1, 29)], dtype="<f4")
+
+    status, body = post("/predict", transaction, accept="application/json")
+    assert status == 200 and "final_decision" in json.loads(body)
+    status, body = post("/predict", transaction, "application/json", accept=MSGPACK)
+    assert status == 200 and "final_decision" in msgpack.unpackb(body)
+
+    packed = {"Time": transaction["Time"], "Amount": transaction["Amount"], "v_f32": v.tobytes()}
+    as_list = {"Time": transaction["Time"], "Amount": transaction["Amount"], "v": v.tolist()}
+    expected = json.loads(post("/predict", as_list, "application/json")[1])
+    assert msgpack.unpackb(post("/predict", packed)[1])["fraud_probability"] == expected["fraud_probability"]
+
+    status, body = post("/predict", {**packed, "v_f32": v.tobytes()[:100]})
+    assert status == 422 and "112 bytes" in json.loads(body)["detail"]
+    status, body = post("/predict", {**packed, "v": v.tolist()})
+    assert status == 422 and json.loads(body)["detail"][0]["input"]["v_f32"] == "<112 bytes>"
+    status, _ = post("/predict", {**packed, "v_f32": "not bytes"}, "application/json")
+    assert status == 422
+    status, body = asyncio.run(call_app(app, "POST", "/predict", b"\xc1", MSGPACK))
+    assert status == 400 and "Invalid MessagePack" in json.loads(body)["detail"]
+
+
+def test_health_reports_msgpack():
+    """/health says MessagePack is available"""
+    status, body = asyncio.run(call_app(app, "GET", "/health"))
+    assert status == 200 and json.loads(body)["serializers"]["msgpack"] is True
+
+
+if __name__ == "__main__":
+    print("🧪 Testing MessagePack transport...")
+    test_msgpack_matches_json()
+    print("✅ MessagePack results match JSON")
+    test_negotiation_and_packed_vector()
+    print("✅ Accept negotiation and packed float32 vectors work")
+    test_health_reports_msgpack()
+    print("✅ /health reports MessagePack support")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the startup warm-up
+Runs the warm-up requests through the application and checks the readiness probe
+"""
+
+import asyncio
+import json
+import logging
+
+from api.app import app
+from api.warm_up import EndpointWarmUp, call_app, ndjson_lines, pa, synthetic_transactions
+
+logging.getLogger("api.app").setLevel(logging.WARNING)
+
+
+def test_warm_up_covers_every_endpoint():
+    """Every warm-up request succeeds, and sizes 1 and MAX_BATCH_SIZE of each batch endpoint are timed"""
+    warm_up = EndpointWarmUp()
+    assert not warm_up.ready
+    asyncio.run(warm_up.run(app))
+
+    status = warm_up.status()
+    assert status["ready"] and status["failures"] == []
+    assert status["warm_up_seconds"] >= sum(status["timings"].values()) * 0.99
+    assert {"predict", "predict/friendly", "predict/batch 1", "predict/batch 1000",
+            "predict/friendly/batch 1000", "predict/upload 1000", "predict/stream 1",
+            "predict/stream 1000"} <= set(status["timings"])
+    if pa is not None:
+        assert "predict/arrow" in status["timings"]
+
+
+def test_warm_up_stream_lines_are_scored():
+    """The NDJSON warm-up body is scored line by line, not answered with error lines"""
+    body, content_type = ndjson_lines(synthetic_transactions(3))
+    status, response = asyncio.run(call_app(app, "POST", "/predict/stream", body, content_type))
+    results = [json.loads(line) for line in response.splitlines()]
+    assert status == 200 and [r["transaction_id"] for r in results] == [1, 2, 3]
+    assert all("error" not in r for r in results)
+
+
+def test_ready_endpoint_follows_warm_up():
+    """/ready answers 503 until the warm-up is done"""
+    from api import app as app_module
+    original = app_module.endpoint_warm_up
+    app_module.endpoint_warm_up = EndpointWarmUp()
+    try:
+        status, body = asyncio.run(call_app(app, "GET", "/ready"))
+        assert status == 503 and json.loads(body)["ready"] is False
+        app_module.endpoint_warm_up.skip()
+        status, body = asyncio.run(call_app(app, "GET", "/ready"))
+        assert status == 200 and json.loads(body)["ready"] is True
+    finally:
+        app_module.endpoint_warm_up = original
+
+
+if __name__ == "__main__":
+    print("🧪 Testing startup warm-up...")
+    test_warm_up_covers_every_endpoint()
+    print("✅ Warm-up requests succeed on every endpoint")
+    test_warm_up_stream_lines_are_scored()
+    print("✅ NDJSON warm-up lines are scored")
+    test_ready_endpoint_follows_warm_up()
+    print("✅ /ready reports 503 until warm-up finishes")
@@ -3,6 +3,8 @@ import numpy as np
 import time
 import random
 
+from services.rule_engine import rule_engine
+
 # MUST BE FIRST - PAGE CONFIG
 st.set_page_config(
     page_title="SecureGuard AI - Fraud Detection",
@@ -260,85 +262,6 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# RULE ENGINE CLASS
-class RuleEngine:
-    def __init__(self):
-        self.location_risk_scores = {
-            "Low Risk (Home Country)": 0,
-            "Medium Risk (Neighboring)": 1,
-            "High Risk (International)": 2,
-            "Very High Risk (Restricted)": 3
-        }
-    
-    def calculate_risk_score(self, transaction_data):
-        risk_score = 0
-        risk_factors = []
-        
-        amount = transaction_data.get('Amount', 0)
-        location_risk = transaction_data.get('location_risk', 'Low Risk (Home Country)')
-        hour_of_day = transaction_data.get('hour_of_day', 12)
-        customer_age_days = transaction_data.get('customer_age_days', 365)
-        daily_transactions = transaction_data.get('daily_transactions', 3)
-        
-        # Amount-based risk
-        if amount >= 50000:
-            risk_score += 3
-            risk_factors.append(f"High transaction amount (${amount:,.2f})")
-        elif amount >= 20000:
-            risk_score += 2
-            risk_factors.append(f"Elevated transaction amount (${amount:,.2f})")
-        elif amount >= 10000:
-            risk_score += 1
-            risk_factors.append(f"Moderate transaction amount (${amount:,.2f})")
-        
-        # Location risk
-        location_score = self.location_risk_scores.get(location_risk, 0)
-        if location_score >= 2:
-            risk_score += 2
-            risk_factors.append("High-risk location")
-        elif location_score >= 1:
-            risk_score += 1
-            risk_factors.append("Medium-risk location")
-        
-        # Time-based risk
-        if hour_of_day in [1, 2, 3]:
-            risk_score += 2
-            risk_factors.append(f"Unusual transaction time ({hour_of_day}:00)")
-        elif hour_of_day in [0, 4, 23]:
-            risk_score += 1
-            risk_factors.append(f"Late transaction time ({hour_of_day}:00)")
-        
-        # Customer age risk
-        if customer_age_days <= 30:
-            risk_score += 2
-            risk_factors.append(f"New customer account ({customer_age_days} days)")
-        elif customer_age_days <= 90:
-            risk_score += 1
-            risk_factors.append(f"Relatively new account ({customer_age_days} days)")
-        
-        # Transaction velocity risk
-        if daily_transactions >= 25:
-            risk_score += 2
-            risk_factors.append(f"High transaction velocity ({daily_transactions}/day)")
-        elif daily_transactions >= 15:
-            risk_score += 1
-            risk_factors.append(f"Elevated transaction velocity ({daily_transactions}/day)")
-        
-        risk_score = max(0, min(risk_score, 10))
-        
-        if risk_score >= 6:
-            risk_level = "HIGH"
-        elif risk_score >= 3:
-            risk_level = "MEDIUM"
-        else:
-            risk_level = "LOW"
-        
-        return risk_score, {
-            'risk_level': risk_level,
-            'risk_factors': risk_factors,
-            'total_risk_score': risk_score
-        }
-
 # ML PROBABILITY GENERATOR
 class MLGenerator:
     def __init__(self):
@@ -386,7 +309,6 @@ class MLGenerator:
         return max(0.01, min(0.99, prob))
 
 # INITIALIZE SERVICES
-rule_engine = RuleEngine()
 ml_generator = MLGenerator()
 
 # SIDEBAR WITH ENTERPRISE THEME
@@ -483,7 +405,7 @@ if submitted:
         }
         
         # Run analysis
-        rule_risk_score, rule_details = rule_engine.calculate_risk_score(transaction_data)
+        rule_risk_score, rule_details = rule_engine.calculate_rule_risk_score(transaction_data)
         ml_prob = ml_generator.generate_ml_probability(transaction_data)
         
         # Decision logic
@@ -532,7 +454,7 @@ if submitted:
     
     with col3:
         risk_level = rule_details.get('risk_level', 'LOW')
-        level_color = "#ef4444" if risk_level == "HIGH" else "#f59e0b" if risk_level == "MEDIUM" else "#22c55e"
+        level_color = "#ef4444" if risk_level in ("CRITICAL", "HIGH") else "#f59e0b" if risk_level == "MEDIUM" else "#22c55e"
         st.markdown(f"""
         <div class="metric-frame">
             <strong>📊 Risk Level</strong><br>